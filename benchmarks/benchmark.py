@@ -0,0 +1,298 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Benchmarks for parsing, serialization and export.
+
+Run all benchmarks and store the results:
+    python benchmarks/benchmark.py --output results.json
+Compare against the results from another commit:
+    python benchmarks/benchmark.py --compare old_results.json
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import codecs
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import timeit
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+from debalot.benchmarks import generators
+from debalot.lib import debian_package
+from debalot.lib import debian_package_pb2 as pb
+from debalot.lib import substvars
+
+
+# A benchmark is slower than its baseline if it takes more than this fraction
+# longer per operation.
+REGRESSION_THRESHOLD = 0.1
+
+
+class Benchmark(object):
+    """A single benchmark.
+
+    Args:
+        name: The name of the benchmark.
+        setup: A function returning a tuple of arguments for function. It is
+            called before each run and is not timed.
+        function: The function to time.
+    """
+    def __init__(self, name, setup, function):
+        self.name = name
+        self.setup = setup
+        self.function = function
+
+    def run(self, min_time=1.0, min_runs=3):
+        """Run the benchmark.
+
+        Args:
+            min_time: The minimum total time in seconds to spend running the
+                function.
+            min_runs: The minimum number of times to run the function.
+        Returns:
+            A dictionary of results.
+        """
+        times = []
+        while len(times) < min_runs or sum(times) < min_time:
+            args = self.setup()
+            start = timeit.default_timer()
+            self.function(*args)
+            times.append(timeit.default_timer() - start)
+        times.sort()
+        median = times[len(times) // 2]
+        return {
+            'runs': len(times),
+            'best': times[0],
+            'median': median,
+            'ops_per_sec': 1 / median if median else None,
+            'peak_memory': self._peak_memory(),
+            'max_rss': _max_rss(),
+        }
+
+    def _peak_memory(self):
+        """Get the peak memory allocated by one run, in bytes, if possible."""
+        if tracemalloc is None:
+            return None
+        args = self.setup()
+        tracemalloc.start()
+        try:
+            self.function(*args)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+def _max_rss():
+    """Get the peak resident set size of this process in bytes."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return max_rss  # Already in bytes.
+    return max_rss * 1024
+
+
+def _import_control_file(text):
+    debian_package.SourcePackage().import_control_file(io.StringIO(text))
+
+
+def _import_control_file_with_substvars(text, substvars_files):
+    debian_package.SourcePackage().import_control_file(io.StringIO(text),
+                                                       substvars_files)
+
+
+def _import_changelog_file(text):
+    debian_package.SourcePackage().import_changelog_file(io.StringIO(text))
+
+
+def _generate_changelog(package):
+    for _ in package.generate_changelog():
+        pass
+
+
+def _generate_recent_changelog(package, since_version):
+    for _ in package.generate_changelog(since_version=since_version):
+        pass
+
+
+def _export_changelog_file(package):
+    handle, filename = tempfile.mkstemp(prefix='debalot_benchmark_')
+    os.close(handle)
+    try:
+        with codecs.open(filename, 'w', encoding='utf-8') as output:
+            package.export_changelog_file(output)
+    finally:
+        os.remove(filename)
+
+
+def _parse_source_package(data):
+    pb.SourcePackage().ParseFromString(data)
+
+
+def get_benchmarks():
+    """Get all benchmarks.
+
+    Returns:
+        A list of Benchmarks.
+    """
+    control_text = generators.control_file(binary_packages=50,
+                                           build_depends=200)
+    substvars_control_text = generators.control_file(binary_packages=200,
+                                                     substvars=True)
+    shared_substvars = substvars.Substvars({
+        'shlibs:Depends': 'libc6 (>= 2.14), libgcc-s1 (>= 3.0)',
+        'misc:Depends': 'debconf (>= 0.5) | debconf-2.0'})
+    substvars_files = {
+        name: shared_substvars
+        for name in re.findall(r'^Package: (.*)$', substvars_control_text,
+                               re.MULTILINE)}
+    changelog_text = generators.changelog(entries=2000)
+    changelog_package = debian_package.SourcePackage()
+    changelog_package.import_changelog_file(io.StringIO(changelog_text))
+    large_package = generators.source_package()
+    large_package_data = large_package.SerializeToString()
+    return [
+        Benchmark('import_control_file',
+                  lambda: (control_text,), _import_control_file),
+        Benchmark('import_control_file[substvars]',
+                  lambda: (substvars_control_text, substvars_files),
+                  _import_control_file_with_substvars),
+        Benchmark('import_changelog_file',
+                  lambda: (changelog_text,), _import_changelog_file),
+        Benchmark('generate_changelog',
+                  lambda: (changelog_package,), _generate_changelog),
+        Benchmark('generate_changelog[since]',
+                  lambda: (changelog_package,
+                           changelog_package.changelog[-10].version),
+                  _generate_recent_changelog),
+        Benchmark('export_changelog_file',
+                  lambda: (changelog_package,), _export_changelog_file),
+        Benchmark('SourcePackage.SerializeToString',
+                  lambda: (large_package,),
+                  lambda package: package.SerializeToString()),
+        Benchmark('SourcePackage.ParseFromString',
+                  lambda: (large_package_data,), _parse_source_package),
+    ]
+
+
+def _git_revision():
+    try:
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.check_output(
+                ['git', 'rev-parse', 'HEAD'],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stderr=devnull).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(benchmarks, pattern=None, min_time=1.0):
+    """Run benchmarks, printing each result as it completes.
+
+    Args:
+        benchmarks: A list of Benchmarks.
+        pattern: A regular expression. If given, only benchmarks whose names
+            match it are run.
+        min_time: The minimum time in seconds to spend on each benchmark.
+    Returns:
+        A dictionary of results, suitable for storing as JSON.
+    """
+    results = {}
+    for benchmark in benchmarks:
+        if pattern and not re.search(pattern, benchmark.name):
+            continue
+        result = results[benchmark.name] = benchmark.run(min_time)
+        print('%-36s %12s ops/sec  %10s peak' % (
+            benchmark.name, _format_rate(result['ops_per_sec']),
+            _format_size(result['peak_memory'])))
+    return {
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'benchmarks': results,
+    }
+
+
+def compare_results(baseline, results, threshold=REGRESSION_THRESHOLD):
+    """Compare results against a baseline.
+
+    Args:
+        baseline: The results of an earlier run.
+        results: The results of this run.
+        threshold: The fraction by which a benchmark may slow down before it
+            is reported as a regression.
+    Returns:
+        A list of (name, ratio) tuples for regressed benchmarks, where ratio
+        is the new median time divided by the baseline median time.
+    """
+    regressions = []
+    print('\nCompared with %s:' % (baseline.get('revision') or 'baseline'))
+    for name, result in sorted(results['benchmarks'].items()):
+        old_result = baseline['benchmarks'].get(name)
+        if not old_result or not old_result['median']:
+            print('%-36s %12s' % (name, 'new'))
+            continue
+        ratio = result['median'] / old_result['median']
+        print('%-36s %11.2fx time' % (name, ratio))
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def _format_rate(ops_per_sec):
+    # The rate is None if the timer was too coarse to time a run.
+    if ops_per_sec is None:
+        return 'n/a'
+    return '%.2f' % ops_per_sec
+
+
+def _format_size(size):
+    if size is None:
+        return 'n/a'
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return '%.1f %s' % (size, unit)
+        size /= 1024
+    return '%.1f GiB' % size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='File in which to store results.')
+    parser.add_argument('--compare', help='Results file to compare against.')
+    parser.add_argument('--filter', help='Only run matching benchmarks.')
+    parser.add_argument('--min-time', type=float, default=1.0,
+                        help='Minimum seconds to spend on each benchmark.')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(get_benchmarks(), args.filter, args.min_time)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare_results(json.load(baseline_file), results)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
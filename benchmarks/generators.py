@@ -0,0 +1,191 @@
+﻿"""Synthetic input generators for benchmarks.
+
+Each generator is deterministic for a given seed, so that results from
+different commits are measured against identical inputs.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import random
+
+from debalot.lib import debian_package
+
+
+_WORDS = ('package', 'upstream', 'release', 'fix', 'build', 'failure',
+          'security', 'update', 'policy', 'standards', 'version', 'bump',
+          'debhelper', 'compat', 'symbols', 'library', 'transition', 'new',
+          'patch', 'drop', 'applied', 'watch', 'file', 'copyright')
+_SECTIONS = ('admin', 'devel', 'libs', 'net', 'python', 'utils', 'web')
+_ARCHITECTURES = ('all', 'amd64', 'arm64', 'armhf', 'i386')
+
+
+def _package_name(generator):
+    return '-'.join(generator.choice(_WORDS)
+                    for _ in range(generator.randint(1, 3)))
+
+
+def _person(generator):
+    name = generator.choice(_WORDS).title() + ' ' + generator.choice(
+        _WORDS).title()
+    return '%s <%s@example.org>' % (name, name.lower().replace(' ', '.'))
+
+
+def _relations(generator, count):
+    relations = []
+    for _ in range(count):
+        name = _package_name(generator)
+        if generator.random() < 0.5:
+            relations.append('%s (>= %d.%d)' % (
+                name, generator.randint(0, 9), generator.randint(0, 99)))
+        else:
+            relations.append(name)
+    return ', '.join(relations)
+
+
+def control_file(binary_packages=10, build_depends=50, uploaders=5, seed=0,
+                 substvars=False):
+    """Generate a debian/control file.
+
+    Args:
+        binary_packages: The number of binary package paragraphs.
+        build_depends: The number of relations in Build-Depends.
+        uploaders: The number of people in Uploaders.
+        seed: The random seed.
+        substvars: If True, binary packages depend on ${shlibs:Depends} and
+            ${misc:Depends} rather than on random packages.
+    Returns:
+        A unicode string containing the control file.
+    """
+    generator = random.Random(seed)
+    lines = [
+        'Source: %s' % _package_name(generator),
+        'Section: %s' % generator.choice(_SECTIONS),
+        'Priority: optional',
+        'Maintainer: %s' % _person(generator),
+        'Uploaders: %s' % ', '.join(_person(generator)
+                                    for _ in range(uploaders)),
+        'Standards-Version: 3.9.5.1',
+        'Build-Depends: %s' % _relations(generator, build_depends),
+        'Build-Depends-Indep: %s' % _relations(generator, build_depends // 5),
+        'Homepage: https://example.org/',
+        'Vcs-Browser: https://example.org/git',
+        'Vcs-Git: https://example.org/git/package.git',
+    ]
+    for _ in range(binary_packages):
+        lines.append('')
+        lines.extend(_binary_paragraph(generator, source_stanza=True,
+                                       substvars=substvars))
+    return '\n'.join(lines) + '\n'
+
+
+def _binary_paragraph(generator, source_stanza=False, substvars=False):
+    lines = [
+        'Package: %s' % _package_name(generator),
+        'Architecture: %s' % generator.choice(_ARCHITECTURES),
+    ]
+    if not source_stanza:
+        lines.extend([
+            'Version: %d.%d-%d' % (generator.randint(0, 9),
+                                   generator.randint(0, 99),
+                                   generator.randint(1, 5)),
+            'Maintainer: %s' % _person(generator),
+            'Installed-Size: %d' % generator.randint(1, 100000),
+            'Section: %s' % generator.choice(_SECTIONS),
+            'Priority: optional',
+        ])
+    lines.extend([
+        'Depends: %s' % ('${shlibs:Depends}, ${misc:Depends}' if substvars
+                         else _relations(generator,
+                                         generator.randint(0, 10))),
+        'Description: %s' % ' '.join(generator.choice(_WORDS)
+                                     for _ in range(6)),
+    ])
+    for _ in range(generator.randint(1, 5)):
+        lines.append(' ' + ' '.join(generator.choice(_WORDS)
+                                    for _ in range(10)))
+    return lines
+
+
+def packages_index(packages=1000, seed=0):
+    """Generate a Packages index.
+
+    Args:
+        packages: The number of binary package paragraphs.
+        seed: The random seed.
+    Returns:
+        A unicode string containing the index.
+    """
+    generator = random.Random(seed)
+    return '\n\n'.join('\n'.join(_binary_paragraph(generator))
+                       for _ in range(packages)) + '\n'
+
+
+def changelog(entries=1000, seed=0):
+    """Generate a debian/changelog file, newest entry first.
+
+    Args:
+        entries: The number of changelog entries.
+        seed: The random seed.
+    Returns:
+        A unicode string containing the changelog.
+    """
+    generator = random.Random(seed)
+    name = _package_name(generator)
+    timestamp = 1000000000 + entries * 86400
+    lines = []
+    for version in range(entries, 0, -1):
+        zone = generator.choice((-300, 0, 60, 120, 330, 720))
+        lines.append('%s (%d.0-1) unstable; urgency=%s' % (
+            name, version, generator.choice(('low', 'medium', 'high'))))
+        lines.append('')
+        for _ in range(generator.randint(1, 6)):
+            lines.append('  * ' + ' '.join(generator.choice(_WORDS)
+                                           for _ in range(8)))
+            if generator.random() < 0.3:
+                lines.append('    ' + ' '.join(generator.choice(_WORDS)
+                                               for _ in range(8)))
+        lines.append('')
+        timestamp -= generator.randint(3600, 86400)
+        lines.append(' -- %s  %s' % (
+            _person(generator),
+            debian_package.Changelog.get_time_string(timestamp, zone)))
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def source_package(changelog_entries=1000, misc_files=10,
+                   misc_file_size=64 * 1024, tarball_size=16 * 1024 * 1024,
+                   seed=0):
+    """Generate a large SourcePackage protobuf.
+
+    Args:
+        changelog_entries: The number of changelog entries.
+        misc_files: The number of miscellaneous files.
+        misc_file_size: The size in bytes of each miscellaneous file.
+        tarball_size: The size in bytes of the original tarball.
+        seed: The random seed.
+    Returns:
+        A SourcePackage protobuf.
+    """
+    generator = random.Random(seed)
+    package = debian_package.SourcePackage()
+    package.import_changelog_file(io.StringIO(changelog(changelog_entries,
+                                                         seed)))
+    package.name = package.changelog[-1].name
+    protobuf = package._pb
+    protobuf.original_tarball = _random_bytes(generator, tarball_size)
+    for i in range(misc_files):
+        misc_file = protobuf.misc_files.add()
+        misc_file.name = 'debian/patches/%04d.patch' % i
+        misc_file.contents = _random_bytes(generator, misc_file_size)
+    return protobuf
+
+
+def _random_bytes(generator, size):
+    # Repeating a random block is much faster than generating every byte.
+    block = bytearray(generator.randint(0, 255) for _ in range(4096))
+    return bytes(block * (size // len(block)) + block[:size % len(block)])
@@ -0,0 +1,31 @@
+﻿"""Build a package index file from one or more Packages files.
+
+The index holds the parsed packages, so the other commands can load it much
+faster than they could parse the Packages files. Packages files may be
+compressed with gzip, bzip2 or xz.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from debalot.lib import package_index
+
+
+def add_arguments(parser):
+    """Add the command's arguments to an argparse parser."""
+    parser.add_argument('index', help='The path of the index to write.')
+    parser.add_argument('packages', nargs='+',
+                        help='The paths of the Packages files to index.')
+
+
+def run(args, worker, output):
+    """Run the command. Returns the exit status."""
+    index = package_index.PackageIndex()
+    for path in args.packages:
+        with package_index.open_packages_file(path) as packages_file:
+            index.import_packages_file(packages_file)
+    worker.save_index(index, args.index)
+    output.write('Indexed %d packages.\n' % len(index))
+    return 0
@@ -0,0 +1,51 @@
+﻿"""Check whether source packages' build dependencies can be satisfied.
+
+For each debian/control file, prints the build relations that can't be met
+from a suite. Exits with status 1 if any can't. See
+BuildDependencyChecker.check for the limits of the check.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import codecs
+
+from debalot.lib import build_check
+from debalot.lib import debian_package
+
+
+def add_arguments(parser):
+    """Add the command's arguments to an argparse parser."""
+    parser.add_argument('index', help='The index of the suite.')
+    parser.add_argument('controls', nargs='+', metavar='control',
+                        help='The paths of the debian/control files to '
+                        'check.')
+    parser.add_argument('--architecture', required=True,
+                        help='The architecture to build for.')
+    parser.add_argument('--arch-only', action='store_true',
+                        help='Ignore Build-Depends-Indep and '
+                        'Build-Conflicts-Indep.')
+
+
+def _read_sources(paths, worker):
+    for path in paths:
+        package = debian_package.SourcePackage()
+        with codecs.open(path, encoding='utf-8-sig') as control_file:
+            worker.import_cache.import_control_file(package, control_file)
+        yield package
+
+
+def run(args, worker, output):
+    """Run the command. Returns the exit status."""
+    checker = build_check.BuildDependencyChecker(
+        worker.load_index(args.index), args.architecture,
+        indep=not args.arch_only)
+    status = 0
+    for name, problems in checker.check_all(
+            _read_sources(args.controls, worker)):
+        status = 1
+        for field, relation in problems:
+            output.write('%s: %s: %s\n' % (name, field, relation))
+    return status
@@ -0,0 +1,42 @@
+﻿"""Check whether binary packages can be installed from a suite.
+
+For each package, prints the dependencies that nothing in the suite
+satisfies. Exits with status 1 if any package is not installable. See
+PackageIndex.find_unsatisfiable for the limits of the check.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+
+def add_arguments(parser):
+    """Add the command's arguments to an argparse parser."""
+    parser.add_argument('index', help='The index of the suite.')
+    parser.add_argument('packages', nargs='+', metavar='package',
+                        help='The names of the binary packages to check.')
+    parser.add_argument('--architecture',
+                        help='Only consider packages for this architecture '
+                        '(and architecture all).')
+
+
+def run(args, worker, output):
+    """Run the command. Returns the exit status."""
+    index = worker.load_index(args.index)
+    status = 0
+    for name in args.packages:
+        try:
+            unsatisfiable = index.find_unsatisfiable(name, args.architecture)
+        except KeyError:
+            output.write('%s: not in the index\n' % name)
+            status = 1
+            continue
+        if not unsatisfiable:
+            output.write('%s: installable\n' % name)
+            continue
+        status = 1
+        for package_name, package_version, relation in unsatisfiable:
+            output.write('%s: %s %s depends on %s\n' % (
+                name, package_name, package_version, relation))
+    return status
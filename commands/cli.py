@@ -0,0 +1,230 @@
+﻿"""The debalot command line tool.
+
+Usage:
+    python -m debalot.commands.cli [--socket PATH] COMMAND [ARGS...]
+
+Each command can run in the calling process, or be sent to a daemon started
+with the serve command. The daemon keeps package indexes loaded and parsed
+files cached between commands, so build scripts that run many commands don't
+load a whole suite each time. If --socket is given (or DEBALOT_SOCKET is set)
+but no daemon is listening, the command runs locally instead.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import codecs
+import collections
+import errno
+import importlib
+import os
+import socket
+import sys
+
+
+# Command name -> (module in debalot.commands, help). Command modules are
+# only imported when their command is run, so that starting the tool, and
+# especially sending a command to the daemon, stays fast.
+COMMANDS = collections.OrderedDict([
+    ('parse-changelog', (
+        'parse_changelog',
+        'Print the entries of a debian/changelog file.')),
+    ('show-control', (
+        'show_control',
+        'Print the source and binary packages of a debian/control file.')),
+    ('build-index', (
+        'build_index',
+        'Build a package index file from one or more Packages files.')),
+    ('diff-suites', (
+        'diff_suites',
+        'Print the packages whose versions differ between two suites.')),
+    ('check-installability', (
+        'check_installability',
+        'Check whether binary packages can be installed from a suite.')),
+    ('check-build-depends', (
+        'check_build_depends',
+        "Check whether source packages' build dependencies can be "
+        'satisfied.')),
+    ('export-columns', (
+        'export_columns',
+        'Export a package index as columns for aggregate queries.')),
+    ('validate', (
+        'validate',
+        'Check changelogs and control files, reporting all of their '
+        'errors.')),
+])
+
+
+def load_command(name):
+    """Import the module of a command.
+
+    Args:
+        name: The name of the command, e.g. 'show-control'.
+    Returns:
+        The command's module.
+    """
+    return importlib.import_module(
+        str('debalot.commands.%s' % COMMANDS[name][0]))
+
+
+class Worker(object):
+    """The state shared by the commands run in one process.
+
+    A command run from the command line gets a fresh Worker. The daemon
+    keeps one for its whole lifetime, so its indexes stay loaded and its
+    import cache stays warm.
+    """
+
+    def __init__(self):
+        from debalot.lib import import_cache
+        # Absolute path -> ((modification time, size), PackageIndex).
+        self._indexes = {}
+        self.import_cache = import_cache.ImportCache()
+
+    @staticmethod
+    def _stat(path):
+        status = os.stat(path)
+        return (status.st_mtime, status.st_size)
+
+    def load_index(self, path):
+        """Load a package index, reusing it if the file hasn't changed.
+
+        Args:
+            path: The path of an index file written by build-index.
+        Returns:
+            A PackageIndex.
+        """
+        path = os.path.abspath(path)
+        stat = self._stat(path)
+        cached = self._indexes.get(path)
+        if cached is None or cached[0] != stat:
+            from debalot.lib import package_index
+            cached = (stat, package_index.PackageIndex.load(path))
+            self._indexes[path] = cached
+        return cached[1]
+
+    def save_index(self, index, path):
+        """Save a package index and keep it loaded.
+
+        Args:
+            index: A PackageIndex.
+            path: The path of the index file.
+        """
+        index.save(path)
+        path = os.path.abspath(path)
+        self._indexes[path] = (self._stat(path), index)
+
+    def run(self, argv, output):
+        """Run a command.
+
+        Args:
+            argv: A list of the command line arguments, without the program
+                name.
+            output: A unicode file object for the command's output.
+        Returns:
+            The command's exit status.
+        """
+        args = parse_args(argv)
+        return args.command.run(args, self, output)
+
+
+def make_parser(command_name=None):
+    """Create the argument parser.
+
+    Args:
+        command_name: The command whose arguments to add, importing its
+            module. If None, no command's arguments are added, which is
+            enough to find the command and the --socket option with
+            parse_known_args.
+    Returns:
+        An argparse.ArgumentParser. The parsed arguments have a command_name
+        attribute, and if it is command_name, a command attribute holding
+        the command's module.
+    """
+    parser = argparse.ArgumentParser(prog='debalot')
+    parser.add_argument(
+        '--socket', default=os.environ.get('DEBALOT_SOCKET'),
+        help='Send the command to the daemon listening on this socket.')
+    subparsers = parser.add_subparsers(title='commands', dest='command_name')
+    subparsers.required = True
+    for name, (_, help_text) in COMMANDS.items():
+        if name != command_name:
+            # Without -h, "debalot COMMAND -h" still reaches the parser with
+            # the command's arguments.
+            subparsers.add_parser(name, help=help_text, add_help=False)
+            continue
+        subparser = subparsers.add_parser(name, help=help_text)
+        command = load_command(name)
+        command.add_arguments(subparser)
+        subparser.set_defaults(command=command)
+    serve = subparsers.add_parser(
+        'serve', help='Run a daemon serving commands over a Unix socket.')
+    serve.add_argument('socket_path', metavar='SOCKET',
+                       help='The path of the socket to listen on.')
+    serve.set_defaults(command=None)
+    return parser
+
+
+def parse_args(argv):
+    """Parse the command line arguments of a command.
+
+    The arguments are parsed once to find the command, then again with the
+    command's arguments, so only the module of the chosen command is
+    imported.
+
+    Args:
+        argv: A list of the command line arguments, without the program
+            name.
+    Returns:
+        An argparse.Namespace, as parsed by make_parser.
+    """
+    args, _ = make_parser().parse_known_args(argv)
+    return make_parser(args.command_name).parse_args(argv)
+
+
+def main(argv=None):
+    """Run the debalot command line tool.
+
+    Args:
+        argv: A list of the command line arguments, without the program
+            name. Defaults to sys.argv[1:].
+    Returns:
+        The exit status.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    # The command's own arguments are left to the daemon, or to Worker.run,
+    # so a command sent to the daemon doesn't import the command's module.
+    args, unparsed = make_parser().parse_known_args(argv)
+    output = sys.stdout
+    if bytes is str:  # Python 2
+        output = codecs.getwriter('utf-8')(sys.stdout)
+    if args.command_name == 'serve':
+        args = parse_args(argv)
+        from debalot.commands import daemon
+        daemon.Server(args.socket_path, Worker()).serve_forever()
+        return 0
+    if args.socket and not set(unparsed) & {'-h', '--help'}:
+        from debalot.commands import daemon
+        try:
+            status, text, message = daemon.request(args.socket, argv)
+        except socket.error as error:
+            if error.errno not in (errno.ENOENT, errno.ECONNREFUSED):
+                raise
+        else:
+            output.write(text)
+            if message is not None:
+                sys.stderr.write('debalot: error: %s\n' % message)
+            return status
+    try:
+        return Worker().run(argv, output)
+    except (EnvironmentError, KeyError, ValueError) as error:
+        sys.stderr.write('debalot: error: %s\n' % (error,))
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for cli module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from debalot.commands import cli
+from debalot.commands import parse_changelog
+from debalot.lib import debian_package_pb2
+
+
+PACKAGES = '''Package: hello
+Version: 2.10-2
+Architecture: amd64
+Depends: libc6 (>= 2.14)
+
+Package: libc6
+Version: 2.31-13
+Architecture: amd64
+
+Package: broken
+Version: 1.0
+Architecture: amd64
+Depends: missing (>= 1) | hello (>= 3)
+'''
+
+
+class TestCommands(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='debalot_test_')
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.worker = cli.Worker()
+        self.packages_path = self.path('Packages')
+        with io.open(self.packages_path, 'w', encoding='utf-8') as output:
+            output.write(PACKAGES)
+        self.index_path = self.path('suite.index')
+        self.assertEqual(
+            'Indexed 3 packages.\n',
+            self.run_command('build-index', self.index_path,
+                             self.packages_path))
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def run_command(self, *argv, **kwargs):
+        output = io.StringIO()
+        status = self.worker.run(list(argv), output)
+        self.assertEqual(kwargs.get('status', 0), status)
+        return output.getvalue()
+
+    def test_parse_changelog(self):
+        output = self.run_command('parse-changelog',
+                                  'lib/test_files/test_changelog')
+        self.assertTrue(output.startswith(
+            'Source: package\nVersion: 0.0.3\nDistribution: stable\n'
+            'Urgency: critical\n'))
+        self.assertIn('Changes:\n package (0.0.3) stable; urgency=critical\n'
+                      ' .\n', output)
+        self.assertNotIn('Version: 0.0.2', output)
+        output = self.run_command('parse-changelog', '--all',
+                                  'lib/test_files/test_changelog')
+        self.assertIn('\n\nSource: some-package\nVersion: 0.0.0\n', output)
+        output = self.run_command('parse-changelog', '--since', '0.0.0',
+                                  '--until', '0.0.3',
+                                  'lib/test_files/test_changelog')
+        self.assertNotIn('Version: 0.0.3\n', output)
+        self.assertIn('Version: 0.0.2\n', output)
+        self.assertIn('Version: 0.0.1-0ubuntu1', output)
+        self.assertNotIn('Version: 0.0.0', output)
+
+    def test_format_change_without_name(self):
+        change = debian_package_pb2.Change(version='1.0',
+                                           distributions=['unstable'])
+        lines = list(parse_changelog.format_change(change))
+        self.assertEqual('Version: 1.0', lines[0])
+        self.assertIn(' (1.0) unstable; urgency=low', lines)
+        self.assertIn('Source: hello',
+                      list(parse_changelog.format_change(change, 'hello')))
+
+    def test_show_control(self):
+        self.assertEqual(
+            'Source: hello-debhelper\n'
+            'Section: oldlibs\n'
+            'Priority: extra\n'
+            'Maintainer: Santiago Vila <sanvila@debian.org>\n'
+            'Standards-Version: 3.9.5.1\n'
+            'Build-Depends: debhelper (>= 9)\n'
+            '\n'
+            'Package: hello-debhelper\n'
+            'Architecture: all\n'
+            'Depends: ${misc:Depends}, hello\n'
+            'Description: transitional dummy package for hello\n'
+            ' hello-debhelper was an example package based on GNU hello.\n'
+            ' The package has been renamed from hello-debhelper to hello\n'
+            ' so this package exists to handle the transition.\n'
+            ' .\n'
+            ' You can safely remove it.\n',
+            self.run_command('show-control', 'lib/test_files/control'))
+        self.assertIn(
+            'Package: hello-debhelper\n'
+            'Architecture: all\n'
+            'Section: oldlibs\n'
+            'Priority: extra\n'
+            'Maintainer: Santiago Vila <sanvila@debian.org>\n',
+            self.run_command('show-control', '--resolve',
+                             'lib/test_files/control'))
+
+    def test_check_installability(self):
+        self.assertEqual('hello: installable\n',
+                         self.run_command('check-installability',
+                                          self.index_path, 'hello'))
+        self.assertEqual(
+            'broken: broken 1.0 depends on missing (>= 1) | hello (>= 3)\n'
+            'nothing: not in the index\n',
+            self.run_command('check-installability', self.index_path,
+                             'broken', 'nothing', status=1))
+
+    def test_check_build_depends(self):
+        self.assertEqual(
+            'hello-debhelper: Build-Depends: debhelper (>= 9)\n',
+            self.run_command('check-build-depends', '--architecture',
+                             'amd64', self.index_path,
+                             'lib/test_files/control', status=1))
+
+    def test_diff_suites(self):
+        new_packages_path = self.path('Packages.new')
+        with io.open(new_packages_path, 'w', encoding='utf-8') as output:
+            output.write(PACKAGES.replace('2.10-2', '2.10-3'))
+        new_index_path = self.path('new.index')
+        self.run_command('build-index', new_index_path, new_packages_path)
+        self.assertEqual('hello amd64 2.10-2 2.10-3\n',
+                         self.run_command('diff-suites', self.index_path,
+                                          new_index_path))
+
+    def test_export_columns(self):
+        self.assertEqual(
+            'Exported 3 packages, 0 KiB installed.\n'
+            'Priority -: 3\n'
+            'Section -: 3\n',
+            self.run_command('export-columns', self.index_path,
+                             self.path('suite.columns')))
+        self.assertTrue(os.path.exists(self.path('suite.columns')))
+
+    def test_validate(self):
+        self.assertEqual('', self.run_command('validate',
+                                              'lib/test_files/control'))
+        changelog_path = self.path('changelog')
+        with io.open(changelog_path, 'w', encoding='utf-8') as output:
+            output.write('hello (1.0) unstable; urgency=soon\n')
+        self.assertEqual(
+            '%s:1: urgency: UrgencyError: Invalid package urgency: SOON\n'
+            '%s:1: trailer: ValueError: Changelog entry has no trailer '
+            'line: 1.0\n' % (changelog_path, changelog_path),
+            self.run_command('validate', changelog_path, status=1))
+
+    def test_show_control_substvars(self):
+        control_path = self.path('control')
+        shutil.copy('lib/test_files/control', control_path)
+        with io.open(self.path('hello-debhelper.substvars'), 'w',
+                     encoding='utf-8') as output:
+            output.write('misc:Depends=debconf (>= 0.5)\n')
+        self.assertIn('Depends: ${misc:Depends}, hello\n',
+                      self.run_command('show-control', control_path))
+        self.assertIn('Depends: debconf (>= 0.5), hello\n',
+                      self.run_command('show-control', '--substvars',
+                                       control_path))
+
+    def test_index_reused_until_changed(self):
+        index = self.worker.load_index(self.index_path)
+        self.assertIs(index, self.worker.load_index(self.index_path))
+        with io.open(self.packages_path, 'a', encoding='utf-8') as output:
+            output.write('\nPackage: new\nVersion: 1\nArchitecture: all\n')
+        self.run_command('build-index', self.index_path, self.packages_path)
+        reloaded = self.worker.load_index(self.index_path)
+        self.assertIsNot(index, reloaded)
+        self.assertEqual(4, len(reloaded))
+
+    def test_import_cache_is_shared(self):
+        self.run_command('show-control', 'lib/test_files/control')
+        self.run_command('show-control', 'lib/test_files/control')
+        self.assertEqual(1, self.worker.import_cache.hits)
+
+
+class TestParser(unittest.TestCase):
+    def test_help_matches_docstrings(self):
+        for name, (_, help_text) in cli.COMMANDS.items():
+            self.assertEqual(cli.load_command(name).__doc__.splitlines()[0],
+                             help_text)
+
+    def test_commands_imported_lazily(self):
+        code = ('import sys\n'
+                'from debalot.commands import cli\n'
+                'args, _ = cli.make_parser().parse_known_args(\n'
+                '    ["show-control", "--resolve", "control"])\n'
+                'assert args.command_name == "show-control"\n'
+                'print(" ".join(sorted(name for name in sys.modules\n'
+                '                      if name.startswith("debalot."))))\n')
+        output = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual('debalot.commands debalot.commands.cli',
+                         output.decode('utf-8').strip())
+
+    def test_parse_args(self):
+        args = cli.parse_args(['show-control', '--resolve', 'control'])
+        self.assertIs(cli.load_command('show-control'), args.command)
+        self.assertTrue(args.resolve)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+﻿"""A daemon that runs debalot commands sent over a Unix socket.
+
+Each connection carries one request, a line of JSON:
+    {"argv": ["check-installability", "amd64.index", "hello"], "cwd": "/"}
+and gets one response, also a line of JSON:
+    {"status": 0, "output": "hello: installable\\n", "error": null}
+
+Requests are handled one at a time by a single Worker, so package indexes
+and parsed files are shared between them. Relative paths in the arguments
+are resolved against the client's working directory.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import errno
+import io
+import json
+import os
+import socket
+
+try:
+    import socketserver
+except ImportError:  # Python 2
+    import SocketServer as socketserver
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Runs the command in a request and writes back the response."""
+
+    def handle(self):
+        request = json.loads(self.rfile.readline().decode('utf-8'))
+        output = io.StringIO()
+        error = None
+        cwd = os.getcwd()
+        try:
+            os.chdir(request['cwd'])
+            status = self.server.worker.run(request['argv'], output)
+        except SystemExit as exit:  # From argparse.
+            status = exit.code
+            error = 'Invalid arguments: %s' % ' '.join(request['argv'])
+        except Exception as exception:
+            status = 1
+            error = '%s: %s' % (type(exception).__name__, exception)
+        finally:
+            os.chdir(cwd)
+        response = {'status': status, 'output': output.getvalue(),
+                    'error': error}
+        self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+
+
+class Server(socketserver.UnixStreamServer):
+    """A server for debalot commands.
+
+    A stale socket file left by a daemon that has exited is replaced, but
+    starting a second daemon on the socket of a running one is an error.
+
+    Args:
+        socket_path: The path of the socket to listen on.
+        worker: The cli.Worker that runs the commands.
+    Raises:
+        ValueError: Another daemon is already listening on the socket.
+    """
+
+    def __init__(self, socket_path, worker):
+        if os.path.exists(socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(socket_path)
+            except socket.error as error:
+                if error.errno != errno.ECONNREFUSED:
+                    raise
+                os.remove(socket_path)
+            else:
+                raise ValueError('A daemon is already listening on',
+                                 socket_path)
+            finally:
+                probe.close()
+        # The Python 2 base class is an old-style class.
+        socketserver.UnixStreamServer.__init__(self, socket_path,
+                                               _RequestHandler)
+        self.socket_path = socket_path
+        self.worker = worker
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def request(socket_path, argv, cwd=None):
+    """Run a command on a daemon.
+
+    Args:
+        socket_path: The path of the daemon's socket.
+        argv: A list of the command line arguments, without the program
+            name.
+        cwd: The directory against which relative paths are resolved.
+            Defaults to the current directory.
+    Returns:
+        A tuple of the command's exit status, its output and an error
+        message (or None).
+    Raises:
+        socket.error: No daemon is listening on the socket.
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+        message = json.dumps({'argv': list(argv), 'cwd': cwd or os.getcwd()})
+        connection.sendall((message + '\n').encode('utf-8'))
+        response_file = connection.makefile('rb')
+        try:
+            response = json.loads(response_file.readline().decode('utf-8'))
+        finally:
+            response_file.close()
+    finally:
+        connection.close()
+    return response['status'], response['output'], response['error']
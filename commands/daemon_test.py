@@ -0,0 +1,91 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for daemon module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import mock
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from debalot.commands import cli
+from debalot.commands import daemon
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='debalot_test_')
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.socket_path = os.path.join(self.directory, 'socket')
+        self.worker = cli.Worker()
+        self.server = daemon.Server(self.socket_path, self.worker)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_request(self):
+        status, output, error = daemon.request(
+            self.socket_path, ['show-control', 'control'],
+            cwd=os.path.abspath('lib/test_files'))
+        self.assertEqual(0, status)
+        self.assertTrue(output.startswith('Source: hello-debhelper\n'))
+        self.assertIsNone(error)
+        daemon.request(self.socket_path, ['show-control', 'control'],
+                       cwd=os.path.abspath('lib/test_files'))
+        self.assertEqual(1, self.worker.import_cache.hits)
+
+    def test_request_error(self):
+        status, output, error = daemon.request(
+            self.socket_path, ['show-control', 'missing'])
+        self.assertEqual(1, status)
+        self.assertIn('missing', error)
+
+    def test_invalid_arguments(self):
+        status, _, error = daemon.request(self.socket_path, ['no-command'])
+        self.assertEqual(2, status)
+        self.assertIn('no-command', error)
+
+    def test_already_running(self):
+        self.assertRaises(ValueError, daemon.Server, self.socket_path,
+                          self.worker)
+
+    def test_stale_socket_replaced(self):
+        path = os.path.join(self.directory, 'stale')
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        server = daemon.Server(path, self.worker)
+        server.server_close()
+        self.assertFalse(os.path.exists(path))
+
+    def test_cli_falls_back_without_daemon(self):
+        missing = os.path.join(self.directory, 'missing')
+        with mock.patch.object(cli.Worker, 'run',
+                               return_value=0, autospec=True) as run:
+            self.assertEqual(0, cli.main(['--socket', missing, 'show-control',
+                                          'control']))
+        run.assert_called_once_with(
+            mock.ANY, ['--socket', missing, 'show-control', 'control'],
+            mock.ANY)
+
+    def test_cli_uses_daemon(self):
+        with mock.patch.object(cli.Worker, 'run',
+                               return_value=3, autospec=True) as run:
+            self.assertEqual(3, cli.main(['--socket', self.socket_path,
+                                          'show-control', 'control']))
+        # Only the daemon's worker ran the command.
+        self.assertEqual(1, run.call_count)
+        self.assertIs(self.worker, run.call_args[0][0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+﻿"""Print the packages whose versions differ between two suites.
+
+Each line shows a package, its architecture and its old and new versions,
+with '-' for a package missing from one of the suites.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from debalot.lib import package_index
+
+
+def add_arguments(parser):
+    """Add the command's arguments to an argparse parser."""
+    parser.add_argument('old', help='The index of the old suite.')
+    parser.add_argument('new', help='The index of the new suite.')
+
+
+def run(args, worker, output):
+    """Run the command. Returns the exit status."""
+    differences = package_index.diff_indexes(worker.load_index(args.old),
+                                             worker.load_index(args.new))
+    for name, architecture, old_version, new_version in differences:
+        output.write('%s %s %s %s\n' % (name, architecture,
+                                        old_version or '-',
+                                        new_version or '-'))
+    return 0
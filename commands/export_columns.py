@@ -0,0 +1,43 @@
+﻿"""Export a package index as columns for aggregate queries.
+
+The export can be loaded with columnar.PackageColumns.load, optionally as
+memory-mapped NumPy arrays. A summary of the suite is printed: the number of
+packages and their total installed size, and the package count per priority
+and per section.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from debalot.lib import columnar
+from debalot.lib import debian_package_pb2 as pb
+
+
+def add_arguments(parser):
+    """Add the command's arguments to an argparse parser."""
+    parser.add_argument('index', help='The path of the package index.')
+    parser.add_argument('output', help='The path of the export to write.')
+
+
+def run(args, worker, output):
+    """Run the command. Returns the exit status."""
+    columns = columnar.PackageColumns.from_packages(
+        worker.load_index(args.index))
+    columns.save(args.output)
+    installed_size = sum(size for size in columns.columns['installed_size']
+                         if size >= 0)
+    output.write('Exported %d packages, %d KiB installed.\n'
+                 % (len(columns), installed_size))
+    for priority, count in sorted(
+            columns.value_counts('priority').items()):
+        if priority < 0:
+            output.write('Priority -: %d\n' % count)
+        else:
+            output.write('Priority %s: %d\n'
+                         % (pb.Priority.Name(priority).lower(), count))
+    for section, count in sorted(columns.value_counts('section').items(),
+                                 key=lambda item: (item[0] or '', item[1])):
+        output.write('Section %s: %d\n' % (section or '-', count))
+    return 0
@@ -0,0 +1,85 @@
+﻿"""Print the entries of a debian/changelog file.
+
+The output has the same fields as dpkg-parsechangelog, one paragraph per
+entry, newest first. By default only the newest entry is shown, or every
+entry in the range given by --since and --until.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import codecs
+
+from debalot.lib import debian_package
+from debalot.lib import debian_package_pb2 as pb
+from debalot.lib import person
+
+
+def add_arguments(parser):
+    """Add the command's arguments to an argparse parser."""
+    parser.add_argument('changelog', help='The path of the changelog.')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--count', type=int,
+                       help='The number of entries to print.')
+    group.add_argument('--all', action='store_true',
+                       help='Print every entry.')
+    parser.add_argument('--since', metavar='VERSION',
+                        help='Only print entries later than this version.')
+    parser.add_argument('--until', metavar='VERSION',
+                        help='Only print entries earlier than this version.')
+
+
+def format_change(change, name=None):
+    """Format a changelog entry as a paragraph of control fields.
+
+    Args:
+        change: A Change protobuf.
+        name: The source package name to use if the entry has none. If
+            neither is known, the Source field is left out.
+    Yields:
+        Each line of the paragraph.
+    """
+    urgency = pb.Urgency.Name(change.urgency).lower()
+    if change.HasField('urgency_commentary'):
+        urgency += ' ' + change.urgency_commentary
+    source = change.name or name
+    if source:
+        yield 'Source: %s' % source
+    yield 'Version: %s' % change.version
+    yield 'Distribution: %s' % ' '.join(change.distributions)
+    yield 'Urgency: %s' % urgency
+    yield 'Maintainer: %s' % person.format_person(change.maintainer)
+    yield 'Timestamp: %d' % change.timestamp
+    yield 'Date: %s' % debian_package.Changelog.get_time_string(
+        change.timestamp, change.timezone)
+    if change.closes:
+        yield 'Closes: %s' % ' '.join('%d' % bug for bug in change.closes)
+    if change.launchpad_bugs:
+        yield 'Launchpad-Bugs-Fixed: %s' % ' '.join(
+            '%d' % bug for bug in change.launchpad_bugs)
+    yield 'Changes:'
+    header = '(%s) %s; urgency=%s' % (
+        change.version, ' '.join(change.distributions), urgency)
+    yield ' %s %s' % (source, header) if source else ' ' + header
+    yield ' .'
+    for entry in change.entries:
+        yield ' %s' % entry if entry else ' .'
+
+
+def run(args, worker, output):
+    """Run the command. Returns the exit status."""
+    package = debian_package.SourcePackage()
+    with codecs.open(args.changelog, encoding='utf-8-sig') as changelog:
+        worker.import_cache.import_changelog_file(package, changelog)
+    limit = args.count
+    if limit is None and not (args.all or args.since or args.until):
+        limit = 1
+    changes = package.get_changes(limit, args.since, args.until)
+    for number, change in enumerate(changes):
+        if number:
+            output.write('\n')
+        for line in format_change(change):
+            output.write(line + '\n')
+    return 0
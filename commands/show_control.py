@@ -0,0 +1,156 @@
+﻿"""Print the source and binary packages of a debian/control file.
+
+The fields are printed as parsed, with relations and people in their
+canonical forms. With --resolve, each binary package also shows the fields
+it inherits from the source package. With --substvars, variables in binary
+relation fields are expanded using the debian/*.substvars files next to the
+control file.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import codecs
+import os
+
+from debalot.lib import debian_package
+from debalot.lib import debian_package_pb2 as pb
+from debalot.lib import person
+from debalot.lib import substvars
+
+
+_RELATION_FIELDS = (
+    ('Build-Depends', 'build_depends'),
+    ('Build-Depends-Indep', 'build_depends_indep'),
+    ('Build-Conflicts', 'build_conflicts'),
+    ('Build-Conflicts-Indep', 'build_conflicts_indep'),
+)
+_BINARY_RELATION_FIELDS = (
+    ('Pre-Depends', 'pre_depends'),
+    ('Depends', 'depends'),
+    ('Recommends', 'recommends'),
+    ('Suggests', 'suggests'),
+    ('Enhances', 'enhances'),
+    ('Breaks', 'breaks'),
+    ('Conflicts', 'conflicts'),
+    ('Replaces', 'replaces'),
+    ('Built-Using', 'built_using'),
+)
+
+
+def add_arguments(parser):
+    """Add the command's arguments to an argparse parser."""
+    parser.add_argument('control', help='The path of the control file.')
+    parser.add_argument('--resolve', action='store_true',
+                        help='Show the fields that binary packages inherit '
+                        'from the source package.')
+    parser.add_argument('--substvars', action='store_true',
+                        help='Expand variables in binary relation fields '
+                        'using the .substvars files next to the control '
+                        'file.')
+
+
+def format_relations(relations):
+    """Format a repeated Relation field as a control field value."""
+    return ', '.join(debian_package.Relation.get_relation_string(relation)
+                     for relation in relations)
+
+
+def format_source(package):
+    """Format the source paragraph of a control file.
+
+    Args:
+        package: A SourcePackage protobuf.
+    Yields:
+        Each line of the paragraph.
+    """
+    yield 'Source: %s' % package.name
+    if package.HasField('section'):
+        yield 'Section: %s' % package.section
+    if package.HasField('priority'):
+        yield 'Priority: %s' % pb.Priority.Name(package.priority).lower()
+    if package.HasField('maintainer'):
+        yield 'Maintainer: %s' % person.format_person(package.maintainer)
+    if package.uploaders:
+        yield 'Uploaders: %s' % ', '.join(
+            person.format_person(uploader) for uploader in package.uploaders)
+    if package.HasField('standards_version'):
+        standards_version = package.standards_version
+        numbers = [standards_version.major_version,
+                   standards_version.minor_version]
+        if standards_version.HasField('major_patch'):
+            numbers.append(standards_version.major_patch)
+        if standards_version.HasField('minor_patch'):
+            numbers.append(standards_version.minor_patch)
+        yield 'Standards-Version: %s' % '.'.join(
+            '%d' % number for number in numbers)
+    for key, field_name in _RELATION_FIELDS:
+        relations = getattr(package, field_name)
+        if relations:
+            yield '%s: %s' % (key, format_relations(relations))
+    if package.HasField('homepage'):
+        yield 'Homepage: %s' % package.homepage
+    if package.HasField('vcs_browser'):
+        yield 'Vcs-Browser: %s' % package.vcs_browser
+    for field in package.additional_fields:
+        yield '%s: %s' % (field.key, field.value)
+
+
+def format_binary(package):
+    """Format a binary paragraph of a control file.
+
+    Args:
+        package: A BinaryPackage protobuf.
+    Yields:
+        Each line of the paragraph.
+    """
+    yield 'Package: %s' % package.name
+    yield 'Architecture: %s' % package.architecture
+    if package.HasField('section'):
+        yield 'Section: %s' % package.section
+    if package.HasField('priority'):
+        yield 'Priority: %s' % pb.Priority.Name(package.priority).lower()
+    if package.HasField('maintainer'):
+        yield 'Maintainer: %s' % person.format_person(package.maintainer)
+    if package.HasField('essential'):
+        yield 'Essential: %s' % ('yes' if package.essential else 'no')
+    for key, field_name in _BINARY_RELATION_FIELDS:
+        relations = getattr(package, field_name)
+        if relations:
+            yield '%s: %s' % (key, format_relations(relations))
+    if package.provides:
+        yield 'Provides: %s' % ', '.join(package.provides)
+    if package.HasField('homepage'):
+        yield 'Homepage: %s' % package.homepage
+    for field in package.additional_fields:
+        yield '%s: %s' % (field.key, field.value)
+    if package.HasField('description'):
+        lines = package.description.split('\n')
+        yield 'Description: %s' % lines[0]
+        for line in lines[1:]:
+            yield ' %s' % line
+
+
+def run(args, worker, output):
+    """Run the command. Returns the exit status."""
+    package = debian_package.SourcePackage()
+    substvars_files = None
+    if args.substvars:
+        substvars_files = substvars.load_directory(
+            os.path.dirname(os.path.abspath(args.control)))
+    with codecs.open(args.control, encoding='utf-8-sig') as control_file:
+        worker.import_cache.import_control_file(package, control_file,
+                                                substvars_files)
+    for line in format_source(package._pb):
+        output.write(line + '\n')
+    if args.resolve:
+        binary_packages = package.iter_binary_packages()
+    else:
+        binary_packages = package._pb.binary_packages
+    for binary_package in binary_packages:
+        output.write('\n')
+        for line in format_binary(binary_package):
+            output.write(line + '\n')
+    return 0
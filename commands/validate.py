@@ -0,0 +1,35 @@
+﻿"""Check changelogs and control files, reporting all of their errors.
+
+Files named 'changelog' are checked as changelogs and files named 'control'
+as debian/control files. Each error is printed as
+"path:line: field: error class: message". Exits with status 1 if any file
+has errors.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from debalot.lib import validation
+
+
+def add_arguments(parser):
+    """Add the command's arguments to an argparse parser."""
+    parser.add_argument('paths', nargs='+', metavar='path',
+                        help='The paths of the files to check.')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='The number of files to check in parallel. 0 '
+                        'uses one process per CPU.')
+
+
+def run(args, worker, output):
+    """Run the command. Returns the exit status."""
+    status = 0
+    for diagnostic in validation.validate_files(args.paths,
+                                                args.jobs or None):
+        status = 1
+        output.write('%s:%s: %s: %s: %s\n' % (
+            diagnostic.path, diagnostic.line or '-', diagnostic.field or '-',
+            diagnostic.error_class, diagnostic.message))
+    return status
@@ -0,0 +1,112 @@
+﻿"""asyncio counterparts of the SourcePackage import functions.
+
+These read from an asyncio.StreamReader or from any async iterable of byte
+chunks, parsing as data arrives rather than blocking on readline(), so that
+a single event loop can ingest many files concurrently.
+
+Requires Python 3.6 or later.
+
+Example use:
+    reader, writer = await asyncio.open_connection(host, port)
+    async for change in async_import.iter_changes(reader):
+        handle(change)
+"""
+
+import asyncio
+import codecs
+
+from debalot.lib import debian_package
+
+
+_CHUNK_SIZE = 64 * 1024
+
+
+async def iter_chunks(source):
+    """Iterate over the byte chunks from a source.
+
+    Args:
+        source: An asyncio.StreamReader or an async iterable of bytes.
+    Yields:
+        Each chunk of bytes.
+    """
+    if isinstance(source, asyncio.StreamReader):
+        while True:
+            chunk = await source.read(_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        async for chunk in source:
+            yield chunk
+
+
+async def iter_lines(source, encoding='utf-8-sig'):
+    """Iterate over the lines of text from a source.
+
+    Args:
+        source: An asyncio.StreamReader or an async iterable of bytes.
+        encoding: The encoding of the text. The default skips any leading
+            byte order mark.
+    Yields:
+        Each line as a string, including its line ending except possibly on
+        the last line.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    async for chunk in iter_chunks(source):
+        pending += decoder.decode(chunk)
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+async def iter_changes(source):
+    """Parse changelog entries as they arrive from a source.
+
+    Args:
+        source: An asyncio.StreamReader or an async iterable of bytes
+            containing a changelog.
+    Yields:
+        A Change protobuf for each entry, in the order that they appear in
+        the changelog (newest first).
+    """
+    parser = debian_package.ChangelogParser()
+    async for line in iter_lines(source):
+        change = parser.feed(line)
+        if change is not None:
+            yield change
+    parser.close()
+
+
+async def import_changelog_file(package, source):
+    """Import a changelog into a source package. Extends current changelog.
+
+    Args:
+        package: A SourcePackage.
+        source: An asyncio.StreamReader or an async iterable of bytes
+            containing a changelog.
+    """
+    changes = [change async for change in iter_changes(source)]
+    changes.reverse()
+    package.changelog.extend(changes)
+    package.reset_changelog_index()
+
+
+async def import_control_file(package, source, substvars_files=None):
+    """Import a control file into a source package.
+
+    Args:
+        package: A SourcePackage.
+        source: An asyncio.StreamReader or an async iterable of bytes
+            containing a control file.
+        substvars_files: An optional dictionary mapping binary package names
+            to the Substvars with which to expand their relation fields.
+    """
+    parser = debian_package.ControlParser(package, substvars_files)
+    async for line in iter_lines(source):
+        parser.feed(line)
+    parser.close()
@@ -0,0 +1,113 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for async_import module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import sys
+import unittest
+
+from debalot.lib.test_files import test_data
+from debalot.lib import debian_package
+
+
+class _Chunks(object):
+    """An async iterable over a list of byte chunks."""
+    def __init__(self, data, chunk_size):
+        self._chunks = [data[i:i + chunk_size]
+                        for i in range(0, len(data), chunk_size)]
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        import asyncio
+        if not self._chunks:
+            raise StopAsyncIteration
+        return asyncio.sleep(0, result=self._chunks.pop(0))
+
+
+@unittest.skipIf(sys.version_info < (3, 6), 'asyncio requires Python 3.6')
+class TestAsyncImport(unittest.TestCase):
+    def setUp(self):
+        import asyncio
+        from debalot.lib import async_import
+        self.asyncio = asyncio
+        self.async_import = async_import
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        test_files = os.path.join(os.path.dirname(__file__), 'test_files')
+        with open(os.path.join(test_files, 'test_changelog'), 'rb') as f:
+            self.changelog = f.read()
+        with open(os.path.join(test_files, 'control'), 'rb') as f:
+            self.control = f.read()
+
+    def tearDown(self):
+        self.loop.close()
+        self.asyncio.set_event_loop(None)
+
+    def collect(self, async_iterator):
+        results = []
+        while True:
+            try:
+                results.append(
+                    self.loop.run_until_complete(async_iterator.__anext__()))
+            except StopAsyncIteration:
+                return results
+
+    def test_iter_lines(self):
+        # Chunks of 3 bytes split both lines and multi-byte characters.
+        text = '\ufeffline one\nlíne two\n\nlast'
+        lines = self.collect(self.async_import.iter_lines(
+            _Chunks(text.encode('utf-8'), 3)))
+        self.assertEqual(['line one\n', 'líne two\n', '\n', 'last'], lines)
+
+    def test_iter_changes(self):
+        changes = self.collect(self.async_import.iter_changes(
+            _Chunks(self.changelog, 7)))
+        expected = list(reversed(
+            test_data.SourcePackage.SOURCE_PACKAGE.changelog))
+        self.assertEqual([change.version for change in expected],
+                         [change.version for change in changes])
+        self.assertEqual([change.timestamp for change in expected],
+                         [change.timestamp for change in changes])
+
+    def test_import_changelog_file_stream_reader(self):
+        reader = self.asyncio.StreamReader()
+        reader.feed_data(self.changelog)
+        reader.feed_eof()
+        package = debian_package.SourcePackage()
+        self.loop.run_until_complete(
+            self.async_import.import_changelog_file(package, reader))
+        sync_package = debian_package.SourcePackage()
+        sync_package.import_changelog_file(
+            io.StringIO(self.changelog.decode('utf-8-sig')))
+        self.assertEqual(sync_package._pb.SerializePartialToString(),
+                         package._pb.SerializePartialToString())
+
+    def test_import_control_file(self):
+        package = debian_package.SourcePackage()
+        self.loop.run_until_complete(self.async_import.import_control_file(
+            package, _Chunks(self.control, 5)))
+        self.assertEqual('hello-debhelper', package.name)
+        self.assertEqual('debhelper', package.build_depends[0].name)
+        self.assertEqual('hello-debhelper', package.binary_packages[0].name)
+
+    def test_concurrent_imports(self):
+        packages = [debian_package.SourcePackage() for _ in range(50)]
+        self.loop.run_until_complete(self.asyncio.gather(*[
+            self.async_import.import_changelog_file(
+                package, _Chunks(self.changelog, 64))
+            for package in packages]))
+        for package in packages:
+            self.assertEqual(4, len(package.changelog))
+
+
+if __name__ == "__main__":
+    unittest.main()
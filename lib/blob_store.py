@@ -0,0 +1,197 @@
+﻿"""A content-addressed store for the large files belonging to packages.
+
+A SourcePackage may embed its original tarball and miscellaneous files
+directly. When many versions of a package are archived, those embedded bytes
+are mostly identical copies of one another. A BlobStore instead keeps each
+distinct file once on the local disk, keyed by the SHA-256 digest of its
+contents, and the package references it by that digest.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import errno
+import hashlib
+import os
+import tempfile
+
+from debalot.lib import cache
+from debalot.lib import file
+
+
+# The default read cache holds up to 64 MiB of blob contents.
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+_CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore(object):
+    """A content-addressed blob store in a local directory.
+
+    Blobs are stored at {directory}/{digest[:2]}/{digest[2:]}, where digest is
+    the hex SHA-256 digest of the blob. Storing the same contents twice only
+    writes them to disk once.
+
+    Args:
+        directory: The directory in which to keep the blobs. It is created if
+            it does not exist.
+        cache_size: The maximum total size in bytes of recently read blobs to
+            keep in memory.
+    """
+    def __init__(self, directory, cache_size=DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self._cache = cache.LRUCache(cache_size)
+        file.make_directory(directory)
+
+    def path(self, digest):
+        """Get the path at which the blob with the given digest is stored.
+
+        Args:
+            digest: The hex SHA-256 digest of the blob.
+        Returns:
+            A string containing the path of the blob's file.
+        """
+        return os.path.join(self.directory, digest[:2], digest[2:])
+
+    def __contains__(self, digest):
+        return digest in self._cache or self._stored(digest)
+
+    def _stored(self, digest):
+        # Only the file counts when writing: a blob that is cached in memory
+        # but missing on disk must still be written.
+        return os.path.exists(self.path(digest))
+
+    def put(self, data):
+        """Store a blob.
+
+        Args:
+            data: A byte string of the blob's contents.
+        Returns:
+            The hex SHA-256 digest of the blob.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        if not self._stored(digest):
+            self._write(digest, [data])
+        return digest
+
+    def put_file(self, input_file):
+        """Store the contents of a file as a blob, without reading it all
+        into memory at once.
+
+        Args:
+            input_file: A readable binary file object.
+        Returns:
+            The hex SHA-256 digest of the blob.
+        """
+        digest = hashlib.sha256()
+        temp_path = self._temp_file()
+        try:
+            with open(temp_path, 'wb') as output:
+                while True:
+                    chunk = input_file.read(_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    output.write(chunk)
+            digest = digest.hexdigest()
+            if not self._stored(digest):
+                self._rename(temp_path, digest)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return digest
+
+    def get(self, digest):
+        """Get the contents of a blob.
+
+        Args:
+            digest: The hex SHA-256 digest of the blob.
+        Returns:
+            A byte string of the blob's contents.
+        Raises:
+            KeyError: The store does not contain the blob.
+        """
+        data = self._cache.get(digest)
+        if data is not None:
+            return data
+        try:
+            with self.open(digest) as blob:
+                data = blob.read()
+        except IOError as error:
+            if error.errno == errno.ENOENT:
+                raise KeyError(digest)
+            raise
+        self._cache.put(digest, data)
+        return data
+
+    def open(self, digest):
+        """Open a blob for reading, bypassing the read cache.
+
+        Args:
+            digest: The hex SHA-256 digest of the blob.
+        Returns:
+            A readable binary file object.
+        """
+        return open(self.path(digest), 'rb')
+
+    def detach_files(self, source_package):
+        """Move the embedded files of a source package into the store.
+
+        The original tarball and the contents of each miscellaneous file are
+        stored, then replaced in the protobuf by references to their digests.
+
+        Args:
+            source_package: A SourcePackage protobuf, modified in place.
+        """
+        if source_package.HasField('original_tarball'):
+            source_package.original_tarball_sha256 = self.put(
+                source_package.original_tarball)
+            source_package.ClearField('original_tarball')
+        for misc_file in source_package.misc_files:
+            if misc_file.HasField('contents'):
+                misc_file.contents_sha256 = self.put(misc_file.contents)
+                misc_file.ClearField('contents')
+
+    def attach_files(self, source_package):
+        """Embed the files referenced by a source package from the store.
+
+        This is the reverse of detach_files.
+
+        Args:
+            source_package: A SourcePackage protobuf, modified in place.
+        Raises:
+            KeyError: A referenced blob is not in the store.
+        """
+        if source_package.HasField('original_tarball_sha256'):
+            source_package.original_tarball = self.get(
+                source_package.original_tarball_sha256)
+            source_package.ClearField('original_tarball_sha256')
+        for misc_file in source_package.misc_files:
+            if misc_file.HasField('contents_sha256'):
+                misc_file.contents = self.get(misc_file.contents_sha256)
+                misc_file.ClearField('contents_sha256')
+
+    def _write(self, digest, chunks):
+        temp_path = self._temp_file()
+        try:
+            with open(temp_path, 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            self._rename(temp_path, digest)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _temp_file(self):
+        handle, temp_path = tempfile.mkstemp(prefix='.tmp-',
+                                             dir=self.directory)
+        os.close(handle)
+        return temp_path
+
+    def _rename(self, temp_path, digest):
+        # Renaming within a filesystem is atomic, so concurrent writers of the
+        # same blob never leave a partially written file behind.
+        path = self.path(digest)
+        file.make_directory(os.path.dirname(path))
+        os.rename(temp_path, path)
@@ -0,0 +1,95 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for blob_store module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from debalot.lib import blob_store
+from debalot.lib import debian_package_pb2
+
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='debalot_test_')
+        self.store = blob_store.BlobStore(self.directory)
+        self.data = b'Some tarball contents.'
+        self.digest = hashlib.sha256(self.data).hexdigest()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_put_returns_digest(self):
+        self.assertEqual(self.digest, self.store.put(self.data))
+        self.assertTrue(os.path.isfile(self.store.path(self.digest)))
+
+    def test_put_deduplicates(self):
+        self.store.put(self.data)
+        os.utime(self.store.path(self.digest), (0, 0))
+        self.store.put(self.data)
+        self.assertEqual(0, os.stat(self.store.path(self.digest)).st_mtime)
+
+    def test_put_file(self):
+        digest = self.store.put_file(io.BytesIO(self.data))
+        self.assertEqual(self.digest, digest)
+        self.assertEqual(self.data, self.store.get(digest))
+        self.assertEqual([os.path.basename(self.store.path(digest))],
+                         os.listdir(os.path.dirname(self.store.path(digest))))
+
+    def test_get(self):
+        self.store.put(self.data)
+        self.assertEqual(self.data,
+                         blob_store.BlobStore(self.directory).get(self.digest))
+
+    def test_get_cached(self):
+        self.store.put(self.data)
+        self.store.get(self.digest)
+        os.remove(self.store.path(self.digest))
+        self.assertEqual(self.data, self.store.get(self.digest))
+
+    def test_put_rewrites_cached_blob(self):
+        self.store.put(self.data)
+        self.store.get(self.digest)
+        os.remove(self.store.path(self.digest))
+        self.assertEqual(self.digest, self.store.put(self.data))
+        self.assertTrue(os.path.isfile(self.store.path(self.digest)))
+        os.remove(self.store.path(self.digest))
+        self.store.put_file(io.BytesIO(self.data))
+        self.assertTrue(os.path.isfile(self.store.path(self.digest)))
+
+    def test_get_missing(self):
+        with self.assertRaises(KeyError):
+            self.store.get(self.digest)
+
+    def test_detach_and_attach_files(self):
+        package = debian_package_pb2.SourcePackage()
+        package.name = 'package'
+        package.original_tarball = self.data
+        misc_file = package.misc_files.add()
+        misc_file.name = 'debian.patch'
+        misc_file.contents = self.data
+        expected = package.SerializeToString()
+
+        self.store.detach_files(package)
+        self.assertFalse(package.HasField('original_tarball'))
+        self.assertFalse(package.misc_files[0].HasField('contents'))
+        self.assertEqual(self.digest, package.original_tarball_sha256)
+        self.assertEqual(self.digest, package.misc_files[0].contents_sha256)
+        self.assertEqual(1, len(os.listdir(self.directory)))
+
+        self.store.attach_files(package)
+        self.assertEqual(expected, package.SerializeToString())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+﻿"""Checking whether source packages' build dependencies can be satisfied.
+
+Before a build is queued, the Build-Depends, Build-Depends-Indep,
+Build-Conflicts and Build-Conflicts-Indep of a source package can be checked
+against the package index of the suite it will be built in, without setting
+up a chroot. A BuildDependencyChecker checks many source packages against one
+index and architecture, and caches the candidates of each relation, since
+most build dependencies (debhelper, the compilers...) are shared by many
+packages.
+
+Example use:
+    checker = BuildDependencyChecker(PackageIndex.load('amd64.index'),
+                                     'amd64')
+    for name, problems in checker.check_all(sources):
+        for field, relation in problems:
+            print('%s: %s: %s' % (name, field, relation))
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import itertools
+
+from debalot.lib import debian_package
+
+
+def _split_architecture(architecture):
+    """Split a Debian architecture into its operating system and CPU."""
+    if '-' in architecture:
+        return tuple(architecture.split('-', 1))
+    return 'linux', architecture
+
+
+def architecture_matches(pattern, architecture):
+    """Check whether an architecture matches an architecture wildcard.
+
+    Args:
+        pattern: An architecture such as 'amd64', or a wildcard such as
+            'any', 'linux-any' or 'any-i386'.
+        architecture: An architecture such as 'amd64' or 'hurd-i386'.
+    Returns:
+        True if the pattern matches the architecture.
+    """
+    if pattern in ('any', architecture):
+        return True
+    if '-' not in pattern:
+        return False
+    pattern_os, pattern_cpu = pattern.split('-', 1)
+    os_name, cpu = _split_architecture(architecture)
+    return pattern_os in ('any', os_name) and pattern_cpu in ('any', cpu)
+
+
+def relation_applies(relation, architecture):
+    """Check whether a relation applies on an architecture.
+
+    Args:
+        relation: A Relation protobuf. Its alternatives are not considered.
+        architecture: An architecture such as 'amd64'.
+    Returns:
+        True if the relation has no architecture restriction, or if the
+        restriction, e.g. "[linux-any !hurd-i386]", includes the
+        architecture.
+    """
+    if not relation.architectures:
+        return True
+    negated = [pattern[1:] for pattern in relation.architectures
+               if pattern.startswith('!')]
+    if negated:
+        return not any(architecture_matches(pattern, architecture)
+                       for pattern in negated)
+    return any(architecture_matches(pattern, architecture)
+               for pattern in relation.architectures)
+
+
+def _package_key(package):
+    return (package.name, package.version, package.architecture)
+
+
+class BuildDependencyChecker(object):
+    """Checks build relations against a package index.
+
+    Args:
+        index: A PackageIndex of the suite to build in.
+        architecture: The architecture to build for. Only packages for this
+            architecture or for all architectures are considered, and
+            relations restricted to other architectures are ignored.
+        indep: If false, Build-Depends-Indep and Build-Conflicts-Indep are
+            ignored, as in an architecture-dependent-only build.
+    """
+    def __init__(self, index, architecture, indep=True):
+        self.index = index
+        self.architecture = architecture
+        self.indep = indep
+        # (name, relationship, version) -> candidate packages.
+        self._candidates = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get_candidates(self, relation):
+        key = (relation.name,
+               relation.relationship if relation.HasField('relationship')
+               else None,
+               relation.version)
+        candidates = self._candidates.get(key)
+        if candidates is not None:
+            self.hits += 1
+            return candidates
+        self.misses += 1
+        candidates = self.index.get_candidates(relation, self.architecture)
+        self._candidates[key] = candidates
+        return candidates
+
+    def _find_candidates(self, relation):
+        """Get the candidates of a relation's applicable alternatives.
+
+        Returns:
+            A list of BinaryPackage protobufs, or None if no alternative
+            applies on the architecture.
+        """
+        alternatives = [
+            alternative for alternative
+            in itertools.chain([relation], relation.alternatives)
+            if relation_applies(alternative, self.architecture)]
+        if not alternatives:
+            return None
+        return list(itertools.chain.from_iterable(
+            self._get_candidates(alternative)
+            for alternative in alternatives))
+
+    def _fields(self, source, depends):
+        if depends:
+            fields = [('Build-Depends', source.build_depends),
+                      ('Build-Depends-Indep', source.build_depends_indep)]
+        else:
+            fields = [('Build-Conflicts', source.build_conflicts),
+                      ('Build-Conflicts-Indep', source.build_conflicts_indep)]
+        return fields if self.indep else fields[:1]
+
+    def check(self, source):
+        """Find the build relations of a source package that can't be met.
+
+        A build dependency can't be met if nothing in the index satisfies
+        it, or if everything that does is excluded by a build conflict. A
+        build conflict can't be met if it matches an essential package, or
+        if it excludes everything that satisfies a build dependency. Choices
+        between alternatives are not searched further than that, so this is
+        a quick check rather than a full solver.
+
+        Args:
+            source: A SourcePackage or SourcePackage protobuf.
+        Returns:
+            A list of (field, relation string) tuples, e.g.
+            ('Build-Depends', 'debhelper (>= 13)'). It is empty if the build
+            relations appear satisfiable.
+        """
+        problems = []
+        # (field, relation, keys of the packages the relation excludes).
+        conflicts = []
+        for field, relations in self._fields(source, depends=False):
+            for relation in relations:
+                candidates = self._find_candidates(relation)
+                if not candidates:
+                    continue
+                conflicts.append((field, relation,
+                                  set(_package_key(package)
+                                      for package in candidates)))
+                if any(package.essential for package in candidates):
+                    problems.append((field, relation))
+        excluded = set()
+        for _, _, keys in conflicts:
+            excluded |= keys
+        for field, relations in self._fields(source, depends=True):
+            for relation in relations:
+                candidates = self._find_candidates(relation)
+                if candidates is None:
+                    continue
+                keys = set(_package_key(package) for package in candidates)
+                if keys - excluded:
+                    continue
+                problems.append((field, relation))
+                for conflict in conflicts:
+                    if (not conflict[2].isdisjoint(keys) and
+                            conflict[:2] not in problems):
+                        problems.append(conflict[:2])
+        return [(field, debian_package.Relation.get_relation_string(relation))
+                for field, relation in problems]
+
+    def check_all(self, sources):
+        """Check the build relations of many source packages.
+
+        Args:
+            sources: An iterable of SourcePackage or SourcePackage protobufs.
+        Yields:
+            A tuple of (source name, problems) for each source package with
+            build relations that can't be met, where problems is as returned
+            by check.
+        """
+        for source in sources:
+            problems = self.check(source)
+            if problems:
+                yield source.name, problems
@@ -0,0 +1,134 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for build_check module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import unittest
+
+from debalot.lib import build_check
+from debalot.lib import debian_package
+from debalot.lib import debian_package_pb2 as pb
+from debalot.lib import package_index
+
+
+PACKAGES = '''Package: debhelper
+Version: 13.3
+Architecture: all
+
+Package: gcc
+Version: 10.2.1-1
+Architecture: amd64
+
+Package: bash
+Version: 5.1-2
+Architecture: amd64
+Essential: yes
+
+Package: libfoo-dev
+Version: 1.0-1
+Architecture: amd64
+Provides: libfoo-api
+
+Package: python3-sphinx
+Version: 3.4.3-2
+Architecture: all
+'''
+
+
+def source(name, **fields):
+    package = pb.SourcePackage(name=name)
+    for field, value in fields.items():
+        getattr(package, field).extend(
+            debian_package.Relation.parse_relations(value))
+    return package
+
+
+class TestArchitectures(unittest.TestCase):
+    def test_architecture_matches(self):
+        self.assertTrue(build_check.architecture_matches('any', 'armhf'))
+        self.assertTrue(build_check.architecture_matches('amd64', 'amd64'))
+        self.assertTrue(build_check.architecture_matches('linux-any',
+                                                         'amd64'))
+        self.assertTrue(build_check.architecture_matches('any-i386',
+                                                         'hurd-i386'))
+        self.assertFalse(build_check.architecture_matches('linux-any',
+                                                          'hurd-i386'))
+        self.assertFalse(build_check.architecture_matches('i386', 'amd64'))
+
+    def test_relation_applies(self):
+        relation = pb.Relation(name='a')
+        self.assertTrue(build_check.relation_applies(relation, 'amd64'))
+        relation.architectures.extend(['amd64', 'arm64'])
+        self.assertTrue(build_check.relation_applies(relation, 'arm64'))
+        self.assertFalse(build_check.relation_applies(relation, 'i386'))
+        del relation.architectures[:]
+        relation.architectures.extend(['!hurd-any', '!i386'])
+        self.assertTrue(build_check.relation_applies(relation, 'amd64'))
+        self.assertFalse(build_check.relation_applies(relation, 'i386'))
+        self.assertFalse(build_check.relation_applies(relation, 'hurd-i386'))
+
+
+class TestBuildDependencyChecker(unittest.TestCase):
+    def setUp(self):
+        index = package_index.PackageIndex()
+        index.import_packages_file(io.StringIO(PACKAGES))
+        self.checker = build_check.BuildDependencyChecker(index, 'amd64')
+
+    def test_satisfiable(self):
+        self.assertEqual([], self.checker.check(source(
+            'foo', build_depends='debhelper (>= 13), gcc | clang, '
+            'libfoo-api, libbar-dev [i386], gcc:native',
+            build_conflicts='libbar-dev')))
+
+    def test_unsatisfiable(self):
+        self.assertEqual([
+            ('Build-Depends', 'debhelper (>= 14)'),
+            ('Build-Depends', 'libbar-dev | libbaz-dev'),
+            ('Build-Depends-Indep', 'python3-sphinx (<< 3)'),
+        ], self.checker.check(source(
+            'foo', build_depends='debhelper (>= 14), libbar-dev | libbaz-dev,'
+            ' gcc', build_depends_indep='python3-sphinx (<< 3)')))
+
+    def test_arch_only(self):
+        checker = build_check.BuildDependencyChecker(
+            self.checker.index, 'amd64', indep=False)
+        self.assertEqual([], checker.check(source(
+            'foo', build_depends_indep='python3-sphinx (<< 3)',
+            build_conflicts_indep='gcc')))
+
+    def test_other_architecture(self):
+        checker = build_check.BuildDependencyChecker(self.checker.index,
+                                                     'arm64')
+        self.assertEqual([('Build-Depends', 'gcc')],
+                         checker.check(source('foo', build_depends='gcc')))
+
+    def test_conflicts(self):
+        self.assertEqual([('Build-Conflicts', 'bash')],
+                         self.checker.check(source('foo',
+                                                   build_conflicts='bash')))
+        self.assertEqual([
+            ('Build-Depends', 'gcc'),
+            ('Build-Conflicts-Indep', 'gcc (>= 10)'),
+        ], self.checker.check(source(
+            'foo', build_depends='gcc, debhelper',
+            build_conflicts='debhelper (<< 13)',
+            build_conflicts_indep='gcc (>= 10)')))
+
+    def test_check_all_shares_candidates(self):
+        sources = [source('foo', build_depends='debhelper, gcc'),
+                   source('bar', build_depends='debhelper, libbar-dev'),
+                   source('baz', build_depends='debhelper')]
+        self.assertEqual([('bar', [('Build-Depends', 'libbar-dev')])],
+                         list(self.checker.check_all(sources)))
+        self.assertEqual(3, self.checker.misses)
+        self.assertEqual(2, self.checker.hits)
+
+
+if __name__ == "__main__":
+    unittest.main()
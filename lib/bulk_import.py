@@ -0,0 +1,233 @@
+﻿"""Bulk import of many unpacked source packages using a process pool.
+
+Workers parse debian/control and debian/changelog and send the serialized
+SourcePackage back to the parent, which is much cheaper to pickle than the
+protobuf objects themselves. The parent writes each result to a record file
+as soon as it arrives. At most a fixed number of packages are in flight at
+once, so memory use stays bounded however many trees are imported.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import codecs
+import multiprocessing
+import os
+import sys
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
+try:
+    _SimpleQueue = multiprocessing.SimpleQueue
+except AttributeError:  # Python 2
+    from multiprocessing.queues import SimpleQueue as _SimpleQueue
+
+from debalot.lib import debian_package
+from debalot.lib import record_file
+from debalot.lib import substvars
+
+
+def import_source_tree(path):
+    """Import the debian directory of an unpacked source package.
+
+    If the package has been built, variables in the relation fields of its
+    binary packages are expanded using its debian/*.substvars files.
+
+    Args:
+        path: The path of the unpacked source package.
+    Returns:
+        A byte string containing the serialized SourcePackage protobuf.
+    """
+    package = debian_package.SourcePackage()
+    control_path = os.path.join(path, 'debian', 'control')
+    changelog_path = os.path.join(path, 'debian', 'changelog')
+    if os.path.exists(control_path):
+        # Substvars files are only there if the package has been built.
+        substvars_files = substvars.load_directory(
+            os.path.join(path, 'debian')) or None
+        with codecs.open(control_path, encoding='utf-8-sig') as control_file:
+            package.import_control_file(control_file, substvars_files)
+    if os.path.exists(changelog_path):
+        with codecs.open(changelog_path,
+                         encoding='utf-8-sig') as changelog_file:
+            package.import_changelog_file(changelog_file)
+        if package.name is None and len(package.changelog):
+            package.name = package.changelog[-1].name
+    return package._pb.SerializeToString()
+
+
+# How often to check for lost tasks while waiting for results, in seconds.
+_POLL_INTERVAL = 0.5
+# A queue on which each worker process announces the tasks it starts, set by
+# _init_worker.
+_started = None
+
+
+def _error(path, error):
+    return (path, None, '%s: %s' % (type(error).__name__, error))
+
+
+def _init_worker(started):
+    global _started
+    _started = started
+
+
+def _import_worker(task_id, path):
+    """Import a source tree, returning any error rather than raising it.
+
+    Returns:
+        A tuple of the path, the serialized package (or None) and an error
+        message (or None).
+    """
+    if _started is not None:
+        # Written synchronously, so the parent knows which task was lost
+        # even if this process is killed during the import.
+        _started.put((os.getpid(), task_id))
+    try:
+        return (path, import_source_tree(path), None)
+    except Exception as error:
+        return _error(path, error)
+
+
+def _submit(pool, results, task_id, path):
+    def callback(result):
+        results.put((task_id, result))
+    kwargs = {'callback': callback}
+    if sys.version_info[0] >= 3:
+        def error_callback(error):
+            results.put((task_id, _error(path, error)))
+        kwargs['error_callback'] = error_callback
+    return pool.apply_async(_import_worker, (task_id, path), **kwargs)
+
+
+def iter_import(paths, processes=None, max_pending=None):
+    """Import source trees in parallel.
+
+    A tree whose worker process dies during the import, e.g. when it is
+    killed for using too much memory, is reported as failed rather than
+    waited for forever.
+
+    Args:
+        paths: An iterable of paths of unpacked source packages.
+        processes: The number of worker processes. Defaults to the CPU count.
+        max_pending: The maximum number of packages that may be queued or
+            imported but not yet yielded. Defaults to four per process.
+    Yields:
+        A tuple of (path, serialized SourcePackage, error) for each path,
+        in the order that the imports complete. On success error is None;
+        on failure the serialized package is None and error is a string.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    max_pending = max_pending or processes * 4
+    results = queue.Queue()
+    started = _SimpleQueue()
+    pool = multiprocessing.Pool(processes, _init_worker, (started,))
+    # Task ID -> (path, AsyncResult), for the tasks not yet yielded.
+    pending = {}
+    # Worker process ID -> the ID of the last task it started.
+    running = {}
+    # IDs of tasks whose worker has died. They are reported as lost one poll
+    # later, in case their result was sent just before the worker died.
+    lost = set()
+    try:
+        paths = enumerate(paths)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    task_id, path = next(paths)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[task_id] = (path, _submit(pool, results, task_id,
+                                                  path))
+            if not pending:
+                break
+            while True:
+                # Read the start messages on every pass, not just when the
+                # wait times out: while results keep arriving it never does,
+                # and unread messages would fill the pipe and block the
+                # workers. At most max_pending tasks start between passes.
+                _read_started(started, running)
+                # A timeout keeps the wait interruptible on Python 2.
+                try:
+                    task_id, result = results.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    pass
+                else:
+                    if task_id in pending:
+                        break
+                    continue
+                task_id, result = _find_failed(pending, running, lost,
+                                               started)
+                if task_id is not None:
+                    break
+            del pending[task_id]
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _read_started(started, running):
+    """Record the tasks the workers have started, without blocking."""
+    while not started.empty():
+        pid, task_id = started.get()
+        running[pid] = task_id
+
+
+def _find_failed(pending, running, lost, started):
+    """Find a pending task that failed without its callback being called.
+
+    Returns:
+        A tuple of the task ID and its result, or (None, None).
+    """
+    for task_id, (path, async_result) in pending.items():
+        # Before Python 3, failures such as unpicklable results have no
+        # callback, but the AsyncResult still records them.
+        if async_result.ready() and not async_result.successful():
+            try:
+                async_result.get(0)
+            except Exception as error:
+                return task_id, _error(path, error)
+    for task_id in sorted(lost):
+        if task_id in pending:
+            lost.discard(task_id)
+            return task_id, (pending[task_id][0], None,
+                             'Worker process exited during the import')
+    lost.clear()
+    _read_started(started, running)
+    alive = set(process.pid for process in multiprocessing.active_children())
+    for pid in list(running):
+        if pid not in alive:
+            if running[pid] in pending:
+                lost.add(running[pid])
+            del running[pid]
+    return None, None
+
+
+def bulk_import(paths, output_file, processes=None, max_pending=None):
+    """Import source trees in parallel into a record file.
+
+    Args:
+        paths: An iterable of paths of unpacked source packages.
+        output_file: A writable binary file object. Each successfully
+            imported SourcePackage is written to it as a record.
+        processes: The number of worker processes. Defaults to the CPU count.
+        max_pending: The maximum number of packages in flight at once.
+    Returns:
+        A list of (path, error) tuples for the trees that failed to import.
+    """
+    writer = record_file.RecordWriter(output_file)
+    failures = []
+    for path, data, error in iter_import(paths, processes, max_pending):
+        if error is None:
+            writer.write(data)
+        else:
+            failures.append((path, error))
+    return failures
@@ -0,0 +1,136 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for bulk_import module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from debalot.lib import bulk_import
+from debalot.lib import debian_package_pb2
+from debalot.lib import record_file
+
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), 'test_files')
+
+
+class TestBulkImport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='debalot_test_')
+        self.trees = []
+        for i in range(6):
+            self.trees.append(self._make_tree('tree%d' % i, 'test_changelog'))
+        self.broken_tree = self._make_tree('broken',
+                                           'test_changelog_invalid_urgency')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _make_tree(self, name, changelog):
+        debian_directory = os.path.join(self.directory, name, 'debian')
+        os.makedirs(debian_directory)
+        shutil.copy(os.path.join(TEST_FILES, 'control'),
+                    os.path.join(debian_directory, 'control'))
+        shutil.copy(os.path.join(TEST_FILES, changelog),
+                    os.path.join(debian_directory, 'changelog'))
+        return os.path.dirname(debian_directory)
+
+    def test_import_source_tree(self):
+        package = debian_package_pb2.SourcePackage()
+        package.ParseFromString(bulk_import.import_source_tree(self.trees[0]))
+        self.assertEqual('hello-debhelper', package.name)
+        self.assertEqual(4, len(package.changelog))
+
+    def test_import_source_tree_substvars(self):
+        with open(os.path.join(self.trees[0], 'debian',
+                               'hello-debhelper.substvars'), 'wb') as output:
+            output.write(b'misc:Depends=debconf (>= 0.5)\n')
+        package = debian_package_pb2.SourcePackage()
+        package.ParseFromString(bulk_import.import_source_tree(self.trees[0]))
+        self.assertEqual(
+            ['debconf', 'hello'],
+            [depend.name for depend in package.binary_packages[0].depends])
+        package.ParseFromString(bulk_import.import_source_tree(self.trees[1]))
+        self.assertEqual(
+            ['${misc:Depends}', 'hello'],
+            [depend.name for depend in package.binary_packages[0].depends])
+
+    def test_iter_import(self):
+        results = list(bulk_import.iter_import(
+            self.trees + [self.broken_tree], processes=2, max_pending=2))
+        self.assertEqual(set(self.trees + [self.broken_tree]),
+                         set(path for path, _, _ in results))
+        for path, data, error in results:
+            if path == self.broken_tree:
+                self.assertIsNone(data)
+                self.assertIn('UrgencyError', error)
+            else:
+                self.assertIsNone(error)
+                self.assertTrue(data)
+
+    def test_iter_import_worker_dies(self):
+        # Workers must be forked to see the replaced function.
+        get_start_method = getattr(multiprocessing, 'get_start_method',
+                                   lambda: 'fork')
+        if get_start_method() != 'fork':
+            self.skipTest('Worker processes are not forked.')
+        import_source_tree = bulk_import.import_source_tree
+
+        def crash(path):
+            if path == self.broken_tree:
+                os._exit(1)
+            return import_source_tree(path)
+        bulk_import.import_source_tree = crash
+        try:
+            results = list(bulk_import.iter_import(
+                self.trees + [self.broken_tree], processes=2, max_pending=3))
+        finally:
+            bulk_import.import_source_tree = import_source_tree
+        self.assertEqual(len(self.trees) + 1, len(results))
+        errors = dict((path, error) for path, _, error in results)
+        self.assertIn('exited', errors.pop(self.broken_tree))
+        self.assertEqual(set([None]), set(errors.values()))
+
+    def test_iter_import_many_results(self):
+        # Results arrive steadily, so the wait for one never times out. The
+        # workers' start messages must still be read, or they fill the pipe
+        # and the workers block until the next timeout.
+        poll_interval = bulk_import._POLL_INTERVAL
+        bulk_import._POLL_INTERVAL = 60
+        try:
+            start = time.time()
+            paths = [os.path.join(self.directory, 'missing%d' % number)
+                     for number in range(5000)]
+            results = list(bulk_import.iter_import(paths, processes=2,
+                                                   max_pending=5000))
+        finally:
+            bulk_import._POLL_INTERVAL = poll_interval
+        self.assertEqual(len(paths), len(results))
+        self.assertLess(time.time() - start, 30)
+
+    def test_bulk_import(self):
+        output = io.BytesIO()
+        failures = bulk_import.bulk_import(
+            self.trees + [self.broken_tree], output, processes=2)
+        self.assertEqual([self.broken_tree],
+                         [path for path, _ in failures])
+        output.seek(0)
+        packages = list(record_file.read_messages(
+            output, debian_package_pb2.SourcePackage))
+        self.assertEqual(len(self.trees), len(packages))
+        for package in packages:
+            self.assertEqual('hello-debhelper', package.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+﻿"""Caching helpers."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+
+
+class LRUCache(object):
+    """A size-bounded least recently used cache.
+
+    Unlike a cache bounded by its number of entries, an LRUCache is bounded by
+    the total size of its values, so a handful of large values can't push the
+    memory use of the cache far past what was intended.
+
+    Args:
+        max_size: The maximum total size of the values in the cache.
+        sizeof: A function returning the size of a value. Defaults to len,
+            which suits byte strings.
+    """
+    def __init__(self, max_size, sizeof=len):
+        self.max_size = max_size
+        self.size = 0
+        self._sizeof = sizeof
+        self._items = collections.OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        """Get a value from the cache, marking it as recently used.
+
+        Args:
+            key: The key of the value.
+            default: The value to return if the key is not in the cache.
+        Returns:
+            The cached value, or default.
+        """
+        try:
+            value = self._items.pop(key)
+        except KeyError:
+            return default
+        self._items[key] = value
+        return value
+
+    def put(self, key, value):
+        """Put a value into the cache, evicting old values as necessary.
+
+        Values larger than the cache itself are not cached at all.
+
+        Args:
+            key: The key of the value.
+            value: The value to cache.
+        """
+        self.discard(key)
+        value_size = self._sizeof(value)
+        if value_size > self.max_size:
+            return
+        while self.size + value_size > self.max_size:
+            _, old_value = self._items.popitem(last=False)
+            self.size -= self._sizeof(old_value)
+        self._items[key] = value
+        self.size += value_size
+
+    def discard(self, key):
+        """Remove a value from the cache if it is present.
+
+        Args:
+            key: The key of the value.
+        """
+        if key in self._items:
+            self.size -= self._sizeof(self._items.pop(key))
+
+    def clear(self):
+        """Remove all values from the cache."""
+        self._items.clear()
+        self.size = 0
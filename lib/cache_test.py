@@ -0,0 +1,60 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for cache module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import unittest
+
+from debalot.lib import cache
+
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = cache.LRUCache(10)
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get('missing'))
+        self.assertEqual('default', self.cache.get('missing', 'default'))
+
+    def test_put_and_get(self):
+        self.cache.put('a', b'1234')
+        self.assertIn('a', self.cache)
+        self.assertEqual(b'1234', self.cache.get('a'))
+        self.assertEqual(4, self.cache.size)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.put('a', b'1234')
+        self.cache.put('b', b'1234')
+        self.cache.get('a')
+        self.cache.put('c', b'1234')
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+        self.assertIn('c', self.cache)
+        self.assertEqual(8, self.cache.size)
+
+    def test_replace_value(self):
+        self.cache.put('a', b'1234')
+        self.cache.put('a', b'12')
+        self.assertEqual(1, len(self.cache))
+        self.assertEqual(2, self.cache.size)
+
+    def test_oversized_value_not_cached(self):
+        self.cache.put('a', b'1234')
+        self.cache.put('big', b'12345678901')
+        self.assertNotIn('big', self.cache)
+        self.assertIn('a', self.cache)
+
+    def test_clear(self):
+        self.cache.put('a', b'1234')
+        self.cache.clear()
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(0, self.cache.size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+﻿"""Parsing and formatting of the dates in changelog trailer lines.
+
+Changelog dates are always in the RFC 2822 format produced by `date -R`:
+    Thu, 01 Jan 1970 14:46:40 +1200
+Parsing that format directly is much faster than handing each date to
+dateutil, which is only used as a fallback for dates that don't match it.
+Formatting is done without strftime so that the output doesn't depend on the
+current locale.
+
+dateutil is only imported the first time a date needs the fallback, so that
+programs which never see a malformed date don't pay for importing it.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import datetime
+import re
+import time
+
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+           'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+_MONTH_NUMBERS = {month: number for number, month in enumerate(_MONTHS, 1)}
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+_DATE_PATTERN = re.compile(
+    r'\s*(?:(?:%s),\s*)?(\d{1,2}) (%s) (\d{4}) (\d{2}):(\d{2}):(\d{2}) '
+    r'([+-])(\d{2})(\d{2})\s*$' % ('|'.join(_DAYS), '|'.join(_MONTHS)))
+
+
+class FixedOffset(datetime.tzinfo):
+    """A time zone with a fixed offset from UTC.
+
+    Args:
+        zone: The offset in minutes east of UTC.
+    """
+    def __init__(self, zone):
+        self.zone = zone
+        self._offset = datetime.timedelta(minutes=zone)
+
+    def utcoffset(self, dt):
+        return self._offset
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+    def tzname(self, dt):
+        return format_zone(self.zone)
+
+    def __repr__(self):
+        return 'FixedOffset(%d)' % self.zone
+
+
+_tzinfos = {}
+
+
+def get_tzinfo(zone):
+    """Get a tzinfo object for a time zone offset.
+
+    Changelogs use only a handful of distinct offsets, so each tzinfo object
+    is created once and reused.
+
+    Args:
+        zone: The offset in minutes east of UTC.
+    Returns:
+        A FixedOffset tzinfo.
+    """
+    tzinfo = _tzinfos.get(zone)
+    if tzinfo is None:
+        tzinfo = _tzinfos.setdefault(zone, FixedOffset(zone))
+    return tzinfo
+
+
+def format_zone(zone):
+    """Format a time zone offset as in a changelog, e.g. -0500.
+
+    Args:
+        zone: The offset in minutes east of UTC.
+    Returns:
+        A string containing the formatted offset.
+    """
+    sign = '-' if zone < 0 else '+'
+    hours, minutes = divmod(abs(zone), 60)
+    return '%s%02d%02d' % (sign, hours, minutes)
+
+
+def format_date(timestamp, zone, zone_name=None):
+    """Format a timestamp as a changelog date.
+
+    Args:
+        timestamp: The integer timestamp.
+        zone: The offset in minutes east of UTC in which to show the time.
+        zone_name: If given, shown instead of the offset, e.g. 'UTC' as in
+            the Date field of a Release file.
+    Returns:
+        A string such as 'Thu, 01 Jan 1970 14:46:40 +1200'.
+    """
+    local = time.gmtime(timestamp + zone * 60)
+    return '%s, %02d %s %04d %02d:%02d:%02d %s' % (
+        _DAYS[local.tm_wday], local.tm_mday, _MONTHS[local.tm_mon - 1],
+        local.tm_year, local.tm_hour, local.tm_min, local.tm_sec,
+        zone_name or format_zone(zone))
+
+
+def parse_date(date_string):
+    """Parse a changelog date.
+
+    Args:
+        date_string: A string such as 'Thu, 01 Jan 1970 14:46:40 +1200'.
+    Returns:
+        A tuple containing the integer timestamp and the offset in minutes
+        east of UTC.
+    Raises:
+        ValueError: The date could not be parsed.
+    """
+    match = _DATE_PATTERN.match(date_string)
+    if match is None:
+        return _parse_date_fallback(date_string)
+    (day, month, year, hour, minute, second,
+     sign, zone_hours, zone_minutes) = match.groups()
+    hour, minute, second = int(hour), int(minute), int(second)
+    if hour > 23 or minute > 59 or second > 60:
+        return _parse_date_fallback(date_string)
+    try:
+        days = datetime.date(int(year), _MONTH_NUMBERS[month],
+                             int(day)).toordinal() - _EPOCH_ORDINAL
+    except ValueError:  # The day is out of range for the month.
+        return _parse_date_fallback(date_string)
+    zone = int(zone_hours) * 60 + int(zone_minutes)
+    if sign == '-':
+        zone = -zone
+    timestamp = days * 86400 + hour * 3600 + minute * 60 + second
+    return (timestamp - zone * 60, zone)
+
+
+def _parse_date_fallback(date_string):
+    """Parse a malformed changelog date with dateutil."""
+    import calendar
+    import dateutil.parser
+    change_time = dateutil.parser.parse(date_string)
+    offset = change_time.utcoffset()
+    if offset is None:
+        zone = 0  # Assume that dates with no time zone are in UTC.
+    else:
+        zone = int(offset.total_seconds() // 60)
+    return (calendar.timegm(change_time.utctimetuple()), zone)
@@ -0,0 +1,102 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for changelog_date module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import calendar
+import datetime
+import random
+import unittest
+
+import dateutil.parser
+
+from debalot.lib import changelog_date
+
+
+class TestFormatDate(unittest.TestCase):
+    def test_format_date(self):
+        self.assertEqual('Thu, 01 Jan 1970 14:46:40 +1200',
+                         changelog_date.format_date(10000, 720))
+        self.assertEqual('Wed, 31 Dec 1969 19:00:10 -0500',
+                         changelog_date.format_date(10, -300))
+        self.assertEqual('Thu, 01 Jan 1970 00:01:40 +0000',
+                         changelog_date.format_date(100, 0))
+        self.assertEqual('Sat, 14 Aug 2021 07:49:09 UTC',
+                         changelog_date.format_date(1628927349, 0, 'UTC'))
+
+    def test_format_zone(self):
+        self.assertEqual('+0530', changelog_date.format_zone(330))
+        self.assertEqual('-0330', changelog_date.format_zone(-210))
+        self.assertEqual('+0000', changelog_date.format_zone(0))
+
+    def test_matches_strftime(self):
+        generator = random.Random(0)
+        for _ in range(200):
+            timestamp = generator.randint(0, 2 ** 31)
+            zone = generator.choice((-600, -300, -210, 0, 60, 330, 720))
+            expected = datetime.datetime.fromtimestamp(
+                timestamp, tz=changelog_date.get_tzinfo(zone)).strftime(
+                    '%a, %d %b %Y %H:%M:%S %z')
+            self.assertEqual(expected,
+                             changelog_date.format_date(timestamp, zone))
+
+
+class TestParseDate(unittest.TestCase):
+    def test_parse_date(self):
+        self.assertEqual(
+            (10000, 720),
+            changelog_date.parse_date('Thu, 01 Jan 1970 14:46:40 +1200\n'))
+        self.assertEqual(
+            (10, -300),
+            changelog_date.parse_date('Wed, 31 Dec 1969 19:00:10 -0500'))
+
+    def test_round_trip(self):
+        generator = random.Random(0)
+        for _ in range(200):
+            timestamp = generator.randint(0, 2 ** 31)
+            zone = generator.choice((-600, -300, -210, 0, 60, 330, 720))
+            self.assertEqual((timestamp, zone), changelog_date.parse_date(
+                changelog_date.format_date(timestamp, zone)))
+
+    def test_matches_dateutil(self):
+        for date_string in ('Mon, 7 Mar 2016 09:05:01 +0100',
+                            'Sun, 29 Feb 2004 23:59:59 -0930'):
+            expected = dateutil.parser.parse(date_string)
+            self.assertEqual(
+                (calendar.timegm(expected.utctimetuple()),
+                 int(expected.utcoffset().total_seconds() // 60)),
+                changelog_date.parse_date(date_string))
+
+    def test_fallback(self):
+        self.assertEqual(
+            (10000, 720),
+            changelog_date.parse_date('Thursday, 1 January 1970 14:46:40 '
+                                      '+12:00'))
+        self.assertEqual((100, 0),
+                         changelog_date.parse_date('1970-01-01 00:01:40'))
+
+    def test_invalid(self):
+        for date_string in ('Not a date', 'Thu, 01 Jan 1970 25:00:00 +0000'):
+            with self.assertRaises(ValueError):
+                changelog_date.parse_date(date_string)
+
+
+class TestGetTzinfo(unittest.TestCase):
+    def test_memoized(self):
+        self.assertIs(changelog_date.get_tzinfo(120),
+                      changelog_date.get_tzinfo(120))
+
+    def test_offset(self):
+        tzinfo = changelog_date.get_tzinfo(-300)
+        self.assertEqual(datetime.timedelta(hours=-5),
+                         tzinfo.utcoffset(None))
+        self.assertEqual('-0500', tzinfo.tzname(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,253 @@
+﻿"""A searchable index of changelog entries across an archive.
+
+The index maps words, closed Debian and Launchpad bug numbers and maintainer
+email addresses to the changelog entries containing them, and keeps entries
+sorted by date, so queries don't need to parse or scan any changelogs. It is
+stored as a ChangelogIndex protobuf and can be extended as new changelogs are
+imported.
+
+Example use:
+    index = ChangelogIndex.load('changelogs.index')
+    index.add_package(package)
+    index.save('changelogs.index')
+    for document in index.query(bug=123456):
+        print(document.package, document.version)
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import bisect
+import collections
+import os
+import re
+import tempfile
+
+from debalot.lib import changelog_index_pb2 as pb
+from debalot.lib import debian_package
+
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Split text into lower case index tokens.
+
+    Args:
+        text: A string.
+    Returns:
+        A list of the words in the string.
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class ChangelogIndex(object):
+    """An inverted index of changelog entries."""
+
+    def __init__(self):
+        self._documents = []
+        self._keys = {}
+        self._tokens = collections.defaultdict(list)
+        self._bugs = collections.defaultdict(list)
+        self._launchpad_bugs = collections.defaultdict(list)
+        self._maintainers = collections.defaultdict(list)
+        # Sorted (timestamp, document id) pairs.
+        self._timeline = []
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def _add_document(self, document, tokens, bugs, launchpad_bugs):
+        document_id = len(self._documents)
+        self._documents.append(document)
+        self._keys[(document.package, document.version)] = document_id
+        for token in set(tokens):
+            self._tokens[token].append(document_id)
+        for bug in set(bugs):
+            self._bugs[bug].append(document_id)
+        for bug in set(launchpad_bugs):
+            self._launchpad_bugs[bug].append(document_id)
+        if document.HasField('maintainer_email'):
+            self._maintainers[document.maintainer_email].append(document_id)
+        if document.HasField('timestamp'):
+            bisect.insort(self._timeline, (document.timestamp, document_id))
+        return document_id
+
+    def add_change(self, package_name, change):
+        """Index a changelog entry.
+
+        Args:
+            package_name: The name of the source package.
+            change: A Change protobuf.
+        Returns:
+            True if the entry was added, False if it was already indexed.
+        """
+        name = change.name or package_name
+        if (name, change.version) in self._keys:
+            return False
+        document = pb.Document()
+        document.package = name
+        document.version = change.version
+        if change.maintainer.email:
+            document.maintainer_email = change.maintainer.email.lower()
+        if change.HasField('timestamp'):
+            document.timestamp = change.timestamp
+        tokens = []
+        for entry in change.entries:
+            tokens.extend(tokenize(entry))
+        bugs = change.closes
+        launchpad_bugs = change.launchpad_bugs
+        if not bugs and not launchpad_bugs:
+            # Changes serialized before bugs were extracted while parsing
+            # have neither field, so scan their entries instead.
+            bugs = debian_package.Changelog.get_closed_bugs(change.entries)
+            launchpad_bugs = debian_package.Changelog.get_launchpad_bugs(
+                change.entries)
+        self._add_document(document, tokens, bugs, launchpad_bugs)
+        return True
+
+    def add_package(self, source_package):
+        """Index the changelog of a source package.
+
+        Entries that are already indexed are skipped, so a package can be
+        re-added after new entries are imported.
+
+        Args:
+            source_package: A SourcePackage or SourcePackage protobuf.
+        Returns:
+            The number of entries added.
+        """
+        return sum(1 for change in source_package.changelog
+                   if self.add_change(source_package.name, change))
+
+    def _lookup(self, postings):
+        return [self._documents[document_id] for document_id in postings]
+
+    def _search(self, text=None, bug=None, launchpad_bug=None,
+                maintainer=None, start=None, end=None):
+        """Get the sorted ids of the documents matching a query."""
+        candidates = []
+        if text is not None:
+            tokens = tokenize(text)
+            if not tokens:
+                # Text without any words matches nothing, not everything.
+                return []
+            for token in tokens:
+                candidates.append(self._tokens.get(token, ()))
+        if bug is not None:
+            candidates.append(self._bugs.get(int(bug), ()))
+        if launchpad_bug is not None:
+            candidates.append(
+                self._launchpad_bugs.get(int(launchpad_bug), ()))
+        if maintainer is not None:
+            candidates.append(self._maintainers.get(maintainer.lower(), ()))
+        if start is not None or end is not None:
+            low = 0
+            high = len(self._timeline)
+            if start is not None:
+                low = bisect.bisect_left(self._timeline, (start, -1))
+            if end is not None:
+                high = bisect.bisect_left(self._timeline, (end, -1))
+            candidates.append(sorted(document_id for _, document_id
+                                     in self._timeline[low:high]))
+        if not candidates:
+            return list(range(len(self._documents)))
+        # Intersect starting from the shortest list.
+        candidates.sort(key=len)
+        matches = set(candidates[0])
+        for postings in candidates[1:]:
+            matches.intersection_update(postings)
+            if not matches:
+                break
+        return sorted(matches)
+
+    def query(self, text=None, bug=None, launchpad_bug=None, maintainer=None,
+              start=None, end=None):
+        """Find the changelog entries matching all of the given criteria.
+
+        Args:
+            text: Words which must all occur in the entry. Text without any
+                words matches no entries.
+            bug: A Debian bug number which the entry closes.
+            launchpad_bug: A Launchpad bug number which the entry closes.
+            maintainer: The email address of the entry's maintainer.
+            start: The earliest timestamp of the entry, inclusive.
+            end: The latest timestamp of the entry, exclusive.
+        Returns:
+            A list of matching Document protobufs, in the order indexed.
+        """
+        return self._lookup(self._search(text, bug, launchpad_bug,
+                                         maintainer, start, end))
+
+    def to_protobuf(self):
+        """Get the index as a ChangelogIndex protobuf."""
+        index = pb.ChangelogIndex()
+        index.documents.extend(self._documents)
+        for postings, field in ((self._tokens, index.tokens),
+                                (self._bugs, index.bugs),
+                                (self._launchpad_bugs, index.launchpad_bugs),
+                                (self._maintainers, index.maintainers)):
+            for term in sorted(postings):
+                posting_list = field.add()
+                posting_list.term = '%s' % term
+                posting_list.documents.extend(postings[term])
+        return index
+
+    @classmethod
+    def from_protobuf(cls, index):
+        """Create an index from a ChangelogIndex protobuf."""
+        result = cls()
+        result._documents = list(index.documents)
+        for document_id, document in enumerate(result._documents):
+            result._keys[(document.package, document.version)] = document_id
+            if document.HasField('timestamp'):
+                result._timeline.append((document.timestamp, document_id))
+        result._timeline.sort()
+        for posting_list in index.tokens:
+            result._tokens[posting_list.term] = list(posting_list.documents)
+        for posting_list in index.bugs:
+            result._bugs[int(posting_list.term)] = list(posting_list.documents)
+        for posting_list in index.launchpad_bugs:
+            result._launchpad_bugs[int(posting_list.term)] = list(
+                posting_list.documents)
+        for posting_list in index.maintainers:
+            result._maintainers[posting_list.term] = list(
+                posting_list.documents)
+        return result
+
+    def save(self, path):
+        """Write the index to a file, replacing it atomically.
+
+        Args:
+            path: The path of the index file.
+        """
+        handle, temp_path = tempfile.mkstemp(
+            prefix='.tmp-', dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                output.write(self.to_protobuf().SerializeToString())
+            os.rename(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index from a file. A missing file gives an empty index.
+
+        Args:
+            path: The path of the index file.
+        Returns:
+            A ChangelogIndex.
+        """
+        if not os.path.exists(path):
+            return cls()
+        index = pb.ChangelogIndex()
+        with open(path, 'rb') as input_file:
+            index.ParseFromString(input_file.read())
+        return cls.from_protobuf(index)
@@ -0,0 +1,109 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for changelog_index module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import tempfile
+import unittest
+
+from debalot.lib.test_files import test_data
+from debalot.lib import changelog_index
+from debalot.lib import debian_package_pb2
+
+
+class TestChangelogIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = changelog_index.ChangelogIndex()
+        self.package = debian_package_pb2.SourcePackage()
+        self.package.CopyFrom(test_data.SourcePackage.SOURCE_PACKAGE)
+        self.package.changelog[3].closes.append(1000)
+        self.package.changelog[1].launchpad_bugs.append(2000)
+        self.assertEqual(4, self.index.add_package(self.package))
+
+    def versions(self, documents):
+        return [document.version for document in documents]
+
+    def test_add_package_skips_indexed(self):
+        change = self.package.changelog.add()
+        change.version = '0.0.4'
+        change.urgency = debian_package_pb2.LOW
+        self.assertEqual(1, self.index.add_package(self.package))
+        self.assertEqual(5, len(self.index))
+        self.assertIn(('package', '0.0.4'), self.index)
+
+    def test_query_text(self):
+        self.assertEqual(['0.0.2'], self.versions(
+            self.index.query(text='Multiple ENTRIES')))
+        self.assertEqual([], self.versions(
+            self.index.query(text='multiple nonexistent')))
+
+    def test_query_text_without_words(self):
+        self.assertEqual([], self.index.query(text='!!!'))
+        self.assertEqual([], self.index.query(text='', bug=1000))
+
+    def test_query_bug(self):
+        self.assertEqual(['0.0.3'],
+                         self.versions(self.index.query(bug=1000)))
+        self.assertEqual([], self.index.query(bug=1001))
+        self.assertEqual(['0.0.1-0ubuntu1~ubuntu70.04~ppa1'],
+                         self.versions(self.index.query(launchpad_bug=2000)))
+        self.assertEqual([], self.index.query(launchpad_bug=1000))
+
+    def test_bugs_without_extracted_fields(self):
+        change = debian_package_pb2.Change()
+        change.CopyFrom(self.package.changelog[0])
+        change.version = '0.0.5'
+        del change.entries[:]
+        change.entries.extend([
+            '  * Fix a crash on startup. (Closes: #1002, #1003)',
+            '  * Fix the same crash on Ubuntu. (LP: #2001)'])
+        change.ClearField('closes')
+        change.ClearField('launchpad_bugs')
+        self.assertTrue(self.index.add_change('package', change))
+        self.assertEqual(['0.0.5'],
+                         self.versions(self.index.query(bug=1003)))
+        self.assertEqual(['0.0.5'], self.versions(
+            self.index.query(launchpad_bug=2001)))
+
+    def test_query_maintainer(self):
+        self.assertEqual(['0.0.2'], self.versions(
+            self.index.query(maintainer='Someone@Example.com')))
+
+    def test_query_dates(self):
+        self.assertEqual(['0.0.1-0ubuntu1~ubuntu70.04~ppa1', '0.0.2'],
+                         self.versions(self.index.query(start=100,
+                                                        end=10000)))
+        self.assertEqual(4, len(self.index.query()))
+
+    def test_query_combined(self):
+        self.assertEqual(['0.0.3'], self.versions(
+            self.index.query(text='bullet', start=5000)))
+        self.assertEqual([], self.index.query(text='bullet', end=5000))
+
+    def test_save_and_load(self):
+        handle, path = tempfile.mkstemp(prefix='debalot_test_')
+        os.close(handle)
+        try:
+            self.index.save(path)
+            loaded = changelog_index.ChangelogIndex.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(self.index.to_protobuf(), loaded.to_protobuf())
+        self.assertEqual(['0.0.3'], self.versions(loaded.query(bug=1000)))
+        self.assertEqual(1, len(loaded.query(launchpad_bug=2000)))
+        self.assertEqual(['0.0.2'], self.versions(loaded.query(
+            start=1000, end=1001)))
+
+    def test_load_missing(self):
+        self.assertEqual(0, len(changelog_index.ChangelogIndex.load(
+            '/nonexistent/debalot/index')))
+
+
+if __name__ == "__main__":
+    unittest.main()
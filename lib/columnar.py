@@ -0,0 +1,369 @@
+﻿"""Columnar export of binary package indexes, for aggregate queries.
+
+Summing sizes or counting packages per section over a whole suite is slow
+when each package is a BinaryPackage protobuf. PackageColumns stores the
+same information as one array per field instead:
+    name, version, architecture, section: dictionary encoded strings. Each
+        value is an index into the column's dictionary, or -1 if unset.
+    priority: the Priority enum value, or -1 if unset.
+    essential: 1 if the package is essential, otherwise 0.
+    size, installed_size: the Size and Installed-Size fields, or -1.
+    <relation>_offsets, <relation>_targets: for each relation field, such as
+        depends, the relations of package i are targets[offsets[i]:
+        offsets[i + 1]]. Each target is the name of the relation's first
+        alternative, encoded in the name dictionary.
+Columns are array.array objects, or NumPy arrays if NumPy is installed and
+requested, so aggregations run over flat arrays of numbers.
+
+A saved export starts with a JSON header giving the dictionaries and the
+position and type of each column, followed by the raw column data. Columns
+are aligned to 8 bytes, so NumPy can memory-map them without copying.
+
+Example use:
+    columns = PackageColumns.from_packages(PackageIndex.load('amd64.index'))
+    columns.save('amd64.columns')
+    columns = PackageColumns.load('amd64.columns', use_numpy=True)
+    columns.columns['installed_size'].sum()
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import array
+import collections
+import json
+import os
+import struct
+import sys
+import tempfile
+
+
+MAGIC = b'DEBALOT-COLUMNS\n'
+# The relation fields exported, in column order.
+RELATION_FIELDS = ('pre_depends', 'depends', 'recommends', 'suggests',
+                   'conflicts', 'breaks')
+# String columns and the dictionary each one is encoded with. Relation
+# targets share the name dictionary so they can be joined with names.
+STRING_COLUMNS = collections.OrderedDict([
+    ('name', 'name'),
+    ('version', 'version'),
+    ('architecture', 'architecture'),
+    ('section', 'section'),
+])
+_SIZE_FIELDS = (('size', 'Size'), ('installed_size', 'Installed-Size'))
+_ALIGNMENT = 8
+_MISSING = -1
+_BYTE_ORDER = '<' if sys.byteorder == 'little' else '>'
+_TYPE_KINDS = {'b': 'i', 'h': 'i', 'i': 'i', 'l': 'i', 'q': 'i',
+               'B': 'u', 'H': 'u', 'I': 'u', 'L': 'u', 'Q': 'u',
+               'f': 'f', 'd': 'f'}
+
+
+if bytes is str:  # Python 2
+    def _to_bytes(column):
+        return column.tostring()
+
+    def _from_bytes(column, data):
+        column.fromstring(data)
+else:
+    def _to_bytes(column):
+        return column.tobytes()
+
+    def _from_bytes(column, data):
+        column.frombytes(data)
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ValueError('NumPy columns require the numpy module.')
+    return numpy
+
+
+def _dtype(column):
+    """Get the NumPy dtype string of an array.array, e.g. '<i4'."""
+    byte_order = '|' if column.itemsize == 1 else _BYTE_ORDER
+    return '%s%s%d' % (byte_order, _TYPE_KINDS[column.typecode],
+                       column.itemsize)
+
+
+def _new_array(dtype):
+    """Create an empty array.array matching a dtype string.
+
+    Returns:
+        A tuple of the array and whether its byte order differs from dtype.
+    Raises:
+        ValueError: No array type code has the dtype's kind and size.
+    """
+    byte_order, kind, size = dtype[0], dtype[1], int(dtype[2:])
+    for typecode in 'bhilqBHILQfd':
+        if _TYPE_KINDS[typecode] != kind:
+            continue
+        try:
+            column = array.array(str(typecode))
+        except ValueError:  # 'q' and 'Q' are missing before Python 3.3.
+            continue
+        if column.itemsize == size:
+            return column, byte_order not in ('|', _BYTE_ORDER)
+    raise ValueError('Unsupported column type:', dtype)
+
+
+class Dictionary(object):
+    """Encodes strings as consecutive integers.
+
+    Args:
+        values: The strings already encoded, in code order.
+    """
+    def __init__(self, values=()):
+        self.values = list(values)
+        self._codes = dict((value, code)
+                           for code, value in enumerate(self.values))
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value):
+        """Get the code of a string, adding it if it is new."""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._codes[value] = code
+        return code
+
+    def decode(self, code):
+        """Get the string with a code, or None for -1."""
+        return None if code == _MISSING else self.values[code]
+
+
+class PackageColumns(object):
+    """Binary packages stored as one array per field."""
+
+    def __init__(self):
+        self.dictionaries = collections.OrderedDict(
+            (name, Dictionary())
+            for name in sorted(set(STRING_COLUMNS.values())))
+        self.columns = collections.OrderedDict()
+        for name in STRING_COLUMNS:
+            self.columns[name] = array.array(str('i'))
+        self.columns['priority'] = array.array(str('b'))
+        self.columns['essential'] = array.array(str('b'))
+        for name, _ in _SIZE_FIELDS:
+            self.columns[name] = array.array(str('l'))
+        for field in RELATION_FIELDS:
+            self.columns[field + '_offsets'] = array.array(str('i'), [0])
+            self.columns[field + '_targets'] = array.array(str('i'))
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, package):
+        """Add a package as the next row.
+
+        Args:
+            package: A BinaryPackage protobuf.
+        """
+        columns = self.columns
+        for name, dictionary in STRING_COLUMNS.items():
+            if package.HasField(name):
+                code = self.dictionaries[dictionary].encode(
+                    getattr(package, name))
+            else:
+                code = _MISSING
+            columns[name].append(code)
+        columns['priority'].append(package.priority
+                                   if package.HasField('priority')
+                                   else _MISSING)
+        columns['essential'].append(1 if package.essential else 0)
+        sizes = dict((field.key, field.value)
+                     for field in package.additional_fields)
+        for name, key in _SIZE_FIELDS:
+            try:
+                columns[name].append(int(sizes.get(key, _MISSING)))
+            except ValueError:
+                columns[name].append(_MISSING)
+        names = self.dictionaries['name']
+        for field in RELATION_FIELDS:
+            targets = columns[field + '_targets']
+            for relation in getattr(package, field):
+                targets.append(names.encode(relation.name.split(':', 1)[0]))
+            columns[field + '_offsets'].append(len(targets))
+        self._count += 1
+
+    def extend(self, packages):
+        """Add packages as rows.
+
+        Args:
+            packages: An iterable of BinaryPackage protobufs, such as a
+                PackageIndex.
+        """
+        for package in packages:
+            self.append(package)
+
+    @classmethod
+    def from_packages(cls, packages):
+        """Create columns from an iterable of BinaryPackage protobufs."""
+        columns = cls()
+        columns.extend(packages)
+        return columns
+
+    def decode(self, column, code):
+        """Get the string a code in a dictionary encoded column stands for.
+
+        Args:
+            column: The name of a string column, e.g. 'section', or of a
+                relation targets column.
+            code: A value in that column.
+        Returns:
+            The string, or None if the code is -1.
+        """
+        dictionary = STRING_COLUMNS.get(column, 'name')
+        return self.dictionaries[dictionary].decode(int(code))
+
+    def value_counts(self, column):
+        """Count the rows with each value of a column.
+
+        Args:
+            column: The name of a column. Dictionary encoded values are
+                decoded.
+        Returns:
+            A dictionary mapping each value to the number of rows with it.
+        """
+        values = self.columns[column]
+        if isinstance(values, array.array):
+            counts = collections.Counter(values)
+        else:
+            counts = dict(zip(*_import_numpy().unique(values,
+                                                     return_counts=True)))
+        if column in STRING_COLUMNS:
+            return dict((self.decode(column, code), int(count))
+                        for code, count in counts.items())
+        return dict((int(value), int(count))
+                    for value, count in counts.items())
+
+    def relation_counts(self, field):
+        """Get the number of relations of each package in a relation field.
+
+        Args:
+            field: The relation field, e.g. 'depends'.
+        Returns:
+            An array of counts, one per row.
+        """
+        offsets = self.columns[field + '_offsets']
+        if isinstance(offsets, array.array):
+            return array.array(str('i'), (offsets[row + 1] - offsets[row]
+                                          for row in range(self._count)))
+        return offsets[1:] - offsets[:-1]
+
+    def to_numpy(self):
+        """Convert the columns to NumPy arrays, sharing their memory.
+
+        Raises:
+            ValueError: NumPy is not installed.
+        """
+        numpy = _import_numpy()
+        for name, column in self.columns.items():
+            if isinstance(column, array.array):
+                self.columns[name] = numpy.frombuffer(column,
+                                                      dtype=_dtype(column))
+
+    def _header(self):
+        columns = []
+        offset = 0
+        for name, column in self.columns.items():
+            if isinstance(column, array.array):
+                dtype = _dtype(column)
+            else:
+                dtype = column.dtype.str
+            columns.append({'name': name, 'dtype': dtype, 'offset': offset,
+                            'length': len(column)})
+            offset += -(-len(column) * column.itemsize //
+                        _ALIGNMENT) * _ALIGNMENT
+        return {
+            'rows': self._count,
+            'dictionaries': dict((name, dictionary.values) for name, dictionary
+                                 in self.dictionaries.items()),
+            'columns': columns,
+        }
+
+    def save(self, path):
+        """Write the columns to a file, replacing it atomically.
+
+        Args:
+            path: The path of the file.
+        """
+        header = json.dumps(self._header(), sort_keys=True).encode('utf-8')
+        header += b' ' * (-(len(MAGIC) + 4 + len(header)) % _ALIGNMENT)
+        handle, temp_path = tempfile.mkstemp(
+            prefix='.tmp-', dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                output.write(MAGIC)
+                output.write(struct.pack(str('<I'), len(header)))
+                output.write(header)
+                for column in self.columns.values():
+                    if isinstance(column, array.array):
+                        data = _to_bytes(column)
+                    else:
+                        data = column.tobytes()
+                    output.write(data)
+                    output.write(b'\0' * (-len(data) % _ALIGNMENT))
+            os.rename(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def _read_header(input_file):
+        if input_file.read(len(MAGIC)) != MAGIC:
+            raise ValueError('Not a package columns file.')
+        length, = struct.unpack(str('<I'), input_file.read(4))
+        header = json.loads(input_file.read(length).decode('utf-8'))
+        return header, len(MAGIC) + 4 + length
+
+    @classmethod
+    def load(cls, path, use_numpy=False):
+        """Read columns written by save.
+
+        Args:
+            path: The path of the file.
+            use_numpy: If true, the columns are read-only NumPy arrays
+                memory-mapped from the file, so only the parts that are used
+                are read. Otherwise they are array.array objects.
+        Returns:
+            A PackageColumns.
+        Raises:
+            ValueError: The file is not a package columns file, a column's
+                type is not supported, or use_numpy is true and NumPy is not
+                installed.
+        """
+        numpy = _import_numpy() if use_numpy else None
+        columns = cls()
+        with open(path, 'rb') as input_file:
+            header, data_offset = cls._read_header(input_file)
+            for name, values in header['dictionaries'].items():
+                columns.dictionaries[name] = Dictionary(values)
+            for column in header['columns']:
+                offset = data_offset + column['offset']
+                dtype = str(column['dtype'])
+                if numpy is not None:
+                    if column['length']:
+                        values = numpy.memmap(path, dtype=dtype,
+                                              mode='r', offset=offset,
+                                              shape=(column['length'],))
+                    else:
+                        values = numpy.zeros(0, dtype=dtype)
+                else:
+                    values, swap = _new_array(dtype)
+                    input_file.seek(offset)
+                    _from_bytes(values, input_file.read(
+                        column['length'] * values.itemsize))
+                    if swap:
+                        values.byteswap()
+                columns.columns[column['name']] = values
+        columns._count = header['rows']
+        return columns
@@ -0,0 +1,144 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for columnar module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from debalot.lib import columnar
+from debalot.lib import package_index
+
+
+PACKAGES = '''Package: hello
+Version: 2.10-2
+Architecture: amd64
+Section: devel
+Priority: optional
+Installed-Size: 280
+Size: 56132
+Depends: libc6 (>= 2.14), dpkg | install-info
+Suggests: hello-doc
+
+Package: libc6
+Version: 2.31-13
+Architecture: amd64
+Section: libs
+Priority: required
+Installed-Size: 12000
+Pre-Depends: libgcc-s1:amd64
+
+Package: base-files
+Version: 11.1
+Architecture: amd64
+Essential: yes
+Installed-Size: 391
+'''
+
+
+class TestPackageColumns(unittest.TestCase):
+    def setUp(self):
+        self.columns = columnar.PackageColumns.from_packages(
+            package_index.read_packages_file(io.StringIO(PACKAGES)))
+
+    def decode(self, column):
+        return [self.columns.decode(column, code)
+                for code in self.columns.columns[column]]
+
+    def test_columns(self):
+        self.assertEqual(3, len(self.columns))
+        self.assertEqual(['hello', 'libc6', 'base-files'],
+                         self.decode('name'))
+        self.assertEqual(['devel', 'libs', None], self.decode('section'))
+        self.assertEqual(['amd64'] * 3, self.decode('architecture'))
+        self.assertEqual([3, 0, -1], list(self.columns.columns['priority']))
+        self.assertEqual([0, 0, 1], list(self.columns.columns['essential']))
+        self.assertEqual([56132, -1, -1], list(self.columns.columns['size']))
+        self.assertEqual([280, 12000, 391],
+                         list(self.columns.columns['installed_size']))
+
+    def test_relations(self):
+        self.assertEqual([0, 2, 2, 2],
+                         list(self.columns.columns['depends_offsets']))
+        self.assertEqual(['libc6', 'dpkg'], self.decode('depends_targets'))
+        self.assertEqual(['libgcc-s1'], self.decode('pre_depends_targets'))
+        self.assertEqual([2, 0, 0],
+                         list(self.columns.relation_counts('depends')))
+        self.assertEqual([0, 0, 0],
+                         list(self.columns.relation_counts('breaks')))
+        # Relation targets are encoded in the same dictionary as names.
+        self.assertEqual(self.columns.columns['name'][1],
+                         self.columns.columns['depends_targets'][0])
+
+    def test_value_counts(self):
+        self.assertEqual({'devel': 1, 'libs': 1, None: 1},
+                         self.columns.value_counts('section'))
+        self.assertEqual({-1: 1, 0: 1, 3: 1}, self.columns.value_counts('priority'))
+
+
+class TestSaveLoad(unittest.TestCase):
+    def setUp(self):
+        self.columns = columnar.PackageColumns.from_packages(
+            package_index.read_packages_file(io.StringIO(PACKAGES)))
+        directory = tempfile.mkdtemp(prefix='debalot_test_')
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'suite.columns')
+        self.columns.save(self.path)
+
+    def assertColumnsEqual(self, loaded):
+        self.assertEqual(len(self.columns), len(loaded))
+        self.assertEqual(list(self.columns.columns), list(loaded.columns))
+        for name, column in self.columns.columns.items():
+            self.assertEqual(list(column), list(loaded.columns[name]), name)
+        for name, dictionary in self.columns.dictionaries.items():
+            self.assertEqual(dictionary.values,
+                             loaded.dictionaries[name].values)
+
+    def test_load(self):
+        loaded = columnar.PackageColumns.load(self.path)
+        self.assertColumnsEqual(loaded)
+        self.assertEqual(self.columns.value_counts('section'),
+                         loaded.value_counts('section'))
+
+    def test_columns_aligned(self):
+        with open(self.path, 'rb') as input_file:
+            header, data_offset = columnar.PackageColumns._read_header(
+                input_file)
+        self.assertEqual(0, data_offset % 8)
+        for column in header['columns']:
+            self.assertEqual(0, column['offset'] % 8)
+
+    def test_not_columns_file(self):
+        with open(self.path, 'wb') as output:
+            output.write(b'Package: hello\n')
+        self.assertRaises(ValueError, columnar.PackageColumns.load, self.path)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_load_numpy(self):
+        loaded = columnar.PackageColumns.load(self.path, use_numpy=True)
+        self.assertColumnsEqual(loaded)
+        self.assertEqual(12671, loaded.columns['installed_size'].sum())
+        self.assertEqual([2, 0, 0], list(loaded.relation_counts('depends')))
+        self.assertEqual({-1: 1, 0: 1, 3: 1}, loaded.value_counts('priority'))
+
+    @unittest.skipIf(numpy is not None, 'NumPy is installed')
+    def test_load_numpy_missing(self):
+        self.assertRaises(ValueError, columnar.PackageColumns.load,
+                          self.path, use_numpy=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+﻿"""Reading of deb822 files such as debian/control and Packages indexes.
+
+A deb822 file is a sequence of paragraphs separated by blank lines. Each
+paragraph is a sequence of "Key: value" fields, and a field's value may be
+continued on following lines that start with a space or tab. Lines starting
+with '#' are comments.
+https://www.debian.org/doc/debian-policy/ch-controlfields.html
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import itertools
+
+
+class FieldParser(object):
+    """An incremental deb822 parser.
+
+    Lines are fed to the parser one at a time. A field is only known to be
+    complete once the line after it is seen, so each call to feed returns the
+    field that the line completes, if any.
+
+    Continuation lines are joined to their field's value with newlines, with
+    the single leading space or tab of each continuation line removed.
+
+    Attributes:
+        line_number: The number of lines fed so far.
+        field_line: The line number, counting from 1, on which the field
+            last returned started.
+    """
+    def __init__(self):
+        self._field = None
+        self._field_start = None
+        # The number of the paragraph being read, counting from 0, or of the
+        # next paragraph if the last line read was blank.
+        self._paragraph = 0
+        self._in_paragraph = False
+        self.line_number = 0
+        self.field_line = None
+
+    def _complete(self):
+        field = self._field
+        if field is not None:
+            self.field_line = self._field_start
+        self._field = None
+        return field
+
+    def feed(self, line):
+        """Parses the next line of a deb822 file.
+
+        Args:
+            line: A string containing the line, including its line ending.
+        Returns:
+            A tuple of (paragraph number, key, value) if the line completed a
+            field, otherwise None. Paragraphs are numbered from 0.
+        Raises:
+            ValueError: The line is neither a field, a continuation line, a
+                comment nor blank.
+        """
+        self.line_number += 1
+        if line.isspace() or not line:
+            if self._in_paragraph:
+                self._paragraph += 1
+                self._in_paragraph = False
+            return self._complete()
+        if line[0] == '#':
+            return None
+        if line[0] in ' \t':
+            if self._field is None:
+                raise ValueError('Continuation line outside a field:', line)
+            number, key, value = self._field
+            self._field = (number, key,
+                           value + '\n' + line[1:].rstrip('\r\n'))
+            return None
+        if ':' not in line:
+            raise ValueError('Line does not contain field and value:', line)
+        field = self._complete()
+        key, value = line.split(':', 1)
+        self._in_paragraph = True
+        self._field = (self._paragraph, key.strip(), value.strip())
+        self._field_start = self.line_number
+        return field
+
+    def close(self):
+        """Finishes parsing.
+
+        Returns:
+            The last field as a tuple of (paragraph number, key, value), or
+            None if there is none.
+        """
+        return self._complete()
+
+
+def _iter_fields(input_file):
+    parser = FieldParser()
+    for line in iter(input_file.readline, ''):
+        field = parser.feed(line)
+        if field is not None:
+            yield field
+    field = parser.close()
+    if field is not None:
+        yield field
+
+
+def iter_paragraphs(input_file):
+    """Read the paragraphs of a deb822 file.
+
+    Args:
+        input_file: A readable unicode file object.
+    Yields:
+        A list of (key, value) tuples for each paragraph, in file order.
+    Raises:
+        ValueError: A line is neither a field, a continuation line, a comment
+            nor blank.
+    """
+    for _, fields in itertools.groupby(_iter_fields(input_file),
+                                       key=lambda field: field[0]):
+        yield [(key, value) for _, key, value in fields]
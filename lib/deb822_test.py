@@ -0,0 +1,64 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for deb822 module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import unittest
+
+from debalot.lib import deb822
+
+
+class TestIterParagraphs(unittest.TestCase):
+    def paragraphs(self, text):
+        return list(deb822.iter_paragraphs(io.StringIO(text)))
+
+    def test_paragraphs(self):
+        self.assertEqual(
+            [[('Source', 'hello'), ('Section', 'devel')],
+             [('Package', 'hello')]],
+            self.paragraphs('Source: hello\nSection:devel\n\n\n'
+                            'Package: hello  \n'))
+
+    def test_continuation_lines(self):
+        self.assertEqual(
+            [[('Description', 'short\nlong\n.\n  indented'),
+              ('Depends', 'a,\nb')]],
+            self.paragraphs('Description: short\n long\n .\n   indented\n'
+                            'Depends: a,\n\tb\n'))
+
+    def test_comments(self):
+        self.assertEqual([[('Package', 'hello')]],
+                         self.paragraphs('# Comment\nPackage: hello\n'))
+
+    def test_whitespace_line_ends_paragraph(self):
+        self.assertEqual(2, len(self.paragraphs('A: 1\n \nB: 2\n')))
+
+    def test_invalid_lines(self):
+        self.assertRaises(ValueError, self.paragraphs, ' orphan\n')
+        self.assertRaises(ValueError, self.paragraphs, 'A: 1\nno colon\n')
+
+
+
+class TestFieldParser(unittest.TestCase):
+    def test_line_numbers(self):
+        parser = deb822.FieldParser()
+        lines = ['# Comment\n', 'A: 1\n', 'B: 2\n', ' continued\n', '\n',
+                 'C: 3\n']
+        starts = []
+        for line in lines:
+            if parser.feed(line) is not None:
+                starts.append(parser.field_line)
+        self.assertEqual((1, 'C', '3'), parser.close())
+        starts.append(parser.field_line)
+        self.assertEqual([2, 3, 6], starts)
+        self.assertEqual(6, parser.line_number)
+
+
+if __name__ == "__main__":
+    unittest.main()
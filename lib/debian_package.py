@@ -7,21 +7,38 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-import calendar
-from datetime import datetime
-import dateutil.parser
+import bisect
+import heapq
 import os
-import string
+import re
 
+from debalot.lib import changelog_date
 from debalot.lib import debian_package_pb2 as pb
-from debalot.lib import file
 from debalot.lib import person
 
+try:
+    unicode
+except NameError:  # Python 3
+    unicode = str
+
 
 URGENCY_ERROR_VALUE = u'Invalid package urgency: %s'
 KEYWORD_ERROR_VALUE = (u'Invalid changelog keyword: "%s". '
                        u'Valid keywords are: urgency')
 
+# The same patterns dpkg uses to find the bugs closed by a changelog entry.
+_CLOSES_PATTERN = re.compile(
+    r'closes:\s*(?:bug)?#?\s?\d+(?:,\s*(?:bug)?#?\s?\d+)*', re.IGNORECASE)
+_LAUNCHPAD_PATTERN = re.compile(r'lp:\s+#\d+(?:,\s*#\d+)*', re.IGNORECASE)
+_NUMBER_PATTERN = re.compile(r'\d+')
+# One alternative of a relation field: a name, an optional version in
+# parentheses, an optional architecture list in brackets and any number of
+# build profile restrictions in angle brackets, which are ignored.
+_RELATION_PATTERN = re.compile(
+    r'^\s*(?P<name>[^\s(\[<]+)\s*'
+    r'(?:\(\s*(?P<relationship>[<>=]+)\s*(?P<version>[^\s)]+)\s*\))?\s*'
+    r'(?:\[(?P<architectures>[^\]]*)\])?\s*(?:<[^>]*>\s*)*$')
+
 
 class UrgencyError(ValueError):
     """Raised if a changelog urgency value is erroneous."""
@@ -113,6 +130,43 @@ class Changelog:
             raise UrgencyError(urgency)
         return (urgency_value, commentary)
 
+    @classmethod
+    def _get_bugs(cls, pattern, entries):
+        bugs = []
+        for match in pattern.findall('\n'.join(entries)):
+            for bug in _NUMBER_PATTERN.findall(match):
+                if int(bug) not in bugs:
+                    bugs.append(int(bug))
+        return bugs
+
+    @classmethod
+    def get_closed_bugs(cls, entries):
+        """Get the Debian bugs closed by a changelog entry.
+
+        Example entry line:
+          * Fix a crash on startup. (Closes: #123456, #234567)
+
+        Args:
+            entries: A list of the lines of the changelog entry.
+        Returns:
+            A list of the bug numbers, in the order they first appear.
+        """
+        return cls._get_bugs(_CLOSES_PATTERN, entries)
+
+    @classmethod
+    def get_launchpad_bugs(cls, entries):
+        """Get the Launchpad bugs closed by a changelog entry.
+
+        Example entry line:
+          * Fix a crash on startup. (LP: #123456)
+
+        Args:
+            entries: A list of the lines of the changelog entry.
+        Returns:
+            A list of the bug numbers, in the order they first appear.
+        """
+        return cls._get_bugs(_LAUNCHPAD_PATTERN, entries)
+
     @classmethod
     def get_time_string(cls, timestamp, zone):
         """Get the time string for a changelong from a timestamp and time zone.
@@ -123,9 +177,251 @@ class Changelog:
         returns:
             A time string for use in a debian/changelog file.
         """
-        change_time = datetime.fromtimestamp(
-            timestamp, tz=dateutil.tz.tzoffset(None, zone*60))
-        return change_time.strftime('%a, %d %b %Y %H:%M:%S %z')
+        return changelog_date.format_date(timestamp, zone)
+
+    @classmethod
+    def parse_time_string(cls, time_string):
+        """Get the timestamp and time zone from a changelog time string.
+
+        This is the reverse of get_time_string.
+
+        Args:
+            time_string: The date from a changelog trailer line.
+        Returns:
+            A tuple containing the integer timestamp and the timezone offset
+            in minutes.
+        """
+        return changelog_date.parse_date(time_string)
+
+
+class ChangelogParser(object):
+    """An incremental parser for changelog files.
+
+    The changelog format looks like:
+    package (version) distribution(s); urgency=urgency
+        [optional blank line(s), stripped]
+      * change details
+        more change details
+        [blank line(s), included in output of dpkg-parsechangelog]
+      * even more change details
+        [optional blank line(s), stripped]
+     -- maintainer name <email address>[two spaces]  date
+
+    where the 'p' in 'package' is in column 0.
+
+    Lines are fed to the parser one at a time, so a changelog can be parsed
+    as it is read rather than once it has been read completely.
+
+    Args:
+        errors: If a list is given, the parser is lenient: instead of raising
+            an error, it appends a tuple of (line number, field, exception)
+            to the list and carries on, leaving the field unset. The field is
+            e.g. 'urgency' or 'date', and line numbers count from 1.
+    """
+    def __init__(self, errors=None):
+        self._change = None
+        self._entries = None
+        self._errors = errors
+        self._line_number = 0
+
+    @staticmethod
+    def _is_empty(line):
+        return line.isspace() or len(line) <= 1
+
+    def _error(self, field, error):
+        if self._errors is None:
+            raise error
+        self._errors.append((self._line_number, field, error))
+
+    def _parse_header(self, line):
+        change = pb.Change()
+        sections = line.split(';')
+        words = sections[0].split()
+        if len(words) < 2 or len(sections) < 2:
+            self._error('header', ValueError('Invalid changelog header line:',
+                                             line.rstrip('\r\n')))
+            # Keep what there is, so the entry's other lines are still read.
+            change.name = ''.join(words[:1])
+            change.version = ''.join(words[1:2]).strip('()')
+            return change
+        change.name = words[0]
+        change.version = words[1].strip('()')
+        # TODO: Check for multiple distributions
+        change.distributions.extend([word.strip(';') for word in words[2:]])
+        # TODO: Better split the urgency.
+        keyword_values = sections[1].split(',')
+        for keyword_value in keyword_values:
+            # A keyword without a value has an empty value, which is not a
+            # valid urgency.
+            key, _, value = keyword_value.strip().partition('=')
+            if key == 'urgency':
+                try:
+                    (change.urgency, commentary) = (
+                        Changelog.get_urgency_from_string(value))
+                except UrgencyError as error:
+                    self._error('urgency', error)
+                    continue
+                if commentary:
+                    change.urgency_commentary = commentary
+            else:
+                self._error(key, KeywordError(key))
+        return change
+
+    def _parse_trailer(self, line):
+        change = self._change
+        entries = self._entries
+        while entries and not entries[-1]:
+            del entries[-1]
+        change.entries.extend(entries)
+        change.closes.extend(Changelog.get_closed_bugs(entries))
+        change.launchpad_bugs.extend(Changelog.get_launchpad_bugs(entries))
+        person.parse_person(change.maintainer, line[3:])
+        try:
+            (change.timestamp,
+             change.timezone) = Changelog.parse_time_string(
+                line[line.find('>')+3:])
+        except Exception as error:
+            # dateutil raises OverflowError and others besides ValueError.
+            self._error('date', error)
+        self._change = None
+        self._entries = None
+        return change
+
+    def feed(self, line):
+        """Parses the next line of a changelog.
+
+        Args:
+            line: A string containing the line, including its line ending.
+        Returns:
+            A Change protobuf if the line completed a changelog entry,
+            otherwise None.
+        Raises:
+            UrgencyError: The urgency is not valid.
+            KeywordError: The header has a keyword other than urgency.
+            ValueError: The header or the date is not valid.
+        """
+        self._line_number += 1
+        if self._change is None:
+            if not self._is_empty(line):
+                self._change = self._parse_header(line)
+            return None
+        if self._entries is None:
+            if self._is_empty(line):
+                return None
+            self._entries = []
+        if line[:3] == ' --':
+            return self._parse_trailer(line)
+        self._entries.append(line[2:-1])
+        return None
+
+    def close(self):
+        """Finishes parsing a changelog.
+
+        Raises:
+            ValueError: The changelog ended partway through an entry.
+        """
+        if self._change is not None:
+            self._error('trailer',
+                        ValueError('Changelog entry has no trailer line:',
+                                   self._change.version))
+
+
+class ControlParser(object):
+    """An incremental parser for debian/control files.
+
+    The first paragraph of a control file describes the source package and
+    each following paragraph describes a binary package built from it:
+    Source: hello
+    Maintainer: Santiago Vila <sanvila@debian.org>
+    Build-Depends: debhelper (>= 9),
+                   autotools-dev
+
+    Package: hello
+    Architecture: any
+    Description: example package based on GNU hello
+     The GNU hello program produces a familiar, friendly greeting.
+
+    Fields may be folded onto continuation lines, which start with a space.
+    Lines are fed to the parser one at a time, so a control file can be
+    parsed as it is read.
+
+    Args:
+        package: The SourcePackage into which to import the control file.
+        substvars_files: A dictionary mapping binary package names to their
+            Substvars, as returned by substvars.load_directory. If given,
+            variables in the relation fields of binary packages are
+            expanded, and variables are undefined for packages that aren't
+            in it. If None, variable references are kept as they are.
+        errors: If a list is given, the parser is lenient: instead of raising
+            an error, it appends a tuple of (line number, field, exception)
+            to the list and skips the field or line. The field is None for
+            lines that are not part of a field, and line numbers count
+            from 1.
+    """
+    def __init__(self, package, substvars_files=None, errors=None):
+        # Imported here so that importing this module stays cheap.
+        from debalot.lib import deb822
+        self._package = package
+        self._substvars_files = substvars_files
+        self._no_substvars = None
+        if substvars_files is not None:
+            from debalot.lib import substvars
+            self._no_substvars = substvars.Substvars()
+        self._errors = errors
+        self._fields = deb822.FieldParser()
+        self._paragraph = 0
+        self._binary_package = None
+
+    def _import_field(self, field):
+        if field is None:
+            return
+        if self._errors is None:
+            self._parse_field(*field)
+            return
+        # Field parsers mostly raise ValueError, but any error is reported,
+        # so that one field the parser can't handle doesn't end the
+        # validation of the rest of the file.
+        try:
+            self._parse_field(*field)
+        except Exception as error:
+            self._errors.append((self._fields.field_line, field[1], error))
+
+    def _parse_field(self, paragraph, key, value):
+        if paragraph == 0:
+            # A folded field is passed on as a single logical line.
+            self._package._parse_control_line('%s: %s' % (key, value))
+            return
+        if paragraph != self._paragraph:
+            self._paragraph = paragraph
+            self._binary_package = BinaryPackage(
+                self._package._pb.binary_packages.add())
+        if self._substvars_files is None:
+            self._binary_package._parse_control_field(key, value)
+        else:
+            self._binary_package._parse_control_field(
+                key, value, self._substvars_files.get(
+                    self._binary_package.name, self._no_substvars))
+
+    def feed(self, line):
+        """Parses the next line of a control file.
+
+        Args:
+            line: A string containing the line, including its line ending.
+        Raises:
+            ValueError: The line or the field it completes is not valid.
+        """
+        try:
+            field = self._fields.feed(line)
+        except ValueError as error:
+            if self._errors is None:
+                raise
+            self._errors.append((self._fields.line_number, None, error))
+            return
+        self._import_field(field)
+
+    def close(self):
+        """Finishes parsing a control file."""
+        self._import_field(self._fields.close())
 
 
 class Relation:
@@ -176,6 +472,67 @@ class Relation:
         return cls._RELATIONSHIP_STRINGS[pb.Relation.Relationship.Name(
             relationship)][0]
 
+    @classmethod
+    def get_relation_string(cls, relation):
+        """Get the control file form of a relation and its alternatives.
+
+        Args:
+            relation: A Relation protobuf.
+        Returns:
+            A string such as 'debhelper (>= 9) [amd64] | cdbs'.
+        """
+        strings = []
+        for alternative in [relation] + list(relation.alternatives):
+            string = alternative.name
+            if alternative.HasField('relationship'):
+                string += ' (%s %s)' % (
+                    cls.get_relationship_string(alternative),
+                    alternative.version)
+            if alternative.architectures:
+                string += ' [%s]' % ' '.join(alternative.architectures)
+            strings.append(string)
+        return ' | '.join(strings)
+
+    @classmethod
+    def parse_relations(cls, value):
+        """Parse the value of a relation field such as Depends.
+
+        Example value:
+        debhelper (>= 9), libc6-dev [linux-any] | libc-dev, python3:any
+
+        Args:
+            value: The string value of the field.
+        Returns:
+            A list of Relation protobufs, one per comma-separated relation.
+            Alternatives after the first are in each relation's alternatives.
+        Raises:
+            ValueError: A relation could not be parsed.
+        """
+        relations = []
+        for group in value.split(','):
+            if group.isspace() or not group:
+                continue
+            relation = None
+            for alternative in group.split('|'):
+                if relation is None:
+                    relation = pb.Relation()
+                    parsed = relation
+                else:
+                    parsed = relation.alternatives.add()
+                match = _RELATION_PATTERN.match(alternative)
+                if match is None:
+                    raise ValueError('Invalid relation:', alternative.strip())
+                parsed.name = match.group('name')
+                if match.group('relationship'):
+                    parsed.relationship = cls.parse_relationship(
+                        match.group('relationship'))
+                    parsed.version = match.group('version')
+                if match.group('architectures'):
+                    parsed.architectures.extend(
+                        match.group('architectures').split())
+            relations.append(relation)
+        return relations
+
     @classmethod
     def parse_relationship(cls, relationship):
         """Parse a relationship for setting a relationship field.
@@ -213,6 +570,19 @@ class Relation:
                             'accepted for setting relationship values.')
 
 
+# Relation fields are parsed once per distinct substvars and value. The
+# cache is created by _get_expansion_cache when first needed.
+_expansion_cache = None
+
+
+def _get_expansion_cache():
+    global _expansion_cache
+    if _expansion_cache is None:
+        from debalot.lib import substvars
+        _expansion_cache = substvars.ExpansionCache(Relation.parse_relations)
+    return _expansion_cache
+
+
 class _Package(object):
     """ A generic Debian package.
     A _Package should never be instantiated or otherwise used except as a
@@ -299,6 +669,8 @@ class SourcePackage(_Package):
 
         self.standards_version = self._pb.standards_version
         self.changelog = self._pb.changelog
+        # The changelog's version index, as built by _get_changelog_index.
+        self._changelog_index = None
 
         self.binary_packages = self._pb.binary_packages
 
@@ -332,7 +704,6 @@ class SourcePackage(_Package):
             person.parse_person(self.maintainer, value)
             return
         if key == 'Uploaders':
-            # TODO: Handle the fact that Uploaders can be folded.
             uploaders = value.split(',')
             for uploader in uploaders:
                 person.parse_person(self.uploaders.add(), uploader.strip())
@@ -348,20 +719,8 @@ class SourcePackage(_Package):
             return
         if key in {'Build-Depends', 'Build-Depends-Indep', 'Build-Conflicts',
                    'Build-Conflicts-Indep'}:
-            packages = value.split(',')
-            for package in packages:
-                build_field = getattr(
-                    self, key.lower().replace('-', '_')).add()
-                parenthetical_start = package.find('(')
-                if parenthetical_start == -1:
-                    build_field.name = package.strip()
-                    continue
-                build_field.name = package[:parenthetical_start].strip()
-                parenthetical = package[parenthetical_start+1:].strip(
-                    string.whitespace + ')').split()
-                build_field.relationship = Relation.parse_relationship(
-                    parenthetical[0])
-                build_field.version = parenthetical[1]
+            getattr(self, key.lower().replace('-', '_')).extend(
+                Relation.parse_relations(value))
             return
         if key.startswith('Vcs-'):
             # TODO: Handle version control fields
@@ -370,96 +729,175 @@ class SourcePackage(_Package):
         field.key = key
         field.value = value
 
-    def import_control_file(self, control_file):
+    def import_control_file(self, control_file, substvars_files=None,
+                            errors=None):
         """Imports a control file from a Debian source package.
 
+        The control file format is described in ControlParser.
+
         Args:
             control_file: A readable unicode file object containing the
                 control file.
+            substvars_files: An optional dictionary mapping binary package
+                names to the Substvars with which to expand their relation
+                fields.
+            errors: An optional list. If given, invalid lines and fields are
+                skipped and the errors appended to it, as in ControlParser.
         """
-        while True:
-            line = control_file.readline()
-            if not line:
-                return
-            if line.isspace():
-                break  # The first paragraph break ends the source package.
-            if ':' in line:
-                self._parse_control_line(line)
+        parser = ControlParser(self, substvars_files, errors)
+        for line in iter(control_file.readline, ''):
+            parser.feed(line)
+        parser.close()
+
+    # Fields a binary package paragraph takes from the source paragraph if
+    # it doesn't set them itself.
+    _INHERITED_FIELDS = ('section', 'priority', 'maintainer', 'homepage')
+
+    def resolve_binary_package(self, binary_package):
+        """Get a binary package with the fields it inherits filled in.
+
+        Binary packages are stored with only the fields from their own
+        paragraph of the control file, so the source package's maintainer
+        and so on are stored once however many binaries it builds. This
+        resolves them for a single binary package, e.g. before exporting it.
+
+        Args:
+            binary_package: A BinaryPackage protobuf built from this source
+                package.
+        Returns:
+            A new BinaryPackage protobuf.
+        """
+        resolved = pb.BinaryPackage()
+        resolved.CopyFrom(binary_package)
+        for field in self._INHERITED_FIELDS:
+            if resolved.HasField(field) or not self._pb.HasField(field):
+                continue
+            if field == 'maintainer':
+                resolved.maintainer.CopyFrom(self._pb.maintainer)
             else:
-                raise ValueError('Line does not contain field and value:',
-                                 line)
-        # TODO: Handle binary packages.
+                setattr(resolved, field, getattr(self._pb, field))
+        return resolved
 
-    def import_changelog_file(self, changelog):
-        """Imports the changelog from a file. Extends current changelog.
+    def iter_binary_packages(self):
+        """Iterate over the binary packages with their inherited fields.
 
-        The changelog format looks like:
-        package (version) distribution(s); urgency=urgency
-            [optional blank line(s), stripped]
-          * change details
-            more change details
-            [blank line(s), included in output of dpkg-parsechangelog]
-          * even more change details
-            [optional blank line(s), stripped]
-         -- maintainer name <email address>[two spaces]  date
+        Yields:
+            A new BinaryPackage protobuf for each binary package, as returned
+            by resolve_binary_package.
+        """
+        for binary_package in self._pb.binary_packages:
+            yield self.resolve_binary_package(binary_package)
+
+    def import_changelog_file(self, changelog, errors=None):
+        """Imports the changelog from a file. Extends current changelog.
 
-        where the 'p' in 'package' is in column 0.
+        The changelog format is described in ChangelogParser.
 
         Args:
             changelog: A readable unicode file object containing the changelog.
+            errors: An optional list. If given, invalid values are skipped
+                and the errors appended to it, as in ChangelogParser.
         """
+        parser = ChangelogParser(errors)
         changes = []
-        while True:
-            change = pb.Change()
-            changelog_line = file.next_nonempty_line(changelog)
-            if changelog_line is None:
-                break
-            sections = changelog_line.split(';')
-            words = sections[0].split()
-            change.name = words[0]
-            change.version = words[1].strip('()')
-            # TODO: Check for multiple distributions
-            change.distributions.extend(
-                [word.strip(';') for word in words[2:]])
-            # TODO: Better split the urgency.
-            keyword_values = sections[1].split(',')
-            for keyword_value in keyword_values:
-                key_value = keyword_value.strip().split('=')
-                if key_value[0] == 'urgency':
-                    (change.urgency,
-                     commentary) = Changelog.get_urgency_from_string(
-                        key_value[1])
-                    if commentary:
-                        change.urgency_commentary = commentary
-                else:
-                    raise KeywordError(key_value[0])
-            changelog_line = file.next_nonempty_line(changelog)
-            entries = []
-            while changelog_line[:3] != ' --':
-                entries.append(changelog_line[2:-1])
-                changelog_line = changelog.readline()
-            while not entries[-1]:
-                del entries[-1]
-            change.entries.extend(entries)
-            person.parse_person(change.maintainer, changelog_line[3:])
-            timestamp = dateutil.parser.parse(
-                changelog_line[changelog_line.find('>')+3:])
-            change.timestamp = calendar.timegm(timestamp.utctimetuple())
-            change.timezone = int(timestamp.tzinfo.utcoffset(
-                timestamp.tzinfo).total_seconds()/60)
-            changes.insert(0, change)
+        for line in iter(changelog.readline, ''):
+            change = parser.feed(line)
+            if change is not None:
+                changes.append(change)
+        parser.close()
+        changes.reverse()
         self.changelog.extend(changes)
+        self.reset_changelog_index()
+
+    def reset_changelog_index(self):
+        """Drop the changelog's version index, so it is rebuilt when next
+        needed.
+
+        Adding or removing entries is noticed without this, but it must be
+        called after changing the version of an entry in place.
+        """
+        self._changelog_index = None
 
-    def generate_changelog(self):
+    def _get_changelog_index(self):
+        """Get the changelog's entries sorted by version.
+
+        The index is rebuilt if the number of entries or the first or last
+        entry's version has changed since it was built, or after
+        reset_changelog_index. Checking this takes constant time, so a query
+        doesn't read every entry.
+
+        Returns:
+            A tuple of a list of the versions' sort keys, in order, and a
+            list of the positions of the entries in the changelog in the same
+            order.
+        """
+        from debalot.lib import version
+        changelog = self.changelog
+        state = (len(changelog),
+                 changelog[0].version if changelog else None,
+                 changelog[-1].version if changelog else None)
+        if self._changelog_index is None or self._changelog_index[0] != state:
+            keys = [version.sort_key(change.version) for change in changelog]
+            positions = sorted(range(len(changelog)),
+                               key=keys.__getitem__)
+            self._changelog_index = (
+                state, [keys[position] for position in positions], positions)
+        return self._changelog_index[1:]
+
+    def get_changes(self, limit=None, since_version=None, until_version=None):
+        """Get changelog entries, newest first.
+
+        The since and until versions work as in dpkg-parsechangelog: both
+        are exclusive. The entries between them are found by binary search
+        in a version index of the changelog, so the versions of other
+        entries aren't parsed or compared, and only the entries returned are
+        copied into the result.
+
+        Args:
+            limit: The maximum number of entries to return.
+            since_version: Only return entries with versions later than this.
+            until_version: Only return entries with versions earlier than
+                this.
+        Returns:
+            A list of Change protobufs, in changelog order.
+        """
+        if since_version is None and until_version is None:
+            end = len(self.changelog)
+            start = 0 if limit is None else max(end - limit, 0)
+            return [self.changelog[position]
+                    for position in range(end - 1, start - 1, -1)]
+        from debalot.lib import version
+        keys, positions = self._get_changelog_index()
+        low = 0
+        high = len(keys)
+        if since_version is not None:
+            low = bisect.bisect_right(keys, version.sort_key(since_version))
+        if until_version is not None:
+            high = bisect.bisect_left(keys, version.sort_key(until_version),
+                                      low)
+        if limit is None:
+            selected = sorted(positions[low:high], reverse=True)
+        else:
+            selected = heapq.nlargest(limit, positions[low:high])
+        return [self.changelog[position] for position in selected]
+
+    def generate_changelog(self, limit=None, since_version=None,
+                           until_version=None):
         """Generate a changelog for the package.
 
         Note that each entry will contain multiple lines, expressed as a list
         of strings.
 
+        Args:
+            limit: The maximum number of entries to generate.
+            since_version: Only generate entries with versions later than
+                this.
+            until_version: Only generate entries with versions earlier
+                than this.
         Yields:
             A changelog entry, from package name to timestamp.
         """
-        for change in reversed(self.changelog):
+        for change in self.get_changes(limit, since_version, until_version):
             name = change.name or self.name
             urgency = pb.Urgency.Name(change.urgency).lower()
             if change.HasField('urgency_commentary'):
@@ -529,3 +967,64 @@ class BinaryPackage(_Package):
     provides = _GenericProperty('provides')
     description = _GenericProperty('description')
     package_type = _GenericProperty('package_type')
+
+    _SIMPLE_STRING_FIELDS = {'Architecture', 'Version', 'Section', 'Homepage',
+                             'Description', 'Package-Type'}
+    _RELATION_FIELDS = {'Depends', 'Recommends', 'Suggests', 'Enhances',
+                        'Pre-Depends', 'Conflicts', 'Breaks', 'Replaces',
+                        'Built-Using'}
+
+    @staticmethod
+    def _parse_relations(value, variables):
+        if variables is None:
+            return Relation.parse_relations(value)
+        return _get_expansion_cache().get(variables, value)
+
+    def _parse_control_field(self, key, value, variables=None):
+        """Imports a field from a binary package paragraph.
+
+        Args:
+            key: A string containing the name of the field.
+            value: A string containing the value of the field, with any
+                continuation lines joined by newlines.
+            variables: An optional Substvars with which to expand variables
+                in relation fields before parsing them.
+        """
+        if key == 'Package':
+            self.name = value
+            return
+        if key in self._SIMPLE_STRING_FIELDS:
+            setattr(self._pb, key.lower().replace('-', '_'), value)
+            return
+        if key == 'Priority':
+            self.priority = self.parse_priority(value)
+            return
+        if key == 'Essential':
+            self.essential = value.lower() == 'yes'
+            return
+        if key == 'Maintainer':
+            person.parse_person(self.maintainer, value)
+            return
+        if key == 'Provides':
+            # TODO: Keep the versions of versioned provides.
+            self._pb.provides.extend(
+                relation.name
+                for relation in self._parse_relations(value, variables))
+            return
+        if key in self._RELATION_FIELDS:
+            getattr(self._pb, key.lower().replace('-', '_')).extend(
+                self._parse_relations(value, variables))
+            return
+        field = self._pb.additional_fields.add()
+        field.key = key
+        field.value = value
+
+    def import_control_paragraph(self, paragraph):
+        """Imports a binary package paragraph, e.g. from a Packages index.
+
+        Args:
+            paragraph: A list of (key, value) tuples, as yielded by
+                deb822.iter_paragraphs.
+        """
+        for key, value in paragraph:
+            self._parse_control_field(key, value)
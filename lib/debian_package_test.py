@@ -9,6 +9,7 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import codecs
+import io
 import mock
 import os
 import tempfile
@@ -128,6 +129,44 @@ class TestGetUrgencyFromString(unittest.TestCase):
                               string)
 
 
+class TestGetBugs(unittest.TestCase):
+    def setUp(self):
+        self.entries = [
+            '* Fix a crash. (Closes: #123456, #234567) (LP: #1000)',
+            '* Fix another. Closes: bug#345678,',
+            '  #456789',
+            '* Mention #567890 without closing it. lp: #2000, #3000',
+            '* Fix the crash some more. (Closes: #123456)']
+
+    def test_get_closed_bugs(self):
+        self.assertEqual(
+            [123456, 234567, 345678, 456789],
+            debian_package.Changelog.get_closed_bugs(self.entries))
+
+    def test_get_launchpad_bugs(self):
+        self.assertEqual(
+            [1000, 2000, 3000],
+            debian_package.Changelog.get_launchpad_bugs(self.entries))
+
+    def test_no_bugs(self):
+        self.assertEqual([], debian_package.Changelog.get_closed_bugs(
+            ['* Closes nothing.', '* LP:#1 needs a space.']))
+        self.assertEqual([], debian_package.Changelog.get_launchpad_bugs(
+            ['* Closes nothing.', '* LP:#1 needs a space.']))
+
+    def test_parsed_changelog(self):
+        parser = debian_package.ChangelogParser()
+        lines = ['package (1.0) unstable; urgency=low\n', '\n']
+        lines.extend('  %s\n' % entry for entry in self.entries)
+        lines.extend(['\n', ' -- A Person <a@example.org>  '
+                      'Thu, 01 Jan 1970 00:00:00 +0000\n'])
+        changes = [parser.feed(line) for line in lines]
+        self.assertEqual([123456, 234567, 345678, 456789],
+                         list(changes[-1].closes))
+        self.assertEqual([1000, 2000, 3000],
+                         list(changes[-1].launchpad_bugs))
+
+
 class TestGetRelationshipString(unittest.TestCase):
     def setUp(self):
         # Called before the first testfunction is executed
@@ -194,6 +233,41 @@ class TestParseRelationship(unittest.TestCase):
             debian_package.Relation.parse_relationship('<'))
 
 
+class TestParseRelations(unittest.TestCase):
+    def test_simple_relations(self):
+        relations = debian_package.Relation.parse_relations(
+            'gcc, python (= 2.7), golang (>=1.9.9),')
+        self.assertEqual(['gcc', 'python', 'golang'],
+                         [relation.name for relation in relations])
+        self.assertFalse(relations[0].HasField('relationship'))
+        self.assertEqual(debian_package_pb2.Relation.EQUAL,
+                         relations[1].relationship)
+        self.assertEqual('2.7', relations[1].version)
+        self.assertEqual(debian_package_pb2.Relation.LATER_OR_EQUAL,
+                         relations[2].relationship)
+        self.assertEqual('1.9.9', relations[2].version)
+
+    def test_alternatives_and_restrictions(self):
+        relations = debian_package.Relation.parse_relations(
+            'libc6-dev (>= 2.14) [linux-any] <!nocheck> | libc-dev,\n'
+            ' python3:any')
+        self.assertEqual(2, len(relations))
+        self.assertEqual(['linux-any'], relations[0].architectures)
+        self.assertEqual(['libc-dev'], [alternative.name for alternative
+                                        in relations[0].alternatives])
+        self.assertEqual('python3:any', relations[1].name)
+
+    def test_invalid_relation(self):
+        self.assertRaises(ValueError,
+                          debian_package.Relation.parse_relations,
+                          'foo (>= 1')
+
+    def test_get_relation_string(self):
+        value = 'libc6-dev (>= 2.14) [linux-any !hurd-any] | libc-dev'
+        self.assertEqual(value, debian_package.Relation.get_relation_string(
+            debian_package.Relation.parse_relations(value)[0]))
+
+
 class TestInitialisePackages(unittest.TestCase):
     def test_package(self):
         self.assertRaises(AttributeError,
@@ -332,7 +406,28 @@ class TestSourcePackageControlImport(DebianPackageTestCase):
         self.assertFalse(self.source_package._pb.build_depends)
         self.source_package._parse_control_line(
             'Build-Depends: gcc, python (= 2.7), golang (>= 1.9.9)\n')
-        # TODO:This test needs fleshing out.
+        self.assertEqual(['gcc', 'python', 'golang'],
+                         [relation.name for relation
+                          in self.source_package.build_depends[-3:]])
+
+    def test_parse_build_depends_alternatives(self):
+        self.source_package._pb.ClearField('build_depends')
+        self.source_package._parse_control_line(
+            'Build-Depends: gcc | clang, libc6-dev (>= 2.14) [amd64 i386]\n')
+        self.assertEqual(['gcc', 'libc6-dev'],
+                         [relation.name for relation
+                          in self.source_package.build_depends])
+        self.assertEqual(['clang'], [alternative.name for alternative in
+                                     self.source_package.build_depends[0]
+                                     .alternatives])
+        self.assertEqual('2.14', self.source_package.build_depends[1].version)
+        self.assertEqual(['amd64', 'i386'],
+                         self.source_package.build_depends[1].architectures)
+
+    def test_parse_build_depends_invalid(self):
+        self.assertRaises(ValueError,
+                          self.source_package._parse_control_line,
+                          'Build-Depends: foo ()\n')
 
     def test_parse_vcs_fields(self):
         self.source_package._parse_control_line(
@@ -391,11 +486,107 @@ class TestSourcePackageControlImport(DebianPackageTestCase):
             test_data.VALID_SOURCE_PACKAGE.build_depends[0].relationship,
             self.source_package.build_depends[0].relationship)
 
+    def test_import_control_file_binary_packages(self):
+        with codecs.open(os.path.join(os.path.dirname(__file__),
+                                      'test_files/control'),
+                         encoding='utf-8-sig') as control_file:
+            self.source_package.import_control_file(control_file)
+        self.assertEqual(1, len(self.source_package.binary_packages))
+        binary_package = self.source_package.binary_packages[0]
+        self.assertEqual('hello-debhelper', binary_package.name)
+        self.assertEqual('all', binary_package.architecture)
+        self.assertEqual(['${misc:Depends}', 'hello'],
+                         [depend.name for depend in binary_package.depends])
+        self.assertTrue(binary_package.description.startswith(
+            'transitional dummy package for hello\nhello-debhelper was'))
+        # Inherited fields are not copied into the binary package.
+        self.assertFalse(binary_package.HasField('section'))
+        self.assertFalse(binary_package.HasField('maintainer'))
+
+    def test_import_control_file_folded_fields(self):
+        self.source_package.import_control_file(io.StringIO(
+            'Source: hello\n'
+            'Uploaders: A Person <a@example.org>,\n'
+            ' Another Person <b@example.org>\n'
+            'Build-Depends: debhelper (>= 9),\n'
+            '               autotools-dev\n'
+            '\n'
+            '\n'
+            'Package: hello\n'
+            'Architecture: any\n'
+            '\n'
+            '# A comment.\n'
+            'Package: hello-doc\n'
+            'Architecture: all\n'
+            'Section: doc\n'))
+        self.assertEqual(['a@example.org', 'b@example.org'],
+                         [uploader.email for uploader
+                          in self.source_package.uploaders])
+        self.assertEqual(['debhelper', 'autotools-dev'],
+                         [depend.name for depend
+                          in self.source_package.build_depends])
+        self.assertEqual(['hello', 'hello-doc'],
+                         [binary_package.name for binary_package
+                          in self.source_package.binary_packages])
+
+    def test_resolve_binary_package(self):
+        self.source_package.import_control_file(io.StringIO(
+            'Source: hello\n'
+            'Section: devel\n'
+            'Maintainer: A Person <a@example.org>\n'
+            'Homepage: https://example.org/\n'
+            '\n'
+            'Package: hello\n'
+            'Architecture: any\n'
+            '\n'
+            'Package: hello-doc\n'
+            'Architecture: all\n'
+            'Section: doc\n'
+            'Priority: optional\n'))
+        hello, hello_doc = self.source_package.iter_binary_packages()
+        self.assertEqual('devel', hello.section)
+        self.assertFalse(hello.HasField('priority'))
+        self.assertEqual('a@example.org', hello.maintainer.email)
+        self.assertEqual('https://example.org/', hello.homepage)
+        self.assertEqual('doc', hello_doc.section)
+        self.assertEqual(debian_package_pb2.OPTIONAL, hello_doc.priority)
+        self.assertEqual('a@example.org', hello_doc.maintainer.email)
+        # Resolving doesn't change the stored binary packages.
+        self.assertFalse(
+            self.source_package.binary_packages[0].HasField('section'))
+
     def test_import_control_file_invalid_file(self):
         # TODO: Create this test
         pass
 
 
+class TestBinaryPackageControlImport(unittest.TestCase):
+    def test_import_control_paragraph(self):
+        package = debian_package.BinaryPackage()
+        package.import_control_paragraph([
+            ('Package', 'hello'), ('Version', '2.10-2'),
+            ('Architecture', 'amd64'), ('Priority', 'optional'),
+            ('Essential', 'no'),
+            ('Maintainer', 'Santiago Vila <sanvila@debian.org>'),
+            ('Pre-Depends', 'dpkg (>= 1.15)'),
+            ('Depends', 'libc6 (>= 2.14) | libc6.1'),
+            ('Provides', 'hello-world, greeter (= 1)'),
+            ('Description', 'example package\nbased on GNU hello.'),
+            ('Filename', 'pool/main/h/hello/hello_2.10-2_amd64.deb')])
+        self.assertEqual('hello', package.name)
+        self.assertEqual('2.10-2', package.version)
+        self.assertEqual('amd64', package.architecture)
+        self.assertEqual(debian_package_pb2.OPTIONAL, package.priority)
+        self.assertFalse(package.essential)
+        self.assertEqual('sanvila@debian.org', package.maintainer.email)
+        self.assertEqual('dpkg', package.pre_depends[0].name)
+        self.assertEqual('libc6.1', package.depends[0].alternatives[0].name)
+        self.assertEqual(['hello-world', 'greeter'], package._pb.provides)
+        self.assertEqual('example package\nbased on GNU hello.',
+                         package.description)
+        self.assertEqual('Filename', package.additional_fields[0].key)
+
+
 class TestSourcePackageChangelog(DebianPackageTestCase):
     def setUp(self):
         self.changelog_source_filename = os.path.join(
@@ -442,6 +633,67 @@ class TestSourcePackageChangelog(DebianPackageTestCase):
         self.assertEqual(test_data.SourcePackage.OUTPUT_CHANGELOG,
                          output_changelog)
 
+    def versions(self, package=None, **kwargs):
+        package = package or self.data_package
+        return [change.version for change in package.get_changes(**kwargs)]
+
+    def test_get_changes(self):
+        all_versions = ['0.0.3', '0.0.2', '0.0.1-0ubuntu1~ubuntu70.04~ppa1',
+                        '0.0.0']
+        self.assertEqual(all_versions, self.versions())
+        self.assertEqual(all_versions[:2], self.versions(limit=2))
+        self.assertEqual([], self.versions(limit=0))
+        self.assertEqual(all_versions[:3],
+                         self.versions(since_version='0.0.1'))
+        self.assertEqual(all_versions[:2],
+                         self.versions(since_version=all_versions[2]))
+        self.assertEqual(all_versions[2:],
+                         self.versions(until_version='0.0.2'))
+        self.assertEqual(['0.0.2'],
+                         self.versions(since_version='0.0.1-0ubuntu1',
+                                       until_version='0.0.3'))
+        self.assertEqual([], self.versions(since_version='0.0.2',
+                                           until_version='0.0.3'))
+        self.assertEqual(['0.0.3'], self.versions(limit=1,
+                                                  since_version='0.0.0'))
+        self.assertEqual([], self.versions(since_version='1:0'))
+
+    def test_get_changes_index_updated(self):
+        package_pb = debian_package_pb2.SourcePackage()
+        package_pb.CopyFrom(test_data.SourcePackage.SOURCE_PACKAGE)
+        package = debian_package.SourcePackage(package_pb)
+        self.assertEqual(['0.0.3'],
+                         self.versions(package, since_version='0.0.2'))
+        package.changelog.add(version='0.0.4', urgency=debian_package_pb2.LOW)
+        self.assertEqual(['0.0.4', '0.0.3'],
+                         self.versions(package, since_version='0.0.2'))
+
+    def test_get_changes_index_edited(self):
+        package_pb = debian_package_pb2.SourcePackage()
+        package_pb.CopyFrom(test_data.SourcePackage.SOURCE_PACKAGE)
+        package = debian_package.SourcePackage(package_pb)
+        self.assertEqual(['0.0.3'],
+                         self.versions(package, since_version='0.0.2'))
+        # Neither the length nor the first and last versions change.
+        package.changelog[1].version = '0.0.2.1'
+        package.reset_changelog_index()
+        self.assertEqual(['0.0.3', '0.0.2.1'],
+                         self.versions(package, since_version='0.0.2'))
+        package.changelog[2].version = '0.0.5'
+        package.reset_changelog_index()
+        self.assertEqual(['0.0.5'],
+                         self.versions(package, since_version='0.0.3'))
+
+    def test_generate_changelog_range(self):
+        output_changelog = list(self.data_package.generate_changelog(
+            since_version='0.0.0', until_version='0.0.3'))
+        self.assertEqual(
+            'package (0.0.2) stable testing unstable contrib; urgency=low '
+            '(HIGH if you were affected by some arbitrary bug or something)',
+            output_changelog[0])
+        self.assertEqual(2, sum(1 for line in output_changelog
+                                if line.startswith(' -- ')))
+
     def test_export_changelog_file(self):
         answer_filename = self.changelog_source_filename + '_fixed'
         with codecs.open(answer_filename, encoding='utf-8-sig') as f:
@@ -5,6 +5,9 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import errno
+import os
+
 
 def next_nonempty_line(file):
     """Returns the next non-empty line of a file.
@@ -22,6 +25,19 @@ def next_nonempty_line(file):
     return line
 
 
+def make_directory(directory):
+    """Creates a directory and its parents if they do not already exist.
+
+    Args:
+        directory: The path of the directory.
+    """
+    try:
+        os.makedirs(directory)
+    except OSError as error:
+        if error.errno != errno.EEXIST:
+            raise
+
+
 class File(object):
     def __init__(self, content=None, name=None, location=None):
 
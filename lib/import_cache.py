@@ -0,0 +1,146 @@
+﻿"""A cache in front of SourcePackage imports.
+
+Build jobs import the same debian/control and debian/changelog files over
+and over. An ImportCache recognises files it has already parsed by the hash
+of their contents and returns the earlier result instead of parsing again.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import errno
+import hashlib
+import io
+import os
+import tempfile
+
+from debalot.lib import cache
+from debalot.lib import debian_package
+from debalot.lib import debian_package_pb2 as pb
+from debalot.lib import file
+
+
+# The default in-memory cache holds up to 64 MiB of serialized packages.
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+
+
+class ImportCache(object):
+    """A cache of parsed control files and changelogs.
+
+    Files are looked up by the SHA-256 digest of their contents, and the
+    parsed results are kept as serialized SourcePackage protobufs. Importing
+    a file that has been seen before is then a hash and a ParseFromString
+    rather than a full parse. Results are kept in memory in a size-bounded
+    LRUCache and, if a directory is given, on disk as well so that they
+    survive between processes.
+
+    Args:
+        max_size: The maximum total size in bytes of the in-memory cache.
+        directory: An optional directory for the on-disk cache.
+    """
+    # Bump this when parsing changes, so stale results on disk are ignored.
+    FORMAT_VERSION = 3
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, directory=None):
+        self._memory = cache.LRUCache(max_size)
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            file.make_directory(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, '%s-%d-%s.pb' % (
+            key[0], self.FORMAT_VERSION, key[1]))
+
+    def _get(self, key):
+        data = self._memory.get(key)
+        if data is None and self.directory is not None:
+            try:
+                with open(self._path(key), 'rb') as cached:
+                    data = cached.read()
+            except IOError as error:
+                if error.errno != errno.ENOENT:
+                    raise
+            else:
+                self._memory.put(key, data)
+        return data
+
+    def _put(self, key, data):
+        self._memory.put(key, data)
+        if self.directory is None:
+            return
+        handle, temp_path = tempfile.mkstemp(prefix='.tmp-',
+                                             dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                output.write(data)
+            os.rename(temp_path, self._path(key))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _import(self, kind, input_file, importer, substvars_files=None):
+        text = input_file.read()
+        hashed = text
+        if substvars_files is not None:
+            # The result also depends on the variables, so they are part of
+            # the key too.
+            hashed += '\0' + '\n'.join(
+                '%s %s' % (name, substvars_files[name].digest)
+                for name in sorted(substvars_files))
+        key = (kind, hashlib.sha256(hashed.encode('utf-8')).hexdigest())
+        data = self._get(key)
+        if data is None:
+            self.misses += 1
+            parsed = debian_package.SourcePackage()
+            importer(parsed, io.StringIO(text))
+            data = parsed._pb.SerializePartialToString()
+            self._put(key, data)
+        else:
+            self.hits += 1
+        parsed = pb.SourcePackage()
+        parsed.MergeFromString(data)
+        return parsed
+
+    def import_control_file(self, package, control_file,
+                            substvars_files=None, errors=None):
+        """Imports a control file into a source package, using the cache.
+
+        Args:
+            package: A SourcePackage.
+            control_file: A readable unicode file object containing the
+                control file.
+            substvars_files: An optional dictionary mapping binary package
+                names to the Substvars with which to expand their relation
+                fields. Their digests are part of the cache key.
+            errors: An optional list, as for
+                SourcePackage.import_control_file. The errors can't be
+                recreated from a cached result, so a lenient import always
+                parses the file and isn't cached.
+        """
+        if errors is not None:
+            package.import_control_file(control_file, substvars_files,
+                                        errors)
+            return
+
+        def importer(parsed, input_file):
+            parsed.import_control_file(input_file, substvars_files)
+        package._pb.MergeFrom(self._import('control', control_file, importer,
+                                           substvars_files))
+
+    def import_changelog_file(self, package, changelog):
+        """Imports a changelog into a source package, using the cache.
+        Extends the current changelog.
+
+        Args:
+            package: A SourcePackage.
+            changelog: A readable unicode file object containing the
+                changelog.
+        """
+        package.changelog.extend(self._import(
+            'changelog', changelog,
+            debian_package.SourcePackage.import_changelog_file).changelog)
+        package.reset_changelog_index()
@@ -0,0 +1,117 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for import_cache module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import codecs
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from debalot.lib import debian_package
+from debalot.lib import import_cache
+from debalot.lib import substvars
+
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), 'test_files')
+
+
+def _read(filename):
+    with codecs.open(os.path.join(TEST_FILES, filename),
+                     encoding='utf-8-sig') as input_file:
+        return input_file.read()
+
+
+class TestImportCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='debalot_test_')
+        self.control = _read('control')
+        self.changelog = _read('test_changelog')
+        self.expected = debian_package.SourcePackage()
+        self.expected.import_control_file(io.StringIO(self.control))
+        self.expected.import_changelog_file(io.StringIO(self.changelog))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def import_package(self, cache):
+        package = debian_package.SourcePackage()
+        cache.import_control_file(package, io.StringIO(self.control))
+        cache.import_changelog_file(package, io.StringIO(self.changelog))
+        return package
+
+    def test_miss_then_hit(self):
+        cache = import_cache.ImportCache()
+        first = self.import_package(cache)
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
+        second = self.import_package(cache)
+        self.assertEqual((2, 2), (cache.hits, cache.misses))
+        self.assertEqual(self.expected._pb, first._pb)
+        self.assertEqual(self.expected._pb, second._pb)
+
+    def test_changed_contents_miss(self):
+        cache = import_cache.ImportCache()
+        self.import_package(cache)
+        self.control = self.control.replace('oldlibs', 'libs')
+        package = self.import_package(cache)
+        self.assertEqual((1, 3), (cache.hits, cache.misses))
+        self.assertEqual('libs', package.section)
+
+    def test_changelog_extends(self):
+        cache = import_cache.ImportCache()
+        package = self.import_package(cache)
+        cache.import_changelog_file(package, io.StringIO(self.changelog))
+        self.assertEqual(8, len(package.changelog))
+
+    def test_substvars(self):
+        cache = import_cache.ImportCache()
+        depends = []
+        for value in ('debconf', 'debconf', 'cdebconf', None):
+            package = debian_package.SourcePackage()
+            substvars_files = None
+            if value is not None:
+                substvars_files = {'hello-debhelper': substvars.Substvars(
+                    {'misc:Depends': value})}
+            cache.import_control_file(package, io.StringIO(self.control),
+                                      substvars_files)
+            depends.append(package.binary_packages[0].depends[0].name)
+        self.assertEqual(['debconf', 'debconf', 'cdebconf', '${misc:Depends}'],
+                         depends)
+        self.assertEqual((1, 3), (cache.hits, cache.misses))
+
+    def test_errors_bypass_cache(self):
+        cache = import_cache.ImportCache()
+        errors = []
+        package = debian_package.SourcePackage()
+        cache.import_control_file(
+            package, io.StringIO('Source: foo\nno colon here\n'),
+            errors=errors)
+        self.assertEqual('foo', package.name)
+        self.assertEqual(1, len(errors))
+        self.assertEqual((0, 0), (cache.hits, cache.misses))
+
+    def test_disk_tier(self):
+        self.import_package(import_cache.ImportCache(
+            directory=self.directory))
+        self.assertEqual(2, len(os.listdir(self.directory)))
+        cache = import_cache.ImportCache(directory=self.directory)
+        package = self.import_package(cache)
+        self.assertEqual((2, 0), (cache.hits, cache.misses))
+        self.assertEqual(self.expected._pb, package._pb)
+
+    def test_memory_limit(self):
+        cache = import_cache.ImportCache(max_size=1)
+        self.import_package(cache)
+        self.import_package(cache)
+        self.assertEqual((0, 4), (cache.hits, cache.misses))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+﻿"""Opt-in timing and counting of parsing hot paths.
+
+Instrumentation is off by default and costs nothing while off: enable()
+replaces the instrumented functions with timing wrappers, and disable() puts
+the originals back.
+
+Example use:
+    instrumentation.enable()
+    package.import_changelog_file(changelog)
+    instrumentation.report(send_to_metrics)
+    instrumentation.disable()
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import functools
+import threading
+import timeit
+
+
+_lock = threading.Lock()
+# Maps each statistic name to a list of [count, total, minimum, maximum].
+_stats = {}
+# A list of (owner, attribute, original) tuples for each patched function.
+_patches = []
+_callback = None
+
+
+def _control_field_name(name, args):
+    """Name the statistic for _parse_control_line after the field parsed."""
+    return '%s[%s]' % (name, args[1].split(':', 1)[0])
+
+
+def _targets():
+    """Get the functions to instrument.
+
+    Returns:
+        A list of (owner, attribute, namer) tuples. owner is the class or
+        module holding the function and namer, if not None, is a function
+        that takes the default statistic name and the call's positional
+        arguments and returns the name under which to record the call.
+    """
+    from debalot.lib import debian_package
+    from debalot.lib import person
+    return [
+        (debian_package.SourcePackage, '_parse_control_line',
+         _control_field_name),
+        (debian_package.SourcePackage, 'import_control_file', None),
+        (debian_package.SourcePackage, 'import_changelog_file', None),
+        (debian_package.Changelog, 'get_urgency_from_string', None),
+        (debian_package.Changelog, 'parse_time_string', None),
+        (debian_package.Relation, 'parse_relationship', None),
+        (person, 'parse_person', None),
+    ]
+
+
+def record(name, elapsed):
+    """Record a single timed call.
+
+    Args:
+        name: The name of the statistic.
+        elapsed: The time taken by the call, in seconds.
+    """
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            _stats[name] = [1, elapsed, elapsed, elapsed]
+            return
+        stat[0] += 1
+        stat[1] += elapsed
+        if elapsed < stat[2]:
+            stat[2] = elapsed
+        if elapsed > stat[3]:
+            stat[3] = elapsed
+
+
+def _timed(function, name, namer):
+    timer = timeit.default_timer
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = timer()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record(namer(name, args) if namer else name, timer() - start)
+    return wrapper
+
+
+def _wrap(owner, attribute, namer):
+    original = owner.__dict__[attribute]
+    name = '%s.%s' % (owner.__name__.rsplit('.', 1)[-1], attribute)
+    if isinstance(original, classmethod):
+        wrapped = classmethod(_timed(original.__func__, name, namer))
+    elif isinstance(original, staticmethod):
+        wrapped = staticmethod(_timed(original.__func__, name, namer))
+    else:
+        wrapped = _timed(original, name, namer)
+    setattr(owner, attribute, wrapped)
+    _patches.append((owner, attribute, original))
+
+
+def enable(callback=None):
+    """Start instrumenting hot paths.
+
+    Args:
+        callback: A function to which report() passes statistics by default.
+    """
+    global _callback
+    _callback = callback
+    if _patches:
+        return
+    for owner, attribute, namer in _targets():
+        _wrap(owner, attribute, namer)
+
+
+def disable():
+    """Stop instrumenting hot paths. Collected statistics are kept."""
+    while _patches:
+        owner, attribute, original = _patches.pop()
+        setattr(owner, attribute, original)
+
+
+def is_enabled():
+    """Returns True if instrumentation is enabled."""
+    return bool(_patches)
+
+
+def _snapshot(reset_stats):
+    with _lock:
+        stats = {name: {'count': count,
+                        'total_time': total,
+                        'min_time': minimum,
+                        'max_time': maximum}
+                 for name, (count, total, minimum, maximum)
+                 in _stats.items()}
+        if reset_stats:
+            _stats.clear()
+    return stats
+
+
+def get_stats():
+    """Get the statistics collected so far.
+
+    Returns:
+        A dictionary mapping each statistic name to a dictionary with the
+        keys count, total_time, min_time and max_time. Times are in seconds.
+    """
+    return _snapshot(reset_stats=False)
+
+
+def reset():
+    """Discard the statistics collected so far."""
+    with _lock:
+        _stats.clear()
+
+
+def report(callback=None, reset_stats=True):
+    """Pass the statistics collected so far to a callback.
+
+    Args:
+        callback: A function taking the output of get_stats. Defaults to the
+            callback given to enable.
+        reset_stats: Whether to discard the statistics once reported, so
+            that each report covers only the calls since the previous one.
+    Returns:
+        The reported statistics.
+    """
+    stats = _snapshot(reset_stats)
+    callback = callback or _callback
+    if callback is not None:
+        callback(stats)
+    return stats
@@ -0,0 +1,101 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for instrumentation module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import codecs
+import os
+import unittest
+
+from debalot.lib import debian_package
+from debalot.lib import instrumentation
+from debalot.lib import person
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        instrumentation.reset()
+        self.originals = (
+            debian_package.SourcePackage.__dict__['_parse_control_line'],
+            debian_package.Changelog.__dict__['get_urgency_from_string'],
+            person.parse_person)
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(instrumentation.is_enabled())
+        debian_package.Changelog.get_urgency_from_string('low')
+        self.assertEqual({}, instrumentation.get_stats())
+
+    def test_disable_restores_originals(self):
+        instrumentation.enable()
+        self.assertTrue(instrumentation.is_enabled())
+        self.assertIsNot(person.parse_person, self.originals[2])
+        instrumentation.disable()
+        self.assertFalse(instrumentation.is_enabled())
+        self.assertEqual(self.originals, (
+            debian_package.SourcePackage.__dict__['_parse_control_line'],
+            debian_package.Changelog.__dict__['get_urgency_from_string'],
+            person.parse_person))
+
+    def test_control_fields(self):
+        instrumentation.enable()
+        package = debian_package.SourcePackage()
+        package._parse_control_line('Source: hello\n')
+        package._parse_control_line('Maintainer: A Person <a@example.org>\n')
+        package._parse_control_line('Build-Depends: a (>= 1), b (<< 2)\n')
+        stats = instrumentation.get_stats()
+        self.assertEqual(
+            1, stats['SourcePackage._parse_control_line[Source]']['count'])
+        self.assertEqual(
+            1, stats['SourcePackage._parse_control_line[Build-Depends]'][
+                'count'])
+        self.assertEqual(1, stats['person.parse_person']['count'])
+        self.assertEqual(2, stats['Relation.parse_relationship']['count'])
+        self.assertEqual('hello', package.name)
+
+    def test_changelog(self):
+        instrumentation.enable()
+        package = debian_package.SourcePackage()
+        with codecs.open(os.path.join(os.path.dirname(__file__),
+                                      'test_files/test_changelog'),
+                         encoding='utf-8-sig') as changelog:
+            package.import_changelog_file(changelog)
+        stats = instrumentation.get_stats()
+        self.assertEqual(4, len(package.changelog))
+        self.assertEqual(
+            1, stats['SourcePackage.import_changelog_file']['count'])
+        self.assertEqual(
+            4, stats['Changelog.get_urgency_from_string']['count'])
+        self.assertEqual(4, stats['Changelog.parse_time_string']['count'])
+        for stat in stats.values():
+            self.assertLessEqual(stat['min_time'], stat['max_time'])
+            self.assertLessEqual(stat['max_time'], stat['total_time'])
+
+    def test_report(self):
+        reports = []
+        instrumentation.enable(callback=reports.append)
+        debian_package.Changelog.get_urgency_from_string('low')
+        stats = instrumentation.report()
+        self.assertEqual([stats], reports)
+        self.assertEqual(
+            1, stats['Changelog.get_urgency_from_string']['count'])
+        self.assertEqual({}, instrumentation.get_stats())
+
+    def test_stats_kept_after_disable(self):
+        instrumentation.enable()
+        debian_package.Changelog.get_urgency_from_string('low')
+        instrumentation.disable()
+        self.assertIn('Changelog.get_urgency_from_string',
+                      instrumentation.get_stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,279 @@
+﻿"""A merged view of the package indexes of several architectures.
+
+The Packages files of different architectures mostly describe the same
+packages: architecture all packages appear in every one of them, and most
+other packages differ only in their architecture, file name, size and
+checksums. A MultiArchIndex stores the shared fields once per (name,
+version) and keeps what differs per architecture in columns, one per
+architecture, indexed by package name:
+    records:   the id of the shared record of the name's version on that
+               architecture, or -1 if the architecture doesn't have it.
+    extras:    the architecture specific fields, such as Filename and Size.
+Questions about versions across architectures only look at the columns and
+the shared records, without building a BinaryPackage for each architecture.
+
+Example use:
+    index = MultiArchIndex()
+    for architecture in ('amd64', 'arm64', 'armhf', 'i386'):
+        index.add_index(architecture, PackageIndex.load(architecture))
+    index.find_lagging('hello', reference='amd64')
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import array
+
+from debalot.lib import debian_package_pb2 as pb
+from debalot.lib import package_index
+from debalot.lib import version
+
+
+# Fields which differ between architectures even when the package doesn't.
+ARCHITECTURE_FIELDS = frozenset([
+    'Filename', 'Size', 'Installed-Size', 'MD5sum', 'SHA1', 'SHA256',
+    'SHA512'])
+
+_MISSING = -1
+
+
+class MultiArchIndex(object):
+    """Binary packages of several architectures, sharing common fields."""
+
+    def __init__(self):
+        self.architectures = []
+        self._architecture_ids = {}
+        self._names = []
+        self._name_ids = {}
+        # Shared BinaryPackage protobufs, without architecture specific
+        # fields. The architecture is only kept if it is 'all'.
+        self._records = []
+        # (name, version) -> ids of the records with that name and version.
+        # There is more than one if, e.g., dependencies differ by
+        # architecture.
+        self._variants = {}
+        # Per architecture columns, indexed by name id.
+        self._record_columns = []
+        self._extra_columns = []
+
+    def __len__(self):
+        """Get the number of package names."""
+        return len(self._names)
+
+    @property
+    def record_count(self):
+        """The number of shared records stored."""
+        return len(self._records)
+
+    def _architecture_id(self, architecture):
+        architecture_id = self._architecture_ids.get(architecture)
+        if architecture_id is None:
+            architecture_id = len(self.architectures)
+            self.architectures.append(architecture)
+            self._architecture_ids[architecture] = architecture_id
+            self._record_columns.append(
+                array.array(str('l'), [_MISSING]) * len(self._names))
+            self._extra_columns.append([None] * len(self._names))
+        return architecture_id
+
+    def _name_id(self, name):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = len(self._names)
+            self._names.append(name)
+            self._name_ids[name] = name_id
+            for column in self._record_columns:
+                column.append(_MISSING)
+            for column in self._extra_columns:
+                column.append(None)
+        return name_id
+
+    def _record_id(self, record):
+        variants = self._variants.setdefault((record.name, record.version),
+                                             [])
+        for record_id in variants:
+            if self._records[record_id] == record:
+                return record_id
+        record_id = len(self._records)
+        self._records.append(record)
+        variants.append(record_id)
+        return record_id
+
+    def add_package(self, architecture, package):
+        """Add a package from an architecture's index.
+
+        If the architecture already has a version of the package, only the
+        later version is kept.
+
+        Args:
+            architecture: The architecture of the index, e.g. 'amd64'.
+            package: A BinaryPackage protobuf.
+        """
+        architecture_id = self._architecture_id(architecture)
+        name_id = self._name_id(package.name)
+        column = self._record_columns[architecture_id]
+        if column[name_id] != _MISSING and version.compare_versions(
+                package.version,
+                self._records[column[name_id]].version) <= 0:
+            return
+        record = pb.BinaryPackage()
+        record.CopyFrom(package)
+        if record.architecture == architecture != 'all':
+            record.ClearField('architecture')
+        extras = []
+        shared_fields = []
+        for field in record.additional_fields:
+            if field.key in ARCHITECTURE_FIELDS:
+                extras.append((field.key, field.value))
+            else:
+                shared_fields.append(field)
+        if extras:
+            del record.additional_fields[:]
+            record.additional_fields.extend(shared_fields)
+        column[name_id] = self._record_id(record)
+        self._extra_columns[architecture_id][name_id] = tuple(extras) or None
+
+    def add_index(self, architecture, index):
+        """Add the packages of an architecture's index.
+
+        Args:
+            architecture: The architecture of the index, e.g. 'amd64'.
+            index: A PackageIndex, or any iterable of BinaryPackage protobufs.
+        """
+        for package in index:
+            self.add_package(architecture, package)
+
+    def import_packages_file(self, architecture, packages_file):
+        """Add the packages in an architecture's Packages file.
+
+        Args:
+            architecture: The architecture of the index, e.g. 'amd64'.
+            packages_file: A readable unicode file object.
+        """
+        self.add_index(architecture,
+                       package_index.read_packages_file(packages_file))
+
+    def _record(self, name, architecture):
+        name_id = self._name_ids.get(name)
+        architecture_id = self._architecture_ids.get(architecture)
+        if name_id is None or architecture_id is None:
+            return None
+        record_id = self._record_columns[architecture_id][name_id]
+        if record_id == _MISSING:
+            return None
+        return self._records[record_id]
+
+    def get_version(self, name, architecture):
+        """Get the version of a package on an architecture.
+
+        Returns:
+            The version string, or None if the architecture doesn't have the
+            package.
+        """
+        record = self._record(name, architecture)
+        return None if record is None else record.version
+
+    def get_versions(self, name):
+        """Get the versions of a package on each architecture.
+
+        Returns:
+            A dictionary mapping each architecture that has the package to its
+            version string.
+        """
+        versions = {}
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            return versions
+        for architecture, column in zip(self.architectures,
+                                        self._record_columns):
+            if column[name_id] != _MISSING:
+                versions[architecture] = self._records[column[name_id]].version
+        return versions
+
+    def get(self, name, architecture):
+        """Build the full BinaryPackage of a package on an architecture.
+
+        Returns:
+            A new BinaryPackage protobuf, or None if the architecture doesn't
+            have the package.
+        """
+        record = self._record(name, architecture)
+        if record is None:
+            return None
+        package = pb.BinaryPackage()
+        package.CopyFrom(record)
+        if not package.HasField('architecture'):
+            package.architecture = architecture
+        extras = self._extra_columns[self._architecture_ids[architecture]][
+            self._name_ids[name]]
+        for key, value in extras or ():
+            field = package.additional_fields.add()
+            field.key = key
+            field.value = value
+        return package
+
+    def _lagging(self, name_id, reference_id):
+        reference_record_id = self._record_columns[reference_id][name_id]
+        reference_record = self._records[reference_record_id]
+        reference_version = reference_record.version
+        # The 'all' index only has architecture independent packages.
+        skipped = set([reference_id])
+        if reference_record.architecture != 'all':
+            skipped.add(self._architecture_ids.get('all'))
+        lagging = []
+        for architecture_id, column in enumerate(self._record_columns):
+            record_id = column[name_id]
+            if architecture_id in skipped or record_id == reference_record_id:
+                continue
+            if record_id == _MISSING:
+                lagging.append((self.architectures[architecture_id], None))
+                continue
+            record_version = self._records[record_id].version
+            if version.compare_versions(record_version,
+                                        reference_version) < 0:
+                lagging.append((self.architectures[architecture_id],
+                                record_version))
+        return reference_version, lagging
+
+    def find_lagging(self, name, reference='amd64'):
+        """Find the architectures whose version of a package is behind.
+
+        Args:
+            name: The name of the binary package.
+            reference: The architecture to compare against.
+        Returns:
+            A list of (architecture, version) tuples for the architectures
+            where the package is older than on the reference architecture,
+            or missing, in which case the version is None.
+        Raises:
+            KeyError: The reference architecture doesn't have the package.
+        """
+        if self._record(name, reference) is None:
+            raise KeyError(name, reference)
+        return self._lagging(self._name_ids[name],
+                             self._architecture_ids[reference])[1]
+
+    def iter_lagging(self, reference='amd64'):
+        """Find every package that some architecture is behind on.
+
+        Args:
+            reference: The architecture to compare against.
+        Yields:
+            A tuple of (name, reference version, lagging) for each package
+            on the reference architecture that is older or missing on another
+            architecture, sorted by name. lagging is as returned by
+            find_lagging.
+        """
+        reference_id = self._architecture_ids.get(reference)
+        if reference_id is None:
+            return
+        reference_column = self._record_columns[reference_id]
+        for name in sorted(self._name_ids):
+            name_id = self._name_ids[name]
+            if reference_column[name_id] == _MISSING:
+                continue
+            reference_version, lagging = self._lagging(name_id, reference_id)
+            if lagging:
+                yield name, reference_version, lagging
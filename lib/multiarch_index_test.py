@@ -0,0 +1,105 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for multiarch_index module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import unittest
+
+from debalot.lib import multiarch_index
+
+
+def packages(architecture, hello_version, depends='libc6'):
+    return io.StringIO(
+        'Package: hello\n'
+        'Version: %(version)s\n'
+        'Architecture: %(architecture)s\n'
+        'Depends: %(depends)s\n'
+        'Filename: pool/main/h/hello/hello_%(version)s_%(architecture)s.deb\n'
+        'Size: %(size)d\n'
+        'Description: example package\n'
+        '\n'
+        'Package: hello-doc\n'
+        'Version: 2.10-2\n'
+        'Architecture: all\n'
+        'Filename: pool/main/h/hello/hello-doc_2.10-2_all.deb\n'
+        '\n'
+        'Package: libc6\n'
+        'Version: 2.31-13\n'
+        'Architecture: %(architecture)s\n' % {
+            'version': hello_version, 'architecture': architecture,
+            'depends': depends, 'size': len(architecture)})
+
+
+class TestMultiArchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = multiarch_index.MultiArchIndex()
+        self.index.import_packages_file('amd64', packages('amd64', '2.10-3'))
+        self.index.import_packages_file('arm64', packages('arm64', '2.10-3'))
+        self.index.import_packages_file('armhf', packages('armhf', '2.10-2'))
+        self.index.import_packages_file(
+            'i386', packages('i386', '2.10-3', depends='libc6 (>= 2.31)'))
+        self.index.import_packages_file('all', io.StringIO(
+            'Package: hello-doc\nVersion: 2.10-2\nArchitecture: all\n'))
+
+    def test_shared_records(self):
+        self.assertEqual(3, len(self.index))
+        # hello 2.10-3 is shared by amd64 and arm64, but i386 has different
+        # dependencies. hello-doc and libc6 are each shared by all.
+        self.assertEqual(5, self.index.record_count)
+
+    def test_get_versions(self):
+        self.assertEqual({'amd64': '2.10-3', 'arm64': '2.10-3',
+                          'armhf': '2.10-2', 'i386': '2.10-3'},
+                         self.index.get_versions('hello'))
+        self.assertEqual({}, self.index.get_versions('missing'))
+        self.assertEqual('2.10-2', self.index.get_version('hello-doc', 'all'))
+        self.assertIsNone(self.index.get_version('hello', 'all'))
+
+    def test_get(self):
+        package = self.index.get('hello', 'arm64')
+        self.assertEqual('arm64', package.architecture)
+        self.assertEqual('2.10-3', package.version)
+        self.assertEqual('libc6', package.depends[0].name)
+        fields = dict((field.key, field.value)
+                      for field in package.additional_fields)
+        self.assertEqual('pool/main/h/hello/hello_2.10-3_arm64.deb',
+                         fields['Filename'])
+        self.assertEqual('5', fields['Size'])
+        self.assertEqual('all',
+                         self.index.get('hello-doc', 'i386').architecture)
+        self.assertIsNone(self.index.get('hello', 'all'))
+
+    def test_keeps_latest_version(self):
+        self.index.import_packages_file('armhf', packages('armhf', '2.10-1'))
+        self.assertEqual('2.10-2', self.index.get_version('hello', 'armhf'))
+        self.index.import_packages_file('armhf', packages('armhf', '2.10-4'))
+        self.assertEqual('2.10-4', self.index.get_version('hello', 'armhf'))
+
+    def test_find_lagging(self):
+        self.assertEqual([('armhf', '2.10-2')],
+                         self.index.find_lagging('hello'))
+        self.assertEqual([], self.index.find_lagging('hello-doc'))
+        self.assertEqual([],
+                         self.index.find_lagging('hello', reference='armhf'))
+        self.assertRaises(KeyError, self.index.find_lagging, 'hello', 'all')
+
+    def test_find_lagging_missing(self):
+        self.index.import_packages_file('riscv64', io.StringIO(
+            'Package: libc6\nVersion: 2.31-13\nArchitecture: riscv64\n'))
+        self.assertEqual([('armhf', '2.10-2'), ('riscv64', None)],
+                         self.index.find_lagging('hello'))
+
+    def test_iter_lagging(self):
+        self.assertEqual([('hello', '2.10-3', [('armhf', '2.10-2')])],
+                         list(self.index.iter_lagging()))
+        self.assertEqual([], list(self.index.iter_lagging('mips')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,308 @@
+﻿"""An in-memory index of the binary packages in a suite.
+
+A PackageIndex is built from Packages files and answers the questions that
+dependency checks ask: which versions of a package exist, which packages
+provide a virtual package and which packages satisfy a relation. It can be
+saved as a record file of BinaryPackage protobufs, which loads much faster
+than parsing the Packages files again.
+
+Example use:
+    index = PackageIndex()
+    with package_index.open_packages_file('Packages.xz') as packages:
+        index.import_packages_file(packages)
+    index.save('amd64.index')
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import bz2
+import codecs
+import collections
+import gzip
+import io
+import itertools
+import os
+import tempfile
+
+try:
+    import lzma
+except ImportError:  # Python 2
+    lzma = None
+
+from debalot.lib import deb822
+from debalot.lib import debian_package
+from debalot.lib import debian_package_pb2 as pb
+from debalot.lib import record_file
+from debalot.lib import version
+
+
+def open_packages_file(path):
+    """Open a Packages file, decompressing it according to its extension.
+
+    Args:
+        path: The path of a Packages, Packages.gz, Packages.bz2 or
+            Packages.xz file.
+    Returns:
+        A readable unicode file object.
+    Raises:
+        ValueError: The file is xz compressed and lzma is not available.
+    """
+    if path.endswith('.gz'):
+        binary_file = gzip.open(path, 'rb')
+    elif path.endswith('.bz2'):
+        binary_file = bz2.BZ2File(path, 'rb')
+    elif path.endswith('.xz'):
+        if lzma is None:
+            raise ValueError('Reading xz files requires the lzma module.')
+        binary_file = lzma.open(path, 'rb')
+    else:
+        binary_file = io.open(path, 'rb')
+    return codecs.getreader('utf-8')(binary_file)
+
+
+def read_packages_file(packages_file):
+    """Read the binary packages in a Packages file.
+
+    Args:
+        packages_file: A readable unicode file object.
+    Yields:
+        A BinaryPackage protobuf for each paragraph.
+    """
+    for paragraph in deb822.iter_paragraphs(packages_file):
+        package = debian_package.BinaryPackage()
+        package.import_control_paragraph(paragraph)
+        yield package._pb
+
+
+def _latest(packages):
+    return max(packages, key=lambda package: version.sort_key(package.version))
+
+
+class PackageIndex(object):
+    """The binary packages of a suite, indexed by name and by what they
+    provide."""
+
+    def __init__(self):
+        self._packages = collections.defaultdict(list)
+        self._providers = collections.defaultdict(list)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        """Iterate over the packages, sorted by name."""
+        for name in sorted(self._packages):
+            for package in self._packages[name]:
+                yield package
+
+    def add(self, package):
+        """Add a package to the index.
+
+        Args:
+            package: A BinaryPackage protobuf.
+        """
+        self._packages[package.name].append(package)
+        for name in package.provides:
+            self._providers[name].append(package)
+        self._count += 1
+
+    def import_packages_file(self, packages_file):
+        """Add the packages in a Packages file to the index.
+
+        Args:
+            packages_file: A readable unicode file object.
+        Returns:
+            The number of packages added.
+        """
+        count = 0
+        for package in read_packages_file(packages_file):
+            self.add(package)
+            count += 1
+        return count
+
+    @staticmethod
+    def _select(packages, architecture):
+        if architecture is None:
+            return list(packages)
+        return [package for package in packages
+                if package.architecture in (architecture, 'all')]
+
+    def get(self, name, architecture=None):
+        """Get the packages with a name.
+
+        Args:
+            name: The name of the binary package.
+            architecture: If given, only packages for this architecture or
+                for all architectures are returned.
+        Returns:
+            A list of BinaryPackage protobufs, one per version and
+            architecture in the index.
+        """
+        return self._select(self._packages.get(name, ()), architecture)
+
+    def get_providers(self, name, architecture=None):
+        """Get the packages which provide a (usually virtual) package.
+
+        Args:
+            name: The name of the provided package.
+            architecture: If given, only packages for this architecture or
+                for all architectures are returned.
+        Returns:
+            A list of BinaryPackage protobufs.
+        """
+        return self._select(self._providers.get(name, ()), architecture)
+
+    def get_candidates(self, relation, architecture=None):
+        """Get the packages which satisfy a relation, ignoring any
+        alternatives.
+
+        An architecture qualifier such as ':any' on the relation's name is
+        ignored. Providing a package only satisfies unversioned relations.
+
+        Args:
+            relation: A Relation protobuf.
+            architecture: If given, only packages for this architecture or
+                for all architectures are considered.
+        Returns:
+            A list of BinaryPackage protobufs.
+        """
+        name = relation.name.split(':', 1)[0]
+        candidates = self.get(name, architecture)
+        if relation.HasField('relationship'):
+            return [package for package in candidates
+                    if version.satisfies(package.version,
+                                         relation.relationship,
+                                         relation.version)]
+        return candidates + self.get_providers(name, architecture)
+
+    def find_satisfying(self, relation, architecture=None):
+        """Get the packages which satisfy a relation or its alternatives.
+
+        Args:
+            relation: A Relation protobuf.
+            architecture: If given, only packages for this architecture or
+                for all architectures are considered.
+        Returns:
+            A list of BinaryPackage protobufs.
+        """
+        candidates = []
+        for alternative in [relation] + list(relation.alternatives):
+            candidates.extend(self.get_candidates(alternative, architecture))
+        return candidates
+
+    def find_unsatisfiable(self, name, architecture=None):
+        """Find the dependencies that stop a package from being installed.
+
+        Pre-Depends and Depends are followed transitively from the latest
+        version of the package. Each relation is resolved to the latest
+        version of its first satisfiable alternative. Other choices are not
+        tried when that leads to a broken dependency, and conflicts are not
+        considered, so this is a quick approximation of a full installability
+        check rather than a complete solver.
+
+        Args:
+            name: The name of the binary package.
+            architecture: If given, only packages for this architecture or
+                for all architectures are considered.
+        Returns:
+            A list of (package name, package version, relation string) tuples
+            for each relation that nothing in the index satisfies. It is
+            empty if the package appears installable.
+        Raises:
+            KeyError: The package is not in the index.
+        """
+        packages = self.get(name, architecture)
+        if not packages:
+            raise KeyError(name)
+        unsatisfiable = []
+        seen = set()
+        pending = [_latest(packages)]
+        while pending:
+            package = pending.pop()
+            key = (package.name, package.version, package.architecture)
+            if key in seen:
+                continue
+            seen.add(key)
+            for relation in itertools.chain(package.pre_depends,
+                                            package.depends):
+                for alternative in [relation] + list(relation.alternatives):
+                    candidates = self.get_candidates(alternative,
+                                                     architecture)
+                    if candidates:
+                        pending.append(_latest(candidates))
+                        break
+                else:
+                    unsatisfiable.append((
+                        package.name, package.version,
+                        debian_package.Relation.get_relation_string(
+                            relation)))
+        return unsatisfiable
+
+    def save(self, path):
+        """Write the index to a record file, replacing it atomically.
+
+        Args:
+            path: The path of the index file.
+        """
+        handle, temp_path = tempfile.mkstemp(
+            prefix='.tmp-', dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                writer = record_file.RecordWriter(output)
+                for package in self:
+                    writer.write(package)
+            os.rename(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save.
+
+        Args:
+            path: The path of the index file.
+        Returns:
+            A PackageIndex.
+        """
+        index = cls()
+        with open(path, 'rb') as input_file:
+            for package in record_file.read_messages(input_file,
+                                                     pb.BinaryPackage):
+                index.add(package)
+        return index
+
+
+def _latest_versions(index):
+    latest = {}
+    for package in index:
+        key = (package.name, package.architecture)
+        if (key not in latest or
+                version.compare_versions(package.version, latest[key]) > 0):
+            latest[key] = package.version
+    return latest
+
+
+def diff_indexes(old, new):
+    """Compare the latest package versions in two indexes.
+
+    Args:
+        old: A PackageIndex.
+        new: A PackageIndex.
+    Yields:
+        A tuple of (name, architecture, old version, new version) for each
+        package whose latest version differs, sorted by name and
+        architecture. The old version is None for added packages and the new
+        version is None for removed packages.
+    """
+    old_versions = _latest_versions(old)
+    new_versions = _latest_versions(new)
+    for key in sorted(set(old_versions) | set(new_versions)):
+        old_version = old_versions.get(key)
+        new_version = new_versions.get(key)
+        if old_version != new_version:
+            yield key + (old_version, new_version)
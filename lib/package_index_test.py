@@ -0,0 +1,166 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for package_index module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from debalot.lib import debian_package
+from debalot.lib import package_index
+
+
+PACKAGES = '''Package: hello
+Version: 2.10-2
+Architecture: amd64
+Priority: optional
+Depends: libc6 (>= 2.14)
+Description: example package
+ based on GNU hello.
+
+Package: hello
+Version: 2.10-1
+Architecture: amd64
+
+Package: libc6
+Version: 2.31-13
+Architecture: amd64
+Essential: yes
+
+Package: postfix
+Version: 3.5.6-1
+Architecture: amd64
+Provides: mail-transport-agent
+Depends: libc6 (>= 2.34) | libc6-compat, hello
+
+Package: hello-doc
+Version: 2.10-2
+Architecture: all
+Depends: hello (= 2.10-2)
+'''
+
+
+def relation(value):
+    return debian_package.Relation.parse_relations(value)[0]
+
+
+class TestReadPackagesFile(unittest.TestCase):
+    def test_read(self):
+        packages = list(package_index.read_packages_file(
+            io.StringIO(PACKAGES)))
+        self.assertEqual(5, len(packages))
+        hello = packages[0]
+        self.assertEqual('hello', hello.name)
+        self.assertEqual('2.10-2', hello.version)
+        self.assertEqual('amd64', hello.architecture)
+        self.assertEqual('example package\nbased on GNU hello.',
+                         hello.description)
+        self.assertEqual(['libc6'],
+                         [depend.name for depend in hello.depends])
+        self.assertTrue(packages[2].essential)
+        self.assertEqual(['mail-transport-agent'], packages[3].provides)
+
+
+class TestPackageIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = package_index.PackageIndex()
+        self.assertEqual(5, self.index.import_packages_file(
+            io.StringIO(PACKAGES)))
+
+    def test_get(self):
+        self.assertEqual(2, len(self.index.get('hello')))
+        self.assertEqual(0, len(self.index.get('hello', 'i386')))
+        self.assertEqual(1, len(self.index.get('hello-doc', 'i386')))
+        self.assertEqual([], self.index.get('missing'))
+
+    def test_get_candidates(self):
+        self.assertEqual(
+            ['2.10-2'],
+            [package.version for package in self.index.get_candidates(
+                relation('hello (>> 2.10-1)'))])
+        self.assertEqual(
+            ['postfix'],
+            [package.name for package in self.index.get_candidates(
+                relation('mail-transport-agent'))])
+        self.assertEqual([], self.index.get_candidates(
+            relation('mail-transport-agent (>= 1)')))
+        self.assertEqual(1, len(self.index.get_candidates(
+            relation('libc6:any'))))
+
+    def test_find_satisfying(self):
+        self.assertEqual([], self.index.find_satisfying(
+            relation('missing | libc6 (>= 3)')))
+        self.assertEqual(1, len(self.index.find_satisfying(
+            relation('missing | libc6 (>= 2)'))))
+
+    def test_find_unsatisfiable(self):
+        self.assertEqual([], self.index.find_unsatisfiable('hello'))
+        self.assertEqual([], self.index.find_unsatisfiable('hello-doc'))
+        self.assertEqual(
+            [('postfix', '3.5.6-1', 'libc6 (>= 2.34) | libc6-compat')],
+            self.index.find_unsatisfiable('postfix'))
+        self.assertRaises(KeyError, self.index.find_unsatisfiable, 'missing')
+
+    def test_find_unsatisfiable_transitive(self):
+        package = debian_package.BinaryPackage()
+        package.import_control_paragraph([
+            ('Package', 'mailer'), ('Version', '1'),
+            ('Architecture', 'amd64'), ('Depends', 'mail-transport-agent')])
+        self.index.add(package._pb)
+        self.assertEqual(
+            [('postfix', '3.5.6-1', 'libc6 (>= 2.34) | libc6-compat')],
+            self.index.find_unsatisfiable('mailer'))
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp(prefix='debalot_test_')
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'index')
+        self.index.save(path)
+        loaded = package_index.PackageIndex.load(path)
+        self.assertEqual(5, len(loaded))
+        self.assertEqual(list(self.index), list(loaded))
+        self.assertEqual(['postfix'], [package.name for package in
+                                       loaded.get_providers(
+                                           'mail-transport-agent')])
+
+
+class TestOpenPackagesFile(unittest.TestCase):
+    def test_gzip(self):
+        directory = tempfile.mkdtemp(prefix='debalot_test_')
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'Packages.gz')
+        with gzip.open(path, 'wb') as output:
+            output.write(PACKAGES.encode('utf-8'))
+        with package_index.open_packages_file(path) as packages_file:
+            self.assertEqual(5, len(list(
+                package_index.read_packages_file(packages_file))))
+
+
+class TestDiffIndexes(unittest.TestCase):
+    def test_diff(self):
+        old = package_index.PackageIndex()
+        old.import_packages_file(io.StringIO(PACKAGES))
+        new = package_index.PackageIndex()
+        new.import_packages_file(io.StringIO(
+            'Package: hello\nVersion: 2.10-3\nArchitecture: amd64\n\n'
+            'Package: libc6\nVersion: 2.31-13\nArchitecture: amd64\n\n'
+            'Package: hello\nVersion: 2.10-3\nArchitecture: i386\n'))
+        self.assertEqual(
+            [('hello', 'amd64', '2.10-2', '2.10-3'),
+             ('hello', 'i386', None, '2.10-3'),
+             ('hello-doc', 'all', '2.10-2', None),
+             ('postfix', 'amd64', '3.5.6-1', None)],
+            list(package_index.diff_indexes(old, new)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,3 +14,14 @@ def parse_person(output_field, input_string):
     email_end = input_string.find('>')
     output_field.name = input_string[:email_start].strip()
     output_field.email = input_string[email_start+1:email_end]
+
+
+def format_person(person):
+    """Format a Person protobuf as in a control file or changelog.
+
+    Args:
+        person: A Person protobuf.
+    Returns:
+        A string such as 'Some Maintainer <maintainer@example.org>'.
+    """
+    return '%s <%s>' % (person.name, person.email)
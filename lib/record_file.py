@@ -0,0 +1,138 @@
+﻿"""Record files: sequences of serialized protobufs in a single file.
+
+Each record is a serialized protobuf preceded by its length as a varint, the
+same framing as the delimited format used by the Java and C++ protobuf
+libraries. Records can be appended to a file and read back one at a time
+without loading the whole file.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+
+def encode_varint(value):
+    """Encode an unsigned integer as a varint.
+
+    Args:
+        value: A non-negative integer.
+    Returns:
+        A byte string containing the varint.
+    """
+    encoded = bytearray()
+    while value > 0x7f:
+        encoded.append(0x80 | (value & 0x7f))
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+if bytes is str:  # Python 2
+    def _byte(data, position):
+        byte = data[position]
+        return byte if isinstance(byte, int) else ord(byte)
+else:
+    def _byte(data, position):
+        return data[position]
+
+
+def decode_varint(data, position=0):
+    """Decode a varint from a byte string.
+
+    Args:
+        data: A byte string, bytearray or memoryview.
+        position: The index at which the varint starts.
+    Returns:
+        A tuple containing the decoded integer and the index just after the
+        varint.
+    Raises:
+        ValueError: The data ends partway through the varint.
+    """
+    value = 0
+    shift = 0
+    while True:
+        if position >= len(data):
+            raise ValueError('Truncated varint.')
+        byte = _byte(data, position)
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+def _read_varint(input_file):
+    """Read a varint from a file, or return None at the end of the file."""
+    value = 0
+    shift = 0
+    while True:
+        byte = input_file.read(1)
+        if not byte:
+            if shift:
+                raise ValueError('Truncated varint.')
+            return None
+        byte = _byte(byte, 0)
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value
+        shift += 7
+
+
+class RecordWriter(object):
+    """Writes records to a file.
+
+    Args:
+        output_file: A writable binary file object.
+    """
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.count = 0
+
+    def write(self, record):
+        """Write a record.
+
+        Args:
+            record: A protobuf message or a byte string of a serialized
+                message.
+        """
+        if not isinstance(record, bytes):
+            record = record.SerializeToString()
+        self.output_file.write(encode_varint(len(record)))
+        self.output_file.write(record)
+        self.count += 1
+
+
+def read_records(input_file):
+    """Read the records in a file.
+
+    Args:
+        input_file: A readable binary file object.
+    Yields:
+        A byte string containing each serialized record.
+    Raises:
+        ValueError: The file ends partway through a record.
+    """
+    while True:
+        length = _read_varint(input_file)
+        if length is None:
+            return
+        record = input_file.read(length)
+        if len(record) != length:
+            raise ValueError('Truncated record.')
+        yield record
+
+
+def read_messages(input_file, message_class):
+    """Read and parse the records in a file.
+
+    Args:
+        input_file: A readable binary file object.
+        message_class: The protobuf message class of the records.
+    Yields:
+        A message_class protobuf for each record.
+    """
+    for record in read_records(input_file):
+        message = message_class()
+        message.ParseFromString(record)
+        yield message
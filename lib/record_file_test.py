@@ -0,0 +1,73 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for record_file module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import unittest
+
+from debalot.lib import debian_package_pb2
+from debalot.lib import record_file
+
+
+class TestVarint(unittest.TestCase):
+    def test_round_trip(self):
+        for value in (0, 1, 127, 128, 300, 2 ** 32, 2 ** 63 - 1):
+            encoded = record_file.encode_varint(value)
+            self.assertEqual((value, len(encoded)),
+                             record_file.decode_varint(encoded))
+
+    def test_encoding(self):
+        self.assertEqual(b'\xac\x02', record_file.encode_varint(300))
+
+    def test_decode_position(self):
+        self.assertEqual((300, 3),
+                         record_file.decode_varint(b'\x00\xac\x02\x01', 1))
+
+    def test_truncated(self):
+        with self.assertRaises(ValueError):
+            record_file.decode_varint(b'\xac')
+
+
+class TestRecords(unittest.TestCase):
+    def setUp(self):
+        self.packages = []
+        for name in ('hello', 'world', 'x' * 200):
+            package = debian_package_pb2.SourcePackage()
+            package.name = name
+            self.packages.append(package)
+
+    def test_round_trip(self):
+        output = io.BytesIO()
+        writer = record_file.RecordWriter(output)
+        writer.write(self.packages[0])
+        for package in self.packages[1:]:
+            writer.write(package.SerializeToString())
+        self.assertEqual(3, writer.count)
+        output.seek(0)
+        self.assertEqual(
+            self.packages,
+            list(record_file.read_messages(
+                output, debian_package_pb2.SourcePackage)))
+
+    def test_empty_record(self):
+        output = io.BytesIO()
+        record_file.RecordWriter(output).write(b'')
+        output.seek(0)
+        self.assertEqual([b''], list(record_file.read_records(output)))
+
+    def test_truncated_record(self):
+        output = io.BytesIO()
+        record_file.RecordWriter(output).write(self.packages[0])
+        truncated = io.BytesIO(output.getvalue()[:-1])
+        with self.assertRaises(ValueError):
+            list(record_file.read_records(truncated))
+
+
+if __name__ == "__main__":
+    unittest.main()
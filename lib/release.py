@@ -0,0 +1,207 @@
+﻿"""Release file and by-hash generation for a suite of indexes.
+
+A suite directory (e.g. dists/stable) contains indexes such as
+main/binary-amd64/Packages and their compressed variants. Its Release file
+lists the size and checksums of each of them, and the by-hash directories let
+clients fetch an index by its checksum so that they never see an index that
+doesn't match the Release file they downloaded.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import os
+import shutil
+import time
+
+from debalot.lib import changelog_date
+from debalot.lib import file
+
+
+# Checksum fields of a Release file, with the hashlib algorithm for each.
+CHECKSUM_FIELDS = (
+    ('MD5Sum', 'md5'),
+    ('SHA1', 'sha1'),
+    ('SHA256', 'sha256'),
+    ('SHA512', 'sha512'),
+)
+# Files in a suite directory that are not themselves indexes.
+_RELEASE_FILES = {'Release', 'Release.gpg', 'InRelease'}
+_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path, algorithms=tuple(a for _, a in CHECKSUM_FIELDS)):
+    """Get the size and checksums of a file, reading it only once.
+
+    Args:
+        path: The path of the file.
+        algorithms: The names of the hashlib algorithms to use.
+    Returns:
+        A tuple containing the size of the file in bytes and a dictionary
+        mapping each algorithm name to its hex digest.
+    """
+    hashes = [(algorithm, hashlib.new(algorithm))
+              for algorithm in algorithms]
+    size = 0
+    with open(path, 'rb') as input_file:
+        while True:
+            chunk = input_file.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            for _, hash_object in hashes:
+                hash_object.update(chunk)
+    return size, {algorithm: hash_object.hexdigest()
+                  for algorithm, hash_object in hashes}
+
+
+def hash_files(paths, algorithms=tuple(a for _, a in CHECKSUM_FIELDS),
+               threads=None):
+    """Get the sizes and checksums of several files concurrently.
+
+    hashlib releases the GIL while hashing large buffers, so a thread pool
+    hashes several files at once on multiple cores.
+
+    Args:
+        paths: An iterable of file paths.
+        algorithms: The names of the hashlib algorithms to use.
+        threads: The number of threads to use. Defaults to the CPU count.
+    Returns:
+        A dictionary mapping each path to the output of hash_file.
+    """
+    # multiprocessing is slow to import and only needed here.
+    from multiprocessing.pool import ThreadPool
+    paths = list(paths)
+    pool = ThreadPool(threads)
+    try:
+        results = pool.map(lambda path: hash_file(path, algorithms), paths)
+    finally:
+        pool.close()
+        pool.join()
+    return dict(zip(paths, results))
+
+
+class Release(object):
+    """The Release metadata for a suite.
+
+    Attributes:
+        directory: The suite directory, e.g. dists/stable.
+        fields: A list of (key, value) tuples for the fields at the top of the
+            Release file, such as Origin, Suite and Codename.
+        timestamp: The timestamp of the Release file's Date field. Defaults
+            to the current time.
+        threads: The number of threads with which to hash indexes.
+    """
+    def __init__(self, directory, fields=(), timestamp=None, threads=None):
+        self.directory = directory
+        self.fields = list(fields)
+        self.timestamp = timestamp
+        self.threads = threads
+
+    def index_files(self):
+        """Find the index files in the suite directory.
+
+        Returns:
+            A sorted list of index paths relative to the suite directory,
+            using '/' as the separator.
+        """
+        index_files = []
+        for directory, subdirectories, filenames in os.walk(self.directory):
+            if 'by-hash' in subdirectories:
+                subdirectories.remove('by-hash')
+            relative_directory = os.path.relpath(directory, self.directory)
+            for filename in filenames:
+                if relative_directory == '.':
+                    if filename in _RELEASE_FILES:
+                        continue
+                    index_files.append(filename)
+                else:
+                    index_files.append('/'.join(
+                        relative_directory.split(os.sep) + [filename]))
+        return sorted(index_files)
+
+    def _path(self, index_file):
+        return os.path.join(self.directory, *index_file.split('/'))
+
+    def _hash_index_files(self):
+        index_files = self.index_files()
+        paths = [self._path(index_file) for index_file in index_files]
+        hashes = hash_files(paths, threads=self.threads)
+        return [(index_file,) + hashes[path]
+                for index_file, path in zip(index_files, paths)]
+
+    def generate_release(self, hashes=None):
+        """Generate the lines of the Release file.
+
+        Args:
+            hashes: The output of hashing the index files, if they have
+                already been hashed. A list of (path, size, digests) tuples.
+        Yields:
+            Each line of the Release file, without a trailing newline.
+        """
+        if hashes is None:
+            hashes = self._hash_index_files()
+        timestamp = self.timestamp
+        if timestamp is None:
+            timestamp = time.time()
+        for key, value in self.fields:
+            yield u'%s: %s' % (key, value)
+        # changelog_date formats the date without strftime, so the day and
+        # month names are in English whatever the locale.
+        yield u'Date: %s' % changelog_date.format_date(timestamp, 0, 'UTC')
+        yield u'Acquire-By-Hash: yes'
+        size_width = max([len(str(size)) for _, size, _ in hashes] or [0])
+        for field, algorithm in CHECKSUM_FIELDS:
+            yield u'%s:' % field
+            for path, size, digests in hashes:
+                yield u' %s %*d %s' % (digests[algorithm], size_width, size,
+                                       path)
+
+    def export_release_file(self, hashes=None):
+        """Write the Release file into the suite directory.
+
+        Args:
+            hashes: The output of hashing the index files, if they have
+                already been hashed.
+        """
+        if hashes is None:
+            hashes = self._hash_index_files()
+        with open(os.path.join(self.directory, 'Release'), 'wb') as output:
+            for line in self.generate_release(hashes):
+                output.write((line + '\n').encode('utf-8'))
+
+    def export_by_hash(self, hashes=None):
+        """Create the by-hash tree for each index in the suite.
+
+        Each index is hard linked (or copied, where hard links are not
+        possible) to {index directory}/by-hash/{checksum field}/{digest}.
+
+        Args:
+            hashes: The output of hashing the index files, if they have
+                already been hashed.
+        """
+        if hashes is None:
+            hashes = self._hash_index_files()
+        for path, _, digests in hashes:
+            source = self._path(path)
+            for field, algorithm in CHECKSUM_FIELDS:
+                by_hash_directory = os.path.join(
+                    os.path.dirname(source), 'by-hash', field)
+                file.make_directory(by_hash_directory)
+                destination = os.path.join(by_hash_directory,
+                                           digests[algorithm])
+                if os.path.exists(destination):
+                    continue
+                try:
+                    os.link(source, destination)
+                except (AttributeError, OSError):
+                    shutil.copyfile(source, destination)
+
+    def export(self):
+        """Write the Release file and by-hash tree, hashing each index once."""
+        hashes = self._hash_index_files()
+        self.export_by_hash(hashes)
+        self.export_release_file(hashes)
@@ -0,0 +1,109 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for release module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+from debalot.lib import release
+
+
+PACKAGES = b'Package: hello\nVersion: 2.10-2\nArchitecture: amd64\n'
+
+
+class TestHashing(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='debalot_test_')
+        self.paths = []
+        for i in range(4):
+            path = os.path.join(self.directory, 'file%d' % i)
+            with open(path, 'wb') as output:
+                output.write(PACKAGES * i)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hash_file(self):
+        size, digests = release.hash_file(self.paths[2])
+        self.assertEqual(len(PACKAGES) * 2, size)
+        for algorithm in ('md5', 'sha1', 'sha256', 'sha512'):
+            self.assertEqual(
+                hashlib.new(algorithm, PACKAGES * 2).hexdigest(),
+                digests[algorithm])
+
+    def test_hash_file_algorithms(self):
+        _, digests = release.hash_file(self.paths[1], ['sha256'])
+        self.assertEqual(['sha256'], list(digests))
+
+    def test_hash_files(self):
+        hashes = release.hash_files(self.paths, threads=2)
+        self.assertEqual(set(self.paths), set(hashes))
+        for path in self.paths:
+            self.assertEqual(release.hash_file(path), hashes[path])
+
+
+class TestRelease(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='debalot_test_')
+        index_directory = os.path.join(self.directory, 'main', 'binary-amd64')
+        os.makedirs(index_directory)
+        self.index = os.path.join(index_directory, 'Packages')
+        with open(self.index, 'wb') as output:
+            output.write(PACKAGES)
+        gzip_file = gzip.open(self.index + '.gz', 'wb')
+        gzip_file.write(PACKAGES)
+        gzip_file.close()
+        with open(os.path.join(self.directory, 'InRelease'), 'wb') as output:
+            output.write(b'Not an index.')
+        self.release = release.Release(
+            self.directory, fields=[('Suite', 'stable'), ('Codename', 'x')],
+            timestamp=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_index_files(self):
+        self.assertEqual(['main/binary-amd64/Packages',
+                          'main/binary-amd64/Packages.gz'],
+                         self.release.index_files())
+
+    def test_generate_release(self):
+        lines = list(self.release.generate_release())
+        self.assertEqual(['Suite: stable',
+                          'Codename: x',
+                          'Date: Thu, 01 Jan 1970 00:00:00 UTC',
+                          'Acquire-By-Hash: yes',
+                          'MD5Sum:'], lines[:5])
+        self.assertIn(' %s %d main/binary-amd64/Packages' % (
+            hashlib.sha256(PACKAGES).hexdigest(), len(PACKAGES)), lines)
+        self.assertEqual(4 * 3 + 4, len(lines))
+
+    def test_export(self):
+        self.release.export()
+        with open(os.path.join(self.directory, 'Release'), 'rb') as f:
+            self.assertIn(hashlib.sha512(PACKAGES).hexdigest().encode(),
+                          f.read())
+        by_hash = os.path.join(os.path.dirname(self.index), 'by-hash')
+        self.assertEqual({'MD5Sum', 'SHA1', 'SHA256', 'SHA512'},
+                         set(os.listdir(by_hash)))
+        with open(os.path.join(by_hash, 'SHA256',
+                               hashlib.sha256(PACKAGES).hexdigest()),
+                  'rb') as f:
+            self.assertEqual(PACKAGES, f.read())
+        # The by-hash tree is not itself indexed.
+        self.assertEqual(2, len(self.release.index_files()))
+
+
+if __name__ == "__main__":
+    unittest.main()
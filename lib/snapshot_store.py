@@ -0,0 +1,364 @@
+﻿"""A history of daily snapshots of a suite's package index.
+
+Only a few hundred packages in a suite change from one day to the next, so
+storing each day's full index is wasteful. A SnapshotStore keeps one file per
+snapshot in a directory:
+    <date>.base:  a full snapshot, a record file of BinaryPackage protobufs.
+    <date>.delta: the changes since the previous snapshot, a record file of
+                  PackageChange protobufs.
+    history:      a record file of HistoryEntry protobufs, one per change,
+                  for looking up the history of a package.
+    pending:      present only while a snapshot is being added. It holds
+                  the snapshot's date and the size of the history file
+                  before the snapshot's entries were appended to it.
+A full snapshot is stored every base_interval snapshots, so rebuilding any
+date's index reads one full snapshot and at most base_interval - 1 deltas.
+A snapshot's history entries are written before its snapshot file, and a
+snapshot counts as added once its file exists. If adding one is
+interrupted before then, its history entries are truncated away when the
+store is next opened.
+Dates are ISO 8601 strings such as '2021-02-01', which sort in date order.
+
+Example use:
+    store = SnapshotStore('snapshots/unstable-amd64')
+    store.add_snapshot('2021-02-01', PackageIndex.load('amd64.index'))
+    index = store.get_index('2021-01-15')
+    for entry in store.get_history('hello'):
+        print(entry.date, entry.version)
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import bisect
+import collections
+import os
+import re
+import tempfile
+
+from debalot.lib import debian_package_pb2
+from debalot.lib import package_index
+from debalot.lib import record_file
+from debalot.lib import snapshot_pb2 as pb
+
+
+# The default number of snapshots from one full snapshot to the next.
+DEFAULT_BASE_INTERVAL = 30
+
+_BASE_SUFFIX = '.base'
+_DELTA_SUFFIX = '.delta'
+_HISTORY_FILE = 'history'
+_PENDING_FILE = 'pending'
+_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def _key(package):
+    return (package.name, package.version, package.architecture)
+
+
+def diff_packages(old, new):
+    """Find the changes between two sets of packages.
+
+    Args:
+        old: A dictionary mapping (name, version, architecture) tuples to
+            BinaryPackage protobufs.
+        new: A dictionary in the same form.
+    Returns:
+        A list of PackageChange protobufs, sorted by name, version and
+        architecture.
+    """
+    changes = []
+    for key in sorted(set(old) | set(new)):
+        change = pb.PackageChange()
+        if key not in new:
+            change.type = pb.PackageChange.REMOVED
+            change.package.name, change.package.version = key[:2]
+            change.package.architecture = key[2]
+        elif key not in old:
+            change.type = pb.PackageChange.ADDED
+            change.package.CopyFrom(new[key])
+        elif old[key] != new[key]:
+            change.type = pb.PackageChange.CHANGED
+            change.package.CopyFrom(new[key])
+        else:
+            continue
+        changes.append(change)
+    return changes
+
+
+class SnapshotStore(object):
+    """Snapshots of a suite's package index, stored as deltas.
+
+    Args:
+        directory: The directory of the store. It is created when the first
+            snapshot is added.
+        base_interval: How often to store a full snapshot. A full snapshot
+            is stored if this many snapshots, counting it, have been added
+            since the last one.
+    """
+    def __init__(self, directory, base_interval=DEFAULT_BASE_INTERVAL):
+        self.directory = directory
+        self.base_interval = base_interval
+        # Sorted (date, whether it is a full snapshot) tuples.
+        self._snapshots = self._find_snapshots()
+        self._dates = [date for date, _ in self._snapshots]
+        # The packages after the snapshot last rebuilt, as a tuple of its
+        # position in _snapshots and a dictionary of its packages.
+        self._state = None
+        # Package name -> HistoryEntry protobufs, once the history is loaded.
+        self._history = None
+        self._recover()
+
+    def _find_snapshots(self):
+        if not os.path.isdir(self.directory):
+            return []
+        snapshots = []
+        for file_name in os.listdir(self.directory):
+            date, suffix = os.path.splitext(file_name)
+            if (suffix in (_BASE_SUFFIX, _DELTA_SUFFIX) and
+                    _DATE_PATTERN.match(date)):
+                snapshots.append((date, suffix == _BASE_SUFFIX))
+        return sorted(snapshots)
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    @property
+    def dates(self):
+        """The dates of the snapshots, in order."""
+        return list(self._dates)
+
+    def _path(self, date, base):
+        return os.path.join(self.directory,
+                            date + (_BASE_SUFFIX if base else _DELTA_SUFFIX))
+
+    def _read(self, date, base):
+        with open(self._path(date, base), 'rb') as input_file:
+            message_class = (debian_package_pb2.BinaryPackage if base
+                             else pb.PackageChange)
+            for message in record_file.read_messages(input_file,
+                                                     message_class):
+                yield message
+
+    def _write_file(self, path, write):
+        """Write a file, replacing it atomically.
+
+        Args:
+            path: The path of the file.
+            write: A function called with the binary file object to write.
+        """
+        handle, temp_path = tempfile.mkstemp(prefix='.tmp-',
+                                             dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                write(output)
+            os.rename(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _write(self, path, records):
+        """Write a record file, replacing it atomically."""
+        def write(output):
+            writer = record_file.RecordWriter(output)
+            for record in records:
+                writer.write(record)
+        self._write_file(path, write)
+
+    def _recover(self):
+        """Undo the history of a snapshot whose adding was interrupted."""
+        pending_path = os.path.join(self.directory, _PENDING_FILE)
+        if not os.path.exists(pending_path):
+            return
+        with open(pending_path, 'rb') as input_file:
+            date, size = input_file.read().decode('ascii').split()
+        if not (os.path.exists(self._path(date, True)) or
+                os.path.exists(self._path(date, False))):
+            history_path = os.path.join(self.directory, _HISTORY_FILE)
+            if os.path.exists(history_path):
+                with open(history_path, 'r+b') as history_file:
+                    history_file.truncate(int(size))
+        os.remove(pending_path)
+
+    def _begin(self, date):
+        """Record that a snapshot is being added, before changing files."""
+        history_path = os.path.join(self.directory, _HISTORY_FILE)
+        size = (os.path.getsize(history_path)
+                if os.path.exists(history_path) else 0)
+        self._write_file(
+            os.path.join(self.directory, _PENDING_FILE),
+            lambda output: output.write(
+                ('%s %d\n' % (date, size)).encode('ascii')))
+
+    def _load_state(self, position):
+        """Rebuild the packages after the snapshot at a position.
+
+        Deltas are applied to the last state rebuilt if it is between the
+        full snapshot and the requested one, otherwise to the full snapshot.
+
+        Returns:
+            A dictionary mapping (name, version, architecture) tuples to
+            BinaryPackage protobufs.
+        """
+        start = position
+        while not self._snapshots[start][1]:
+            start -= 1
+        if self._state is not None and start <= self._state[0] <= position:
+            first, packages = self._state[0] + 1, self._state[1]
+        else:
+            first = start + 1
+            packages = dict((_key(package), package)
+                            for package in self._read(self._dates[start],
+                                                      True))
+        for date, _ in self._snapshots[first:position + 1]:
+            for change in self._read(date, False):
+                if change.type == pb.PackageChange.REMOVED:
+                    packages.pop(_key(change.package), None)
+                else:
+                    packages[_key(change.package)] = change.package
+        self._state = (position, packages)
+        return packages
+
+    def _find(self, date):
+        position = bisect.bisect_right(self._dates, '%s' % date) - 1
+        if position < 0:
+            raise KeyError(date)
+        return position
+
+    def get_index(self, date):
+        """Rebuild the index of the suite on a date.
+
+        Args:
+            date: A date string, or a datetime.date.
+        Returns:
+            A PackageIndex of the packages in the latest snapshot on or
+            before the date. Its packages are shared with the store's cache,
+            so they must not be modified.
+        Raises:
+            KeyError: There is no snapshot on or before the date.
+        """
+        packages = self._load_state(self._find(date))
+        index = package_index.PackageIndex()
+        for key in sorted(packages):
+            index.add(packages[key])
+        return index
+
+    def get_changes(self, date):
+        """Get the changes made by the snapshot on a date.
+
+        Args:
+            date: A date string, or a datetime.date.
+        Returns:
+            A list of PackageChange protobufs, sorted by name, version and
+            architecture.
+        Raises:
+            KeyError: There is no snapshot on the date.
+        """
+        position = self._find(date)
+        if self._dates[position] != '%s' % date:
+            raise KeyError(date)
+        if not self._snapshots[position][1]:
+            return list(self._read(self._dates[position], False))
+        old = self._load_state(position - 1) if position else {}
+        return diff_packages(dict(old), self._load_state(position))
+
+    def add_snapshot(self, date, packages):
+        """Add the snapshot of a date.
+
+        Args:
+            date: A date string, or a datetime.date. It must be later than
+                the last snapshot's.
+            packages: An iterable of BinaryPackage protobufs, such as a
+                PackageIndex. They are copied, so the caller may go on
+                modifying them.
+        Returns:
+            A list of the PackageChange protobufs since the last snapshot.
+        Raises:
+            ValueError: The date is not valid or not later than the last
+                snapshot's.
+        """
+        date = '%s' % date
+        if not _DATE_PATTERN.match(date):
+            raise ValueError('Invalid snapshot date:', date)
+        if self._dates and date <= self._dates[-1]:
+            raise ValueError('Snapshots must be added in date order:', date)
+        new = {}
+        for package in packages:
+            copy = debian_package_pb2.BinaryPackage()
+            copy.CopyFrom(package)
+            new[_key(copy)] = copy
+        old = self._load_state(len(self._snapshots) - 1) if self else {}
+        changes = diff_packages(old, new)
+        deltas = 0
+        for _, base in reversed(self._snapshots):
+            if base:
+                break
+            deltas += 1
+        base = not self._snapshots or deltas + 1 >= self.base_interval
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        # Undo an earlier call that failed partway through.
+        self._recover()
+        self._begin(date)
+        entries = self._append_history(date, changes)
+        if base:
+            self._write(self._path(date, True),
+                        (new[key] for key in sorted(new)))
+        else:
+            self._write(self._path(date, False), changes)
+        os.remove(os.path.join(self.directory, _PENDING_FILE))
+        if self._history is not None:
+            for entry in entries:
+                self._history[entry.name].append(entry)
+        self._snapshots.append((date, base))
+        self._dates.append(date)
+        self._state = (len(self._snapshots) - 1, new)
+        return changes
+
+    def _append_history(self, date, changes):
+        """Append the history entries of a snapshot's changes to the file.
+
+        Returns:
+            A list of the HistoryEntry protobufs appended.
+        """
+        entries = [pb.HistoryEntry(date=date, type=change.type,
+                                   name=change.package.name,
+                                   version=change.package.version,
+                                   architecture=change.package.architecture)
+                   for change in changes]
+        with open(os.path.join(self.directory, _HISTORY_FILE),
+                  'ab') as output:
+            writer = record_file.RecordWriter(output)
+            for entry in entries:
+                writer.write(entry)
+        return entries
+
+    def _load_history(self):
+        if self._history is None:
+            self._history = collections.defaultdict(list)
+            path = os.path.join(self.directory, _HISTORY_FILE)
+            if os.path.exists(path):
+                with open(path, 'rb') as input_file:
+                    for entry in record_file.read_messages(input_file,
+                                                           pb.HistoryEntry):
+                        self._history[entry.name].append(entry)
+        return self._history
+
+    def get_history(self, name, architecture=None):
+        """Get the history of a package.
+
+        The history is read once and kept in memory, so lookups don't read
+        any snapshots.
+
+        Args:
+            name: The name of the binary package.
+            architecture: If given, only changes to packages for this
+                architecture are returned.
+        Returns:
+            A list of HistoryEntry protobufs in date order, one for each time
+            a version of the package was added, removed or changed.
+        """
+        return [entry for entry in self._load_history().get(name, ())
+                if architecture is None or entry.architecture == architecture]
@@ -0,0 +1,185 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for snapshot_store module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from debalot.lib import debian_package_pb2
+from debalot.lib import snapshot_pb2
+from debalot.lib import snapshot_store
+
+
+def package(name, version, architecture='amd64', section='misc'):
+    return debian_package_pb2.BinaryPackage(
+        name=name, version=version, architecture=architecture,
+        section=section)
+
+
+def keys(packages):
+    return [(package.name, package.version, package.architecture)
+            for package in packages]
+
+
+# (date, packages) for five days of a suite.
+SNAPSHOTS = [
+    ('2021-02-01', [package('hello', '2.10-1'), package('libc6', '2.31-1')]),
+    ('2021-02-02', [package('hello', '2.10-2'), package('libc6', '2.31-1')]),
+    ('2021-02-03', [package('hello', '2.10-2'), package('libc6', '2.31-1'),
+                    package('hello-doc', '2.10-2', 'all')]),
+    ('2021-02-04', [package('hello', '2.10-2', section='utils'),
+                    package('hello-doc', '2.10-2', 'all')]),
+    ('2021-02-05', [package('hello', '2.10-3'),
+                    package('hello-doc', '2.10-2', 'all')]),
+]
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='debalot_test_')
+        self.path = os.path.join(self.directory, 'unstable')
+        self.store = snapshot_store.SnapshotStore(self.path, base_interval=3)
+        for date, packages in SNAPSHOTS:
+            self.store.add_snapshot(date, packages)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_files(self):
+        self.assertEqual(['2021-02-01.base', '2021-02-02.delta',
+                          '2021-02-03.delta', '2021-02-04.base',
+                          '2021-02-05.delta', 'history'],
+                         sorted(os.listdir(self.path)))
+
+    def test_get_index(self):
+        for date, packages in SNAPSHOTS:
+            self.assertEqual(sorted(keys(packages)),
+                             keys(self.store.get_index(date)))
+        index = self.store.get_index('2021-02-04')
+        self.assertEqual('utils', index.get('hello')[0].section)
+
+    def test_get_index_between_snapshots(self):
+        self.assertEqual(keys(self.store.get_index('2021-02-05')),
+                         keys(self.store.get_index('2021-03-01')))
+        self.assertEqual(keys(self.store.get_index('2021-02-02')),
+                         keys(self.store.get_index(datetime.date(2021, 2, 2))))
+        self.assertRaises(KeyError, self.store.get_index, '2021-01-31')
+
+    def test_reopen(self):
+        store = snapshot_store.SnapshotStore(self.path, base_interval=3)
+        self.assertEqual([date for date, _ in SNAPSHOTS], store.dates)
+        # Rebuild in reverse so cached states can't be reused.
+        for date, packages in reversed(SNAPSHOTS):
+            self.assertEqual(sorted(keys(packages)),
+                             keys(store.get_index(date)))
+        self.assertEqual(len(SNAPSHOTS), len(store))
+
+    def test_get_changes(self):
+        changes = self.store.get_changes('2021-02-04')
+        self.assertEqual(
+            [(snapshot_pb2.PackageChange.CHANGED, 'hello'),
+             (snapshot_pb2.PackageChange.REMOVED, 'libc6')],
+            [(change.type, change.package.name) for change in changes])
+        changes = self.store.get_changes('2021-02-02')
+        self.assertEqual(
+            [(snapshot_pb2.PackageChange.ADDED, '2.10-2'),
+             (snapshot_pb2.PackageChange.REMOVED, '2.10-1')],
+            sorted((change.type, change.package.version)
+                   for change in changes))
+        self.assertEqual(2, len(self.store.get_changes('2021-02-01')))
+        self.assertRaises(KeyError, self.store.get_changes, '2021-02-06')
+
+    def test_get_history(self):
+        history = self.store.get_history('hello')
+        Change = snapshot_pb2.PackageChange
+        expected = [
+            ('2021-02-01', Change.ADDED, '2.10-1'),
+            ('2021-02-02', Change.REMOVED, '2.10-1'),
+            ('2021-02-02', Change.ADDED, '2.10-2'),
+            ('2021-02-04', Change.CHANGED, '2.10-2'),
+            ('2021-02-05', Change.REMOVED, '2.10-2'),
+            ('2021-02-05', Change.ADDED, '2.10-3'),
+        ]
+        self.assertEqual(expected, [(entry.date, entry.type, entry.version)
+                                    for entry in history])
+        reopened = snapshot_store.SnapshotStore(self.path)
+        self.assertEqual(history, reopened.get_history('hello'))
+        self.assertEqual([], self.store.get_history('hello', 'i386'))
+        self.assertEqual([], self.store.get_history('missing'))
+
+    def test_history_updated_after_loading(self):
+        self.assertEqual(1, len(self.store.get_history('hello-doc')))
+        self.store.add_snapshot('2021-02-06', [package('hello', '2.10-3')])
+        self.assertEqual(snapshot_pb2.PackageChange.REMOVED,
+                         self.store.get_history('hello-doc')[-1].type)
+
+    def test_add_snapshot_in_order(self):
+        self.assertRaises(ValueError, self.store.add_snapshot,
+                          '2021-02-05', [])
+        self.assertRaises(ValueError, self.store.add_snapshot,
+                          '2021-02-01', [])
+        self.assertRaises(ValueError, self.store.add_snapshot, 'latest', [])
+        self.assertEqual([], self.store.add_snapshot(
+            '2021-02-06', self.store.get_index('2021-02-05')))
+
+    def test_packages_copied(self):
+        packages = [package('hello', '2.10-3')]
+        self.store.add_snapshot('2021-02-06', packages)
+        packages[0].section = 'utils'
+        changes = self.store.add_snapshot('2021-02-07', packages)
+        self.assertEqual([snapshot_pb2.PackageChange.CHANGED],
+                         [change.type for change in changes])
+
+    def test_interrupted_add(self):
+        history_path = os.path.join(self.path, 'history')
+        history_size = os.path.getsize(history_path)
+
+        def fail(path, records):
+            raise IOError('No space left on device')
+        self.store._write = fail
+        self.assertRaises(IOError, self.store.add_snapshot, '2021-02-06',
+                          [package('hello', '2.10-4')])
+        self.assertGreater(os.path.getsize(history_path), history_size)
+        # Opening the store truncates the entries of the missing snapshot.
+        store = snapshot_store.SnapshotStore(self.path, base_interval=3)
+        self.assertEqual(history_size, os.path.getsize(history_path))
+        self.assertNotIn('pending', os.listdir(self.path))
+        store.add_snapshot('2021-02-06', [package('hello', '2.10-4')])
+        self.assertEqual(['2.10-3', '2.10-4'],
+                         [entry.version for entry in store.get_history(
+                             'hello') if entry.date == '2021-02-06'])
+
+    def test_interrupted_add_retried(self):
+        def fail(path, records):
+            raise IOError('No space left on device')
+        write = self.store._write
+        self.store._write = fail
+        self.assertRaises(IOError, self.store.add_snapshot, '2021-02-06',
+                          [package('hello', '2.10-4')])
+        # The same store undoes the failed call before adding again.
+        self.store._write = write
+        self.store.add_snapshot('2021-02-06', [package('hello', '2.10-4')])
+        self.assertEqual(2, len([
+            entry for entry in self.store.get_history('hello')
+            if entry.date == '2021-02-06']))
+
+    def test_empty_store(self):
+        store = snapshot_store.SnapshotStore(
+            os.path.join(self.directory, 'missing'))
+        self.assertEqual(0, len(store))
+        self.assertEqual([], store.dates)
+        self.assertRaises(KeyError, store.get_index, '2021-02-01')
+        self.assertEqual([], store.get_history('hello'))
+
+
+if __name__ == "__main__":
+    unittest.main()
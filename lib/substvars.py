@@ -0,0 +1,178 @@
+﻿"""Substitution variables, as used by dpkg-gencontrol.
+
+Binary package fields in debian/control may refer to variables such as
+${misc:Depends} and ${shlibs:Depends}. Build tools write their values to
+debian/<package>.substvars, one per line:
+    misc:Depends=debconf (>= 0.5) | debconf-2.0
+    shlibs:Depends=libc6 (>= 2.14)
+A "name?=value" line defines an optional variable, which dpkg doesn't warn
+about if it is unused. Values may themselves refer to other variables.
+
+Example use:
+    package.import_control_file(
+        control_file, substvars_files=substvars.load_directory('debian'))
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import codecs
+import glob
+import hashlib
+import io
+import os
+import re
+
+from debalot.lib import cache
+
+
+# The variables dpkg-gencontrol always defines.
+BUILTIN_VARIABLES = {'Newline': '\n', 'Space': ' ', 'Tab': '\t'}
+
+_LINE_PATTERN = re.compile(r'^([A-Za-z0-9][-:0-9A-Za-z]*)\??=(.*)$')
+_VARIABLE_PATTERN = re.compile(r'\$\{([A-Za-z0-9][-:0-9A-Za-z]*)\}')
+# The same limit dpkg uses to catch recursive definitions.
+_MAX_SUBSTITUTIONS = 50
+# The default expansion cache holds up to 64Ki parsed relations.
+DEFAULT_CACHE_SIZE = 64 * 1024
+
+
+def parse_substvars_file(substvars_file):
+    """Read the variables defined in a substvars file.
+
+    Args:
+        substvars_file: A readable unicode file object.
+    Returns:
+        A dictionary mapping each variable name to its value.
+    Raises:
+        ValueError: A line is not a variable definition, comment or blank.
+    """
+    variables = {}
+    for line in iter(substvars_file.readline, ''):
+        line = line.rstrip('\r\n')
+        if not line or line.isspace() or line.startswith('#'):
+            continue
+        match = _LINE_PATTERN.match(line)
+        if match is None:
+            raise ValueError('Invalid substitution variable line:', line)
+        variables[match.group(1)] = match.group(2)
+    return variables
+
+
+class Substvars(object):
+    """A set of substitution variables.
+
+    Args:
+        variables: A dictionary mapping variable names to values.
+        digest: A string identifying the variables, such as the hash of the
+            file they were read from. Two Substvars with the same digest must
+            have the same variables. Defaults to a hash of the variables.
+    """
+    def __init__(self, variables=None, digest=None):
+        self.variables = dict(BUILTIN_VARIABLES)
+        self.variables.update(variables or {})
+        if digest is None:
+            digest = hashlib.sha256('\n'.join(
+                '%s=%s' % item for item in sorted(self.variables.items())
+            ).encode('utf-8')).hexdigest()
+        self.digest = digest
+
+    @classmethod
+    def load(cls, path):
+        """Read a substvars file.
+
+        Args:
+            path: The path of the file.
+        Returns:
+            A Substvars whose digest is the SHA-256 digest of the file.
+        """
+        with open(path, 'rb') as substvars_file:
+            data = substvars_file.read()
+        text = codecs.decode(data, 'utf-8-sig')
+        return cls(parse_substvars_file(io.StringIO(text)),
+                   hashlib.sha256(data).hexdigest())
+
+    def expand(self, text):
+        """Substitute the variables in a string.
+
+        As in dpkg-gencontrol, undefined variables expand to nothing.
+
+        Args:
+            text: A string that may contain ${name} references.
+        Returns:
+            The string with all variables substituted.
+        Raises:
+            ValueError: The variables refer to each other recursively.
+        """
+        substitutions = [0]
+
+        def substitute(match):
+            substitutions[0] += 1
+            if substitutions[0] > _MAX_SUBSTITUTIONS:
+                raise ValueError('Too many substitutions. Is a variable '
+                                 'defined recursively?', text)
+            return _VARIABLE_PATTERN.sub(
+                substitute, self.variables.get(match.group(1), ''))
+
+        return _VARIABLE_PATTERN.sub(substitute, text)
+
+
+def load_directory(directory):
+    """Read the substvars files of the binary packages in a debian directory.
+
+    Args:
+        directory: The path of the debian directory.
+    Returns:
+        A dictionary mapping each binary package name to its Substvars, read
+        from directory/<name>.substvars.
+    """
+    substvars = {}
+    for path in glob.glob(os.path.join(directory, '*.substvars')):
+        name = os.path.basename(path)[:-len('.substvars')]
+        substvars[name] = Substvars.load(path)
+    return substvars
+
+
+class ExpansionCache(object):
+    """A cache of parsed field values after variable substitution.
+
+    Source packages that build many binaries repeat the same fields, e.g.
+    "Depends: ${misc:Depends}, ${shlibs:Depends}", with substvars files that
+    are often identical. Results are looked up by the digest of the
+    substvars and the unexpanded value, so each distinct combination is
+    expanded and parsed only once.
+
+    Args:
+        parse: A function that parses an expanded value. Its results are
+            shared between callers, which must not modify them.
+        max_size: The maximum number of parsed items to keep. The results of
+            parse must support len().
+    """
+    def __init__(self, parse, max_size=DEFAULT_CACHE_SIZE):
+        self._parse = parse
+        # Count each result as at least one so empty results are bounded.
+        self._cache = cache.LRUCache(max_size,
+                                     sizeof=lambda result: len(result) + 1)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, substvars, value):
+        """Expand and parse a field value.
+
+        Args:
+            substvars: The Substvars to expand the value with.
+            value: The unexpanded field value.
+        Returns:
+            The result of parse for the expanded value.
+        """
+        key = (substvars.digest, value)
+        result = self._cache.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = self._parse(substvars.expand(value))
+        self._cache.put(key, result)
+        return result
@@ -0,0 +1,131 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for substvars module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from debalot.lib import debian_package
+from debalot.lib import substvars
+
+
+CONTROL = '''Source: hello
+Maintainer: A Person <a@example.org>
+
+Package: hello
+Architecture: any
+Depends: ${shlibs:Depends}, ${misc:Depends}
+Provides: ${hello:Provides}
+
+Package: hello-doc
+Architecture: all
+Depends: ${misc:Depends}
+'''
+
+
+class TestParseSubstvarsFile(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(
+            {'misc:Depends': 'debconf (>= 0.5) | debconf-2.0',
+             'misc:Pre-Depends': '',
+             'shlibs:Depends': 'libc6 (>= 2.14)'},
+            substvars.parse_substvars_file(io.StringIO(
+                '# Comment\n'
+                'misc:Depends=debconf (>= 0.5) | debconf-2.0\n'
+                '\n'
+                'misc:Pre-Depends=\n'
+                'shlibs:Depends?=libc6 (>= 2.14)\n')))
+
+    def test_invalid_line(self):
+        self.assertRaises(ValueError, substvars.parse_substvars_file,
+                          io.StringIO('misc:Depends\n'))
+
+
+class TestSubstvars(unittest.TestCase):
+    def test_expand(self):
+        variables = substvars.Substvars({'a': 'x (>= 1)', 'b': '${a}, y'})
+        self.assertEqual('x (>= 1), y, z', variables.expand('${b}, z'))
+        self.assertEqual(', z', variables.expand('${undefined}, z'))
+        self.assertEqual('a\nb', variables.expand('a${Newline}b'))
+
+    def test_recursive_definition(self):
+        variables = substvars.Substvars({'a': '${b}', 'b': '${a}'})
+        self.assertRaises(ValueError, variables.expand, '${a}')
+
+    def test_digest(self):
+        self.assertEqual(substvars.Substvars({'a': '1'}).digest,
+                         substvars.Substvars({'a': '1'}).digest)
+        self.assertNotEqual(substvars.Substvars({'a': '1'}).digest,
+                            substvars.Substvars({'a': '2'}).digest)
+
+
+class TestLoadDirectory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='debalot_test_')
+        self.addCleanup(shutil.rmtree, self.directory)
+        for name in ('hello', 'hello-doc'):
+            with open(os.path.join(self.directory, name + '.substvars'),
+                      'wb') as output:
+                output.write(b'misc:Depends=debconf (>= 0.5)\n')
+
+    def test_load_directory(self):
+        loaded = substvars.load_directory(self.directory)
+        self.assertEqual(['hello', 'hello-doc'], sorted(loaded))
+        self.assertEqual('debconf (>= 0.5)',
+                         loaded['hello'].variables['misc:Depends'])
+        # Identical files have the same digest.
+        self.assertEqual(loaded['hello'].digest, loaded['hello-doc'].digest)
+
+    def test_import_control_file(self):
+        loaded = substvars.load_directory(self.directory)
+        loaded['hello'] = substvars.Substvars({
+            'misc:Depends': 'debconf (>= 0.5)',
+            'shlibs:Depends': 'libc6 (>= 2.14), libfoo1',
+            'hello:Provides': 'hi'})
+        package = debian_package.SourcePackage()
+        package.import_control_file(io.StringIO(CONTROL), loaded)
+        hello, hello_doc = package.binary_packages
+        self.assertEqual(['libc6', 'libfoo1', 'debconf'],
+                         [depend.name for depend in hello.depends])
+        self.assertEqual(['hi'], hello.provides)
+        self.assertEqual(['debconf'],
+                         [depend.name for depend in hello_doc.depends])
+
+    def test_import_control_file_undefined(self):
+        package = debian_package.SourcePackage()
+        package.import_control_file(io.StringIO(CONTROL), {})
+        self.assertEqual(0, len(package.binary_packages[0].depends))
+
+
+class TestExpansionCache(unittest.TestCase):
+    def test_cache(self):
+        parsed = []
+
+        def parse(value):
+            parsed.append(value)
+            return value.split(', ')
+
+        expansion_cache = substvars.ExpansionCache(parse)
+        first = substvars.Substvars({'a': 'x'}, digest='first')
+        also_first = substvars.Substvars({'a': 'x'}, digest='first')
+        second = substvars.Substvars({'a': 'y'}, digest='second')
+        self.assertEqual(['x', 'z'], expansion_cache.get(first, '${a}, z'))
+        self.assertEqual(['x', 'z'],
+                         expansion_cache.get(also_first, '${a}, z'))
+        self.assertEqual(['y', 'z'], expansion_cache.get(second, '${a}, z'))
+        self.assertEqual(['x, z', 'y, z'], parsed)
+        self.assertEqual(1, expansion_cache.hits)
+        self.assertEqual(2, expansion_cache.misses)
+
+
+if __name__ == "__main__":
+    unittest.main()
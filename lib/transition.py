@@ -0,0 +1,248 @@
+﻿"""Planning of transitions: rebuilding the packages affected by a change.
+
+When a library changes its SONAME, every source package that build-depends
+on the library, or whose binaries depend on it, must be rebuilt, and a
+package can only be rebuilt after the packages it build-depends on. A
+TransitionPlanner keeps the reverse dependencies of an archive's binary
+packages, and plans a transition by walking from the changed binaries to the
+affected sources and ordering them into stages of sources that can be built
+in parallel.
+
+The reverse dependencies are updated one source package at a time, so an
+upload only touches the edges of that package. Plans are cached, and an
+update only invalidates the plans it could change.
+
+Example use:
+    planner = TransitionPlanner()
+    for source in sources:
+        planner.add_source(source)
+    transition = planner.plan(['libfoo1'])
+    for stage in transition.stages:
+        queue_builds(stage)
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import itertools
+
+
+class DependencyCycleError(ValueError):
+    """Raised if the affected packages build-depend on each other in a loop.
+
+    Attributes:
+        cycle: The names of the source packages in the cycle, in build
+            dependency order, starting from the alphabetically first.
+    """
+    def __init__(self, cycle):
+        ValueError.__init__(self, cycle)
+        self.cycle = cycle
+
+    def __str__(self):
+        return 'Build dependency cycle: %s' % ' -> '.join(
+            self.cycle + self.cycle[:1])
+
+
+def _relation_names(relations):
+    """Get the package names in relations, including alternatives."""
+    names = set()
+    for relation in relations:
+        for alternative in itertools.chain([relation],
+                                           relation.alternatives):
+            names.add(alternative.name.split(':', 1)[0])
+    return names
+
+
+# The edges of a source package in the dependency graph. Each is a frozenset
+# of binary package names.
+_Source = collections.namedtuple('_Source',
+                                 ['binaries', 'build_depends', 'depends'])
+
+
+class Transition(object):
+    """A planned transition.
+
+    Attributes:
+        binaries: The changed binary packages, as a frozenset of names.
+        affected: The names of the source packages to rebuild, as a
+            frozenset.
+        stages: A list of lists of source package names. Each stage only
+            build-depends on packages in earlier stages, so the sources in a
+            stage can be built in parallel. Names in a stage are sorted.
+    """
+    def __init__(self, binaries, affected, stages):
+        self.binaries = binaries
+        self.affected = affected
+        self.stages = stages
+
+    def __iter__(self):
+        """Iterate over the sources in rebuild order."""
+        return itertools.chain.from_iterable(self.stages)
+
+
+class TransitionPlanner(object):
+    """The reverse dependencies of the source packages in an archive.
+
+    Build dependencies come from Build-Depends and Build-Depends-Indep, and
+    runtime dependencies from the Pre-Depends and Depends of each binary
+    package. All alternatives count, and architecture restrictions are
+    ignored, so a plan may include a few sources that don't need a rebuild
+    on every architecture.
+    """
+
+    def __init__(self):
+        self._sources = {}
+        # Binary name -> names of the sources that build it.
+        self._producers = collections.defaultdict(set)
+        # Binary name -> names of the sources that build-depend on it.
+        self._build_rdepends = collections.defaultdict(set)
+        # Binary name -> names of the sources with binaries depending on it.
+        self._rdepends = collections.defaultdict(set)
+        # (binaries, transitive) -> (Transition, names the plan looked up).
+        self._plans = {}
+
+    def __len__(self):
+        return len(self._sources)
+
+    def __contains__(self, name):
+        return name in self._sources
+
+    def _link(self, name, source, add):
+        for names, edges in ((source.binaries, self._producers),
+                             (source.build_depends, self._build_rdepends),
+                             (source.depends, self._rdepends)):
+            for binary in names:
+                if add:
+                    edges[binary].add(name)
+                else:
+                    edges[binary].discard(name)
+                    if not edges[binary]:
+                        del edges[binary]
+
+    def _invalidate(self, name, source):
+        names = source.binaries | source.build_depends | source.depends
+        for key, (transition, watched) in list(self._plans.items()):
+            if name in transition.affected or not names.isdisjoint(watched):
+                del self._plans[key]
+
+    def add_source(self, source):
+        """Add a source package, replacing any with the same name.
+
+        Args:
+            source: A SourcePackage or SourcePackage protobuf.
+        """
+        self.remove_source(source.name)
+        depends = set()
+        for binary in source.binary_packages:
+            depends |= _relation_names(itertools.chain(binary.pre_depends,
+                                                       binary.depends))
+        node = _Source(
+            frozenset(binary.name for binary in source.binary_packages),
+            frozenset(_relation_names(itertools.chain(
+                source.build_depends, source.build_depends_indep))),
+            frozenset(depends))
+        self._sources[source.name] = node
+        self._link(source.name, node, True)
+        self._invalidate(source.name, node)
+
+    def remove_source(self, name):
+        """Remove a source package, if it has been added.
+
+        Args:
+            name: The name of the source package.
+        """
+        node = self._sources.pop(name, None)
+        if node is not None:
+            self._link(name, node, False)
+            self._invalidate(name, node)
+
+    def _find_affected(self, binaries, transitive):
+        affected = set()
+        watched = set(binaries)
+        pending = list(binaries)
+        while pending:
+            binary = pending.pop()
+            for name in itertools.chain(self._build_rdepends.get(binary, ()),
+                                        self._rdepends.get(binary, ())):
+                if name in affected:
+                    continue
+                affected.add(name)
+                if transitive:
+                    new_binaries = self._sources[name].binaries - watched
+                    watched |= new_binaries
+                    pending.extend(new_binaries)
+        return affected, watched
+
+    def _find_cycle(self, dependencies):
+        """Find a cycle among sources that all have unbuilt dependencies."""
+        name = min(dependencies)
+        path = []
+        positions = {}
+        while name not in positions:
+            positions[name] = len(path)
+            path.append(name)
+            name = min(dependencies[name])
+        cycle = path[positions[name]:]
+        start = cycle.index(min(cycle))
+        # Dependencies point backwards, so reverse for build order.
+        cycle = cycle[start:] + cycle[:start]
+        return [cycle[0]] + cycle[:0:-1]
+
+    def _order(self, affected):
+        # Source -> the affected sources it build-depends on.
+        dependencies = {}
+        dependents = collections.defaultdict(set)
+        for name in affected:
+            dependencies[name] = set()
+            for binary in self._sources[name].build_depends:
+                for producer in self._producers.get(binary, ()):
+                    if producer in affected and producer != name:
+                        dependencies[name].add(producer)
+                        dependents[producer].add(name)
+        stages = []
+        ready = sorted(name for name, names in dependencies.items()
+                       if not names)
+        while ready:
+            stages.append(ready)
+            next_ready = []
+            for name in ready:
+                del dependencies[name]
+                for dependent in dependents[name]:
+                    dependencies[dependent].discard(name)
+                    if not dependencies[dependent]:
+                        next_ready.append(dependent)
+            ready = sorted(next_ready)
+        if dependencies:
+            raise DependencyCycleError(self._find_cycle(dependencies))
+        return stages
+
+    def plan(self, binaries, transitive=False):
+        """Plan the rebuilds needed after binary packages change.
+
+        Args:
+            binaries: The names of the changed binary packages, e.g. the old
+                and new names of a library whose SONAME changed.
+            transitive: If true, the binaries of every affected source are
+                treated as changed too, so their reverse dependencies are
+                rebuilt as well.
+        Returns:
+            A Transition. Sources that build the changed binaries are not
+            included, since they are what changed.
+        Raises:
+            DependencyCycleError: Some affected sources build-depend on each
+                other in a cycle, so they can't all be rebuilt in order.
+        """
+        key = (frozenset(binaries), transitive)
+        cached = self._plans.get(key)
+        if cached is not None:
+            return cached[0]
+        affected, watched = self._find_affected(key[0], transitive)
+        for binary in key[0]:
+            affected.difference_update(self._producers.get(binary, ()))
+        transition = Transition(key[0], frozenset(affected),
+                                self._order(affected))
+        self._plans[key] = (transition, watched)
+        return transition
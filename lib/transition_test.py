@@ -0,0 +1,98 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for transition module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import unittest
+
+from debalot.lib import debian_package
+from debalot.lib import debian_package_pb2 as pb
+from debalot.lib import transition
+
+
+def source(name, binaries, build_depends='', depends=''):
+    package = pb.SourcePackage(name=name)
+    package.build_depends.extend(
+        debian_package.Relation.parse_relations(build_depends))
+    for binary_name in binaries:
+        binary = package.binary_packages.add(name=binary_name,
+                                             architecture='any')
+        binary.depends.extend(
+            debian_package.Relation.parse_relations(depends))
+    return package
+
+
+class TestTransitionPlanner(unittest.TestCase):
+    def setUp(self):
+        self.planner = transition.TransitionPlanner()
+        for package in (
+                source('foo', ['libfoo2', 'libfoo-dev'], 'debhelper'),
+                source('bar', ['libbar1', 'libbar-dev'],
+                       'debhelper, libfoo-dev (>= 2)', 'libfoo2'),
+                source('baz', ['baz'], 'libbar-dev, libfoo-dev',
+                       'libbar1, libfoo2'),
+                source('qux', ['qux'], 'debhelper', 'libfoo1 | libfoo2'),
+                source('quux', ['quux'], 'baz:native', 'baz'),
+                source('debhelper', ['debhelper'])):
+            self.planner.add_source(package)
+
+    def test_plan(self):
+        plan = self.planner.plan(['libfoo2', 'libfoo-dev'])
+        self.assertEqual(frozenset(['bar', 'baz', 'qux']), plan.affected)
+        self.assertEqual([['bar', 'qux'], ['baz']], plan.stages)
+        self.assertEqual(['bar', 'qux', 'baz'], list(plan))
+
+    def test_plan_transitive(self):
+        plan = self.planner.plan(['libfoo2'], transitive=True)
+        self.assertEqual([['bar', 'qux'], ['baz'], ['quux']], plan.stages)
+
+    def test_plan_nothing_affected(self):
+        self.assertEqual([], self.planner.plan(['unused']).stages)
+        self.assertEqual([], self.planner.plan(['quux']).stages)
+
+    def test_plan_cached(self):
+        plan = self.planner.plan(['libfoo2'])
+        self.assertIs(plan, self.planner.plan(['libfoo2']))
+        # Unrelated updates keep the plan.
+        self.planner.add_source(source('unrelated', ['unrelated'],
+                                       'debhelper'))
+        self.assertIs(plan, self.planner.plan(['libfoo2']))
+
+    def test_add_source_updates_plan(self):
+        plan = self.planner.plan(['libfoo2'])
+        self.planner.add_source(source('new', ['new'], '', 'libfoo2'))
+        updated = self.planner.plan(['libfoo2'])
+        self.assertIsNot(plan, updated)
+        self.assertIn('new', updated.affected)
+        # Dropping the dependency on libfoo2 takes qux out of the plan.
+        self.planner.add_source(source('qux', ['qux'], 'debhelper', 'libc6'))
+        self.assertNotIn('qux', self.planner.plan(['libfoo2']).affected)
+
+    def test_remove_source(self):
+        self.planner.plan(['libfoo2'])
+        self.planner.remove_source('bar')
+        self.assertNotIn('bar', self.planner)
+        self.assertEqual([['baz', 'qux']],
+                         self.planner.plan(['libfoo2']).stages)
+        self.planner.remove_source('missing')
+        self.assertEqual(5, len(self.planner))
+
+    def test_cycle(self):
+        self.planner.add_source(source('debhelper', ['debhelper'],
+                                       'quux'))
+        with self.assertRaises(transition.DependencyCycleError) as context:
+            self.planner.plan(['libfoo-dev'], transitive=True)
+        self.assertEqual(['bar', 'baz', 'quux', 'debhelper'],
+                         context.exception.cycle)
+        self.assertEqual(
+            'Build dependency cycle: bar -> baz -> quux -> debhelper -> bar',
+            str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+﻿"""Validation of changelogs and control files, reporting every error.
+
+Importing a file stops at its first error. Validation parses leniently
+instead, so a single pass over a file finds all of its errors, and an
+archive-wide lint needs only one run. Each error is reported as a
+Diagnostic, and many files can be validated in parallel.
+
+Example use:
+    for diagnostic in validate_files(paths):
+        print('%s:%s: %s: %s' % (diagnostic.path, diagnostic.line,
+                                 diagnostic.error_class, diagnostic.message))
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import codecs
+import collections
+import os
+
+from debalot.lib import debian_package
+
+
+# An error found in a file. line is the line number, counting from 1, or
+# None if the error isn't on a particular line. field is e.g. 'Depends' or
+# 'urgency', or None if the error isn't in a particular field. error_class is
+# the name of the exception's class, e.g. 'UrgencyError'.
+Diagnostic = collections.namedtuple(
+    'Diagnostic', ['path', 'line', 'field', 'error_class', 'message'])
+
+
+def _message(error):
+    if isinstance(error, (debian_package.UrgencyError,
+                          debian_package.KeywordError)):
+        return '%s' % error
+    if type(error) in (ValueError, IndexError):
+        # Parsing errors pass a message and the invalid value as arguments.
+        return ' '.join('%s' % arg for arg in error.args).rstrip()
+    return ('%s' % str(error)).rstrip()
+
+
+def _diagnostics(path, errors):
+    return [Diagnostic(path, line, field, '%s' % type(error).__name__,
+                       _message(error))
+            for line, field, error in errors]
+
+
+def _field_key(field_name, name_key):
+    if field_name == 'name':
+        return name_key
+    return '-'.join(part.capitalize() for part in field_name.split('_'))
+
+
+def _missing_fields(message, name_key):
+    """Find the control fields whose required protobuf fields are unset.
+
+    Args:
+        message: A SourcePackage or BinaryPackage protobuf.
+        name_key: The control field of the name, 'Source' or 'Package'.
+    Returns:
+        A list of control field names, e.g. ['Architecture'].
+    """
+    keys = []
+    for error_path in message.FindInitializationErrors():
+        field_name = error_path.split('.')[0].split('[')[0]
+        key = _field_key(field_name, name_key)
+        if field_name != 'binary_packages' and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def validate_changelog(changelog_file, path=None):
+    """Find the errors in a changelog.
+
+    Args:
+        changelog_file: A readable unicode file object.
+        path: The path to report in the diagnostics.
+    Returns:
+        A list of Diagnostic tuples, in the order found.
+    """
+    errors = []
+    debian_package.SourcePackage().import_changelog_file(changelog_file,
+                                                         errors)
+    return _diagnostics(path, errors)
+
+
+def validate_control(control_file, path=None):
+    """Find the errors in a debian/control file.
+
+    Args:
+        control_file: A readable unicode file object.
+        path: The path to report in the diagnostics.
+    Returns:
+        A list of Diagnostic tuples, in the order found. Missing required
+        fields are reported last, with no line number.
+    """
+    errors = []
+    package = debian_package.SourcePackage()
+    package.import_control_file(control_file, errors=errors)
+    for key in _missing_fields(package._pb, 'Source'):
+        errors.append((None, key, ValueError(
+            'Missing required field in source package:', key)))
+    for number, binary_package in enumerate(package._pb.binary_packages):
+        name = binary_package.name or '#%d' % (number + 1)
+        for key in _missing_fields(binary_package, 'Package'):
+            errors.append((None, key, ValueError(
+                'Missing required field in binary package %s:' % name,
+                key)))
+    return _diagnostics(path, errors)
+
+
+_VALIDATORS = {
+    'changelog': validate_changelog,
+    'control': validate_control,
+}
+
+
+def validate_file(path):
+    """Find the errors in a changelog or control file.
+
+    The type of the file is taken from its name, which must be 'changelog'
+    or 'control'. Errors reading the file are reported as diagnostics too.
+
+    Args:
+        path: The path of the file.
+    Returns:
+        A list of Diagnostic tuples, in the order found.
+    Raises:
+        ValueError: The file's type can't be told from its name.
+    """
+    validator = _VALIDATORS.get(os.path.basename(path))
+    if validator is None:
+        raise ValueError('Not a changelog or control file:', path)
+    try:
+        with codecs.open(path, encoding='utf-8-sig') as input_file:
+            return validator(input_file, path)
+    except (EnvironmentError, UnicodeError) as error:
+        return _diagnostics(path, [(None, None, error)])
+
+
+def validate_files(paths, processes=None, chunk_size=16):
+    """Validate many changelog and control files in parallel.
+
+    Args:
+        paths: An iterable of paths, as accepted by validate_file.
+        processes: The number of worker processes. Defaults to the CPU count.
+            If 1, files are validated in this process.
+        chunk_size: The number of files sent to a worker at a time.
+    Yields:
+        The Diagnostic tuples of each file, in the order of paths.
+    Raises:
+        ValueError: A file's type can't be told from its name.
+    """
+    paths = list(paths)
+    for path in paths:
+        if os.path.basename(path) not in _VALIDATORS:
+            raise ValueError('Not a changelog or control file:', path)
+    if processes == 1:
+        for path in paths:
+            for diagnostic in validate_file(path):
+                yield diagnostic
+        return
+    import multiprocessing
+    pool = multiprocessing.Pool(processes)
+    try:
+        for diagnostics in pool.imap(validate_file, paths, chunk_size):
+            for diagnostic in diagnostics:
+                yield diagnostic
+    finally:
+        pool.terminate()
+        pool.join()
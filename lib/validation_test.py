@@ -0,0 +1,178 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for validation module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from debalot.lib import debian_package
+from debalot.lib import validation
+
+
+CHANGELOG = '''package (1.2) unstable; urgency=sometime, colour=blue
+
+  * New release.
+
+ -- Maintainer <maintainer@example.com>  Mon, 01 Feb 2021 12:00:00 +0000
+
+package (1.1) unstable; urgency=low
+
+  * Fix things.
+
+ -- Maintainer <maintainer@example.com>  not a date
+
+broken header line
+
+  * Still read.
+
+ -- Maintainer <maintainer@example.com>  Mon, 01 Feb 2021 12:00:00 +0000
+
+package (1.0) unstable; urgency=low
+
+  * Initial release.
+'''
+
+CONTROL = '''Source: hello
+Standards-Version: four
+Build-Depends: debhelper (>= 9), libfoo (>> 1
+
+Package: hello
+Architecture: any
+no colon here
+Depends: libc6 (!= 2)
+Description: example
+'''
+
+
+class TestValidate(unittest.TestCase):
+    def test_changelog(self):
+        diagnostics = validation.validate_changelog(io.StringIO(CHANGELOG),
+                                                    'changelog')
+        self.assertEqual([
+            validation.Diagnostic('changelog', 1, 'urgency', 'UrgencyError',
+                                  'Invalid package urgency: SOMETIME'),
+            validation.Diagnostic('changelog', 1, 'colour', 'KeywordError',
+                                  'Invalid changelog keyword: "colour". '
+                                  'Valid keywords are: urgency'),
+        ], diagnostics[:2])
+        # The date parser's error class depends on the dateutil version.
+        self.assertEqual(('changelog', 11, 'date'), diagnostics[2][:3])
+        self.assertEqual('Unknown string format: not a date',
+                         diagnostics[2].message)
+        self.assertEqual([
+            validation.Diagnostic('changelog', 13, 'header', 'ValueError',
+                                  'Invalid changelog header line: broken '
+                                  'header line'),
+            validation.Diagnostic('changelog', 21, 'trailer', 'ValueError',
+                                  'Changelog entry has no trailer line: 1.0'),
+        ], diagnostics[3:])
+
+    def test_keyword_without_value(self):
+        diagnostics = validation.validate_changelog(io.StringIO(
+            'hello (1.0) unstable; urgency\n\n  * Change.\n\n'
+            ' -- Maintainer <maintainer@example.com>  '
+            'Mon, 01 Feb 2021 12:00:00 +0000\n'))
+        self.assertEqual([
+            validation.Diagnostic(None, 1, 'urgency', 'UrgencyError',
+                                  'Invalid package urgency: '),
+        ], diagnostics)
+
+    def test_valid_changelog(self):
+        with io.open('lib/test_files/test_changelog',
+                     encoding='utf-8') as changelog_file:
+            self.assertEqual([], validation.validate_changelog(changelog_file))
+
+    def test_control(self):
+        diagnostics = validation.validate_control(io.StringIO(CONTROL))
+        self.assertEqual([
+            (2, 'Standards-Version', 'ValueError'),
+            (3, 'Build-Depends', 'ValueError'),
+            (7, None, 'ValueError'),
+            (8, 'Depends', 'ValueError'),
+        ], [(diagnostic.line, diagnostic.field, diagnostic.error_class)
+            for diagnostic in diagnostics])
+        self.assertEqual('Invalid relation: libfoo (>> 1',
+                         diagnostics[1].message)
+
+    def test_missing_fields(self):
+        diagnostics = validation.validate_control(io.StringIO(
+            'Maintainer: Someone <someone@example.com>\n\n'
+            'Package: bar\n\nArchitecture: all\n'))
+        self.assertEqual([
+            validation.Diagnostic(None, None, 'Source', 'ValueError',
+                                  'Missing required field in source '
+                                  'package: Source'),
+            validation.Diagnostic(None, None, 'Architecture', 'ValueError',
+                                  'Missing required field in binary '
+                                  'package bar: Architecture'),
+            validation.Diagnostic(None, None, 'Package', 'ValueError',
+                                  'Missing required field in binary '
+                                  'package #2: Package'),
+        ], diagnostics)
+
+    def test_unexpected_error(self):
+        with mock.patch.object(debian_package.BinaryPackage,
+                               '_parse_control_field',
+                               side_effect=KeyError('oops')):
+            diagnostics = validation.validate_control(io.StringIO(
+                'Source: hello\n\nPackage: hello\nArchitecture: any\n'))
+        self.assertEqual((3, 'Package', 'KeyError'), diagnostics[0][1:4])
+
+    def test_valid_control(self):
+        with io.open('lib/test_files/control',
+                     encoding='utf-8-sig') as control_file:
+            self.assertEqual([], validation.validate_control(control_file))
+
+
+class TestValidateFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='debalot_test_')
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.paths = []
+        for name in ('a', 'b', 'c'):
+            os.mkdir(os.path.join(self.directory, name))
+        for name, text in (('a/changelog', CHANGELOG), ('b/control', CONTROL),
+                           ('c/changelog', ''), ('c/control', '')):
+            path = os.path.join(self.directory, name)
+            with io.open(path, 'w', encoding='utf-8') as output:
+                output.write(text)
+            self.paths.append(path)
+
+    def test_validate_files(self):
+        serial = list(validation.validate_files(self.paths, processes=1))
+        self.assertEqual(serial,
+                         list(validation.validate_files(self.paths,
+                                                        processes=2,
+                                                        chunk_size=1)))
+        self.assertEqual([self.paths[0]] * 5 + [self.paths[1]] * 4 +
+                         [self.paths[3]],
+                         [diagnostic.path for diagnostic in serial])
+
+    def test_unreadable_file(self):
+        path = os.path.join(self.directory, 'c', 'control')
+        with io.open(path, 'wb') as output:
+            output.write(b'Source: \xff\n')
+        diagnostics = validation.validate_file(path)
+        self.assertEqual(1, len(diagnostics))
+        self.assertEqual((path, None, None, 'UnicodeDecodeError'),
+                         diagnostics[0][:4])
+
+    def test_unknown_file(self):
+        self.assertRaises(ValueError, validation.validate_file, 'README')
+        self.assertRaises(ValueError, list,
+                          validation.validate_files(self.paths + ['README']))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+﻿"""Debian package version comparison.
+
+Versions have the form [epoch:]upstream_version[-debian_revision] and are
+compared as described in the Debian Policy Manual, section 5.6.12:
+https://www.debian.org/doc/debian-policy/ch-controlfields.html#version
+
+Example use:
+    compare_versions('1.0-1', '1.0~rc1-1')  # 1
+    sorted(versions, key=sort_key)
+    satisfies('2.0', Relation.LATER_OR_EQUAL, '1.9')  # True
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import functools
+
+from debalot.lib import debian_package_pb2 as pb
+
+
+def parse_version(version):
+    """Split a version into its epoch, upstream version and revision.
+
+    Args:
+        version: A version string.
+    Returns:
+        A tuple of the integer epoch, the upstream version string and the
+        Debian revision string. Missing parts are 0 and '' respectively.
+    Raises:
+        ValueError: The epoch is not a number.
+    """
+    version = version.strip()
+    epoch = 0
+    if ':' in version:
+        epoch, version = version.split(':', 1)
+        epoch = int(epoch)
+    if '-' in version:
+        upstream, revision = version.rsplit('-', 1)
+    else:
+        upstream, revision = version, ''
+    return epoch, upstream, revision
+
+
+def _order(character):
+    """Get the sort weight of a non-digit character.
+
+    A tilde sorts before anything, even the end of the string, and letters
+    sort before all other characters.
+    """
+    if character == '~':
+        return -1
+    if character.isalpha():
+        return ord(character)
+    return ord(character) + 256
+
+
+def _compare_part(first, second):
+    """Compare two upstream versions or revisions as dpkg does."""
+    i = j = 0
+    while i < len(first) or j < len(second):
+        # Compare the non-digit prefixes character by character.
+        while ((i < len(first) and not first[i].isdigit()) or
+               (j < len(second) and not second[j].isdigit())):
+            first_order = (_order(first[i]) if i < len(first) and
+                           not first[i].isdigit() else 0)
+            second_order = (_order(second[j]) if j < len(second) and
+                            not second[j].isdigit() else 0)
+            if first_order != second_order:
+                return -1 if first_order < second_order else 1
+            i += 1
+            j += 1
+        # Then compare the following runs of digits numerically.
+        start = i
+        while i < len(first) and first[i].isdigit():
+            i += 1
+        first_number = int(first[start:i] or 0)
+        start = j
+        while j < len(second) and second[j].isdigit():
+            j += 1
+        second_number = int(second[start:j] or 0)
+        if first_number != second_number:
+            return -1 if first_number < second_number else 1
+    return 0
+
+
+def compare_versions(first, second):
+    """Compare two Debian package versions.
+
+    Args:
+        first: A version string.
+        second: A version string.
+    Returns:
+        A negative number if first is earlier than second, zero if they are
+        equal and a positive number if first is later.
+    """
+    first_epoch, first_upstream, first_revision = parse_version(first)
+    second_epoch, second_upstream, second_revision = parse_version(second)
+    if first_epoch != second_epoch:
+        return -1 if first_epoch < second_epoch else 1
+    return (_compare_part(first_upstream, second_upstream) or
+            _compare_part(first_revision, second_revision))
+
+
+# A key function for sorting versions, e.g. sorted(versions, key=sort_key).
+sort_key = functools.cmp_to_key(compare_versions)
+
+
+_RELATIONSHIP_TESTS = {
+    pb.Relation.STRICTLY_EARLIER: lambda result: result < 0,
+    pb.Relation.EARLIER_OR_EQUAL: lambda result: result <= 0,
+    pb.Relation.EQUAL: lambda result: result == 0,
+    pb.Relation.LATER_OR_EQUAL: lambda result: result >= 0,
+    pb.Relation.STRICTLY_LATER: lambda result: result > 0,
+}
+
+
+def satisfies(version, relationship, required_version):
+    """Check whether a version satisfies a versioned relation.
+
+    Args:
+        version: The version string of the candidate package.
+        relationship: A Relation.Relationship enum value.
+        required_version: The version string in the relation.
+    Returns:
+        True if, for example, version >= required_version when relationship
+        is LATER_OR_EQUAL.
+    """
+    return _RELATIONSHIP_TESTS[relationship](
+        compare_versions(version, required_version))
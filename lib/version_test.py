@@ -0,0 +1,82 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for version module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import unittest
+
+from debalot.lib import debian_package_pb2
+from debalot.lib import version
+
+
+class TestParseVersion(unittest.TestCase):
+    def test_full_version(self):
+        self.assertEqual((1, '2.0-rc1', '3ubuntu1'),
+                         version.parse_version('1:2.0-rc1-3ubuntu1'))
+
+    def test_native_version(self):
+        self.assertEqual((0, '2.0', ''), version.parse_version('2.0'))
+
+    def test_invalid_epoch(self):
+        self.assertRaises(ValueError, version.parse_version, 'a:1.0')
+
+
+class TestCompareVersions(unittest.TestCase):
+    def assert_order(self, *versions):
+        for earlier, later in zip(versions, versions[1:]):
+            self.assertLess(version.compare_versions(earlier, later), 0,
+                            (earlier, later))
+            self.assertGreater(version.compare_versions(later, earlier), 0,
+                               (later, earlier))
+
+    def test_equal(self):
+        self.assertEqual(0, version.compare_versions('1.0-1', '1.0-1'))
+        self.assertEqual(0, version.compare_versions('0:1.0', '1.0'))
+        self.assertEqual(0, version.compare_versions('1.0', '1.00'))
+
+    def test_numeric(self):
+        self.assert_order('1.2', '1.9', '1.10', '2')
+
+    def test_tilde(self):
+        self.assert_order('1.0~rc1', '1.0~rc1+b1', '1.0', '1.0+b1')
+        self.assert_order('1.0~~', '1.0~', '1.0')
+
+    def test_letters_before_symbols(self):
+        self.assert_order('1.0a', '1.0+', '1.0.1')
+
+    def test_revision(self):
+        self.assert_order('1.0-1', '1.0-1ubuntu1', '1.0-2', '1.1-1')
+
+    def test_epoch(self):
+        self.assert_order('9.9', '1:0.1', '2:0.0')
+
+    def test_sort_key(self):
+        self.assertEqual(['1.0~rc1', '1.0', '1.0-1', '1:0.1'],
+                         sorted(['1:0.1', '1.0-1', '1.0', '1.0~rc1'],
+                                key=version.sort_key))
+
+
+class TestSatisfies(unittest.TestCase):
+    def test_relationships(self):
+        relation = debian_package_pb2.Relation
+        self.assertTrue(version.satisfies('1.0', relation.STRICTLY_EARLIER,
+                                          '1.1'))
+        self.assertFalse(version.satisfies('1.1', relation.STRICTLY_EARLIER,
+                                           '1.1'))
+        self.assertTrue(version.satisfies('1.1', relation.EARLIER_OR_EQUAL,
+                                          '1.1'))
+        self.assertTrue(version.satisfies('1.1', relation.EQUAL, '1.1'))
+        self.assertFalse(version.satisfies('1.1', relation.EQUAL, '1.1-1'))
+        self.assertTrue(version.satisfies('1.1', relation.LATER_OR_EQUAL,
+                                          '1.1~'))
+        self.assertFalse(version.satisfies('1.1', relation.STRICTLY_LATER,
+                                           '1.1'))
+
+
+if __name__ == "__main__":
+    unittest.main()
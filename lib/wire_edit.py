@@ -0,0 +1,439 @@
+﻿"""Editing of serialized protobufs without decoding them.
+
+A single-file SourcePackage may be gigabytes in size, nearly all of it in
+original_tarball and misc_files. Parsing and reserializing the whole package
+to add a changelog entry is therefore very wasteful. The functions here work
+directly on the serialized bytes, only skipping over the fields they don't
+touch.
+
+They rely on two properties of the protobuf wire format:
+- Concatenating two serialized messages is the same as merging them, so a
+  repeated field can be extended by appending the encoded new elements.
+- When a singular scalar field occurs more than once, the last occurrence
+  wins, so a scalar field can be set by appending the encoded new value.
+Setting a singular message field by appending merges into the old value
+instead of replacing it, so replace_field removes the old occurrences first.
+
+For a message stored in a file, removing a field from the middle would mean
+moving everything after it, including the tarball. replace_field_in_file
+instead overwrites the old occurrences in place with filler values of a
+singular string field that is set again later in the file, so the filler is
+superseded, and compact drops it the next time the message is rewritten.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+
+from google.protobuf import descriptor
+
+from debalot.lib import record_file
+
+
+_WIRE_VARINT = 0
+_WIRE_FIXED64 = 1
+_WIRE_LENGTH_DELIMITED = 2
+_WIRE_FIXED32 = 5
+# A tag and a length are each at most 10 bytes long.
+_MAX_HEADER_SIZE = 20
+_CHUNK_SIZE = 1024 * 1024
+# The largest value of a filler field that is copied to set it again after
+# the filler. A larger field, such as original_tarball, is not used.
+_MAX_FILLER_COPY_SIZE = 64 * 1024
+
+
+def _skip_field(data, position):
+    """Find the end of the field starting at a position.
+
+    Returns:
+        A tuple of the field's tag and the position just after the field,
+        which may be past the end of data if the field's contents are not in
+        it.
+    """
+    tag, position = record_file.decode_varint(data, position)
+    wire_type = tag & 7
+    if wire_type == _WIRE_VARINT:
+        _, position = record_file.decode_varint(data, position)
+    elif wire_type == _WIRE_FIXED64:
+        position += 8
+    elif wire_type == _WIRE_LENGTH_DELIMITED:
+        size, position = record_file.decode_varint(data, position)
+        position += size
+    elif wire_type == _WIRE_FIXED32:
+        position += 4
+    else:
+        raise ValueError('Unsupported wire type:', wire_type)
+    return tag, position
+
+
+def iter_fields(data):
+    """Iterate over the top-level fields of a serialized message.
+
+    Length-delimited fields are skipped over using their length; their
+    contents are not decoded.
+
+    Args:
+        data: A byte string containing a serialized message.
+    Yields:
+        A tuple of (field number, start, end) for each field, where
+        data[start:end] is the complete encoded field, including its tag.
+    Raises:
+        ValueError: The data is not a valid serialized message.
+    """
+    position = 0
+    length = len(data)
+    while position < length:
+        start = position
+        tag, position = _skip_field(data, position)
+        if position > length:
+            raise ValueError('Truncated field:', tag >> 3)
+        yield (tag >> 3, start, position)
+
+
+def iter_file_fields(input_file):
+    """Iterate over the top-level fields of a message stored in a file.
+
+    Only the tag and length of each field are read. The contents of
+    length-delimited fields are skipped over by seeking, so large bytes
+    fields are never read.
+
+    Args:
+        input_file: A seekable binary file object containing a serialized
+            message and nothing else.
+    Yields:
+        A tuple of (field number, start, end) for each field, where start
+        and end are offsets in the file.
+    Raises:
+        ValueError: The file does not contain a valid serialized message.
+    """
+    input_file.seek(0, os.SEEK_END)
+    length = input_file.tell()
+    position = 0
+    while position < length:
+        input_file.seek(position)
+        tag, size = _skip_field(input_file.read(_MAX_HEADER_SIZE), 0)
+        if position + size > length:
+            raise ValueError('Truncated field:', tag >> 3)
+        yield (tag >> 3, position, position + size)
+        position += size
+
+
+def _field(message_class, field_name):
+    return message_class.DESCRIPTOR.fields_by_name[field_name]
+
+
+def encode_field(message_class, field_name, value):
+    """Encode a value of a field.
+
+    Args:
+        message_class: The protobuf message class containing the field.
+        field_name: The name of the field.
+        value: The value. For a repeated field, this is a single element.
+    Returns:
+        A byte string containing the encoded field.
+    """
+    field = _field(message_class, field_name)
+    message = message_class()
+    if field.label == descriptor.FieldDescriptor.LABEL_REPEATED:
+        if field.type == descriptor.FieldDescriptor.TYPE_MESSAGE:
+            getattr(message, field_name).add().CopyFrom(value)
+        else:
+            getattr(message, field_name).append(value)
+    elif field.type == descriptor.FieldDescriptor.TYPE_MESSAGE:
+        getattr(message, field_name).CopyFrom(value)
+    else:
+        setattr(message, field_name, value)
+    return message.SerializePartialToString()
+
+
+def get_field(data, message_class, field_name):
+    """Get the value of a field from a serialized message.
+
+    Only the occurrences of the requested field are decoded.
+
+    Args:
+        data: A byte string containing a serialized message_class.
+        message_class: The protobuf message class of the data.
+        field_name: The name of the field.
+    Returns:
+        The value of the field, or None if a singular field is not set.
+    """
+    field = _field(message_class, field_name)
+    message = message_class()
+    message.MergeFromString(b''.join(
+        data[start:end] for number, start, end in iter_fields(data)
+        if number == field.number))
+    if (field.label != descriptor.FieldDescriptor.LABEL_REPEATED and
+            not message.HasField(field_name)):
+        return None
+    return getattr(message, field_name)
+
+
+def append_field(data, message_class, field_name, value):
+    """Append an element to a repeated field, or set a singular scalar field.
+
+    The existing data is not decoded at all.
+
+    Args:
+        data: A byte string containing a serialized message_class.
+        message_class: The protobuf message class of the data.
+        field_name: The name of the field.
+        value: The element to append or value to set.
+    Returns:
+        A byte string containing the modified message.
+    Raises:
+        ValueError: The field is a singular message field, which would be
+            merged rather than set by appending.
+    """
+    _check_appendable(message_class, field_name)
+    return data + encode_field(message_class, field_name, value)
+
+
+def append_field_to_file(path, message_class, field_name, value):
+    """Append an element to a repeated field of a message stored in a file,
+    or set a singular scalar field.
+
+    This writes only the encoded value to the end of the file, however large
+    the file is.
+
+    Args:
+        path: The path of a file containing a serialized message_class.
+        message_class: The protobuf message class of the data.
+        field_name: The name of the field.
+        value: The element to append or value to set.
+    Raises:
+        ValueError: The field is a singular message field.
+    """
+    _check_appendable(message_class, field_name)
+    encoded = encode_field(message_class, field_name, value)
+    with open(path, 'ab') as output_file:
+        output_file.write(encoded)
+
+
+def _check_appendable(message_class, field_name):
+    field = _field(message_class, field_name)
+    if (field.label != descriptor.FieldDescriptor.LABEL_REPEATED and
+            field.type == descriptor.FieldDescriptor.TYPE_MESSAGE):
+        raise ValueError('Appending to a singular message field merges '
+                         'rather than replaces it. Use replace_field.',
+                         field_name)
+
+
+def replace_field(data, message_class, field_name, value=None):
+    """Replace all occurrences of a field in a serialized message.
+
+    Every other field is copied as encoded bytes without being decoded, but
+    the whole message is copied. For a large message stored in a file, use
+    replace_field_in_file.
+
+    Args:
+        data: A byte string containing a serialized message_class.
+        message_class: The protobuf message class of the data.
+        field_name: The name of the field.
+        value: The new value. For a repeated field, this is a list of
+            elements. If None, the field is cleared.
+    Returns:
+        A byte string containing the modified message.
+    """
+    field = _field(message_class, field_name)
+    kept = [data[start:end] for number, start, end in iter_fields(data)
+            if number != field.number]
+    kept.append(_encode_value(message_class, field_name, value))
+    return b''.join(kept)
+
+
+def _encode_value(message_class, field_name, value):
+    if value is None:
+        return b''
+    field = _field(message_class, field_name)
+    if field.label == descriptor.FieldDescriptor.LABEL_REPEATED:
+        return b''.join(encode_field(message_class, field_name, element)
+                        for element in value)
+    return encode_field(message_class, field_name, value)
+
+
+def _find_runs(fields, number):
+    """Find the consecutive occurrences of a field.
+
+    Returns:
+        A list of (start, end) tuples, one for each run of occurrences.
+    """
+    runs = []
+    for field_number, start, end in fields:
+        if field_number != number:
+            continue
+        if runs and runs[-1][1] == start:
+            runs[-1] = (runs[-1][0], end)
+        else:
+            runs.append((start, end))
+    return runs
+
+
+def _find_filler_field(message_class, fields, number, runs):
+    """Choose the field whose superseded values can fill removed runs.
+
+    Returns:
+        A tuple of the filler field's tag and the (start, end) of its last
+        occurrence, or None if no field is suitable. The field is a set,
+        singular string or bytes field other than the one being replaced,
+        with a tag short enough to fill every run. If its last occurrence
+        is before the last run, it has to be copied to the end, so a field
+        whose last occurrence is larger than _MAX_FILLER_COPY_SIZE isn't
+        used. Of the rest, the one needing the least copying is chosen.
+    """
+    last = {}
+    for field_number, start, end in fields:
+        last[field_number] = (start, end)
+    best = None
+    best_copy_size = None
+    for field in message_class.DESCRIPTOR.fields:
+        if (field.number == number or field.number not in last or
+                field.label == descriptor.FieldDescriptor.LABEL_REPEATED or
+                field.type not in (descriptor.FieldDescriptor.TYPE_STRING,
+                                   descriptor.FieldDescriptor.TYPE_BYTES)):
+            continue
+        tag = record_file.encode_varint(
+            field.number << 3 | _WIRE_LENGTH_DELIMITED)
+        if any(end - start < len(tag) + 1 for start, end in runs):
+            continue
+        start, end = last[field.number]
+        copy_size = end - start if runs and start < runs[-1][0] else 0
+        if copy_size > _MAX_FILLER_COPY_SIZE:
+            continue
+        if best is None or copy_size < best_copy_size:
+            best = (tag, (start, end))
+            best_copy_size = copy_size
+    return best
+
+
+def _write_filler(output_file, tag, size):
+    """Write occurrences of a field taking up exactly size bytes."""
+    while size:
+        for length_size in range(1, 11):
+            length = size - len(tag) - length_size
+            if (length >= 0 and
+                    len(record_file.encode_varint(length)) == length_size):
+                break
+        else:
+            # No length fits exactly at a varint size boundary, so write an
+            # empty value and fill the rest with the next one.
+            length = 0
+        output_file.write(tag + record_file.encode_varint(length))
+        size -= len(tag) + len(record_file.encode_varint(length)) + length
+        while length:
+            chunk = min(length, _CHUNK_SIZE)
+            output_file.write(b' ' * chunk)
+            length -= chunk
+
+
+def _move_fields(data_file, fields, number, position):
+    """Move the fields after a position down over removed occurrences.
+
+    Returns:
+        The position just after the last field moved.
+    """
+    for field_number, start, end in fields:
+        if field_number == number or start < position:
+            continue
+        while start < end:
+            data_file.seek(start)
+            chunk = data_file.read(min(end - start, _CHUNK_SIZE))
+            data_file.seek(position)
+            data_file.write(chunk)
+            start += len(chunk)
+            position += len(chunk)
+    return position
+
+
+def replace_field_in_file(path, message_class, field_name, value=None):
+    """Replace all occurrences of a field in a message stored in a file.
+
+    Only the tags and lengths of the fields are read, and only the old
+    occurrences and the new value are written, however large the file is: a
+    new scalar value is appended, and old occurrences are overwritten in
+    place with filler (see the module docstring) or truncated if they are at
+    the end of the file. If the message has no field suitable for filler,
+    the fields after the first old occurrence are moved instead. A large
+    field such as original_tarball is never used as filler, since that
+    could mean copying it.
+
+    Args:
+        path: The path of a file containing a serialized message_class.
+        message_class: The protobuf message class of the data.
+        field_name: The name of the field.
+        value: The new value. For a repeated field, this is a list of
+            elements. If None, the field is cleared.
+    Raises:
+        ValueError: The file does not contain a valid serialized message.
+    """
+    field = _field(message_class, field_name)
+    encoded = _encode_value(message_class, field_name, value)
+    with open(path, 'r+b') as data_file:
+        fields = list(iter_file_fields(data_file))
+        end = fields[-1][2] if fields else 0
+        runs = _find_runs(fields, field.number)
+        if (value is not None and
+                field.label != descriptor.FieldDescriptor.LABEL_REPEATED and
+                field.type != descriptor.FieldDescriptor.TYPE_MESSAGE):
+            # The appended value supersedes the old ones.
+            runs = []
+        if runs and runs[-1][1] == end:
+            end = runs.pop()[0]
+        filler = _find_filler_field(message_class, fields, field.number,
+                                    runs)
+        if runs and filler is None:
+            end = _move_fields(data_file, fields, field.number, runs[0][0])
+        elif runs:
+            tag, (last_start, last_end) = filler
+            for start, run_end in runs:
+                data_file.seek(start)
+                _write_filler(data_file, tag, run_end - start)
+            if last_start < runs[-1][0]:
+                # Set the filler field's value again after the filler.
+                data_file.seek(last_start)
+                encoded = data_file.read(last_end - last_start) + encoded
+        data_file.seek(end)
+        data_file.write(encoded)
+        data_file.truncate()
+
+
+def clear_field(data, message_class, field_name):
+    """Remove all occurrences of a field from a serialized message.
+
+    Args:
+        data: A byte string containing a serialized message_class.
+        message_class: The protobuf message class of the data.
+        field_name: The name of the field.
+    Returns:
+        A byte string containing the modified message.
+    """
+    return replace_field(data, message_class, field_name)
+
+
+def compact(data, message_class):
+    """Remove superseded occurrences of singular scalar fields.
+
+    After many appended updates to a scalar field, only its last occurrence
+    matters. This drops the others, again without decoding other fields.
+
+    Args:
+        data: A byte string containing a serialized message_class.
+        message_class: The protobuf message class of the data.
+    Returns:
+        A byte string containing the compacted message.
+    """
+    scalar_numbers = set(
+        field.number for field in message_class.DESCRIPTOR.fields
+        if field.label != descriptor.FieldDescriptor.LABEL_REPEATED and
+        field.type != descriptor.FieldDescriptor.TYPE_MESSAGE)
+    fields = list(iter_fields(data))
+    last = {}
+    for index, (number, _, _) in enumerate(fields):
+        if number in scalar_numbers:
+            last[number] = index
+    return b''.join(
+        data[start:end] for index, (number, start, end) in enumerate(fields)
+        if number not in last or last[number] == index)
@@ -0,0 +1,266 @@
+﻿#!/usr/bin/python
+# -*- coding:utf-8 -*-
+
+"""Tests for wire_edit module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import tempfile
+import unittest
+
+from debalot.lib.test_files import test_data
+from debalot.lib import debian_package_pb2
+from debalot.lib import wire_edit
+
+
+class TestWireEdit(unittest.TestCase):
+    def setUp(self):
+        self.package = debian_package_pb2.SourcePackage()
+        self.package.CopyFrom(test_data.SourcePackage.SOURCE_PACKAGE)
+        self.package.section = 'oldlibs'
+        self.package.maintainer.name = 'Some Maintainer'
+        self.package.maintainer.email = 'maintainer@example.org'
+        self.package.original_tarball = b'\x00\xff' * 10000
+        misc_file = self.package.misc_files.add()
+        misc_file.name = 'debian.patch'
+        misc_file.contents = b'patch'
+        self.data = self.package.SerializeToString()
+        self.change = debian_package_pb2.Change()
+        self.change.version = '0.0.4'
+        self.change.urgency = debian_package_pb2.LOW
+
+    def parse(self, data):
+        package = debian_package_pb2.SourcePackage()
+        package.ParseFromString(data)
+        return package
+
+    def test_iter_fields(self):
+        fields = list(wire_edit.iter_fields(self.data))
+        self.assertEqual(len(self.data), fields[-1][2])
+        self.assertEqual(
+            [1, 3, 11, 11, 11, 11, 19, 20],
+            sorted(number for number, _, _ in fields if number != 2))
+
+    def test_iter_fields_truncated(self):
+        with self.assertRaises(ValueError):
+            list(wire_edit.iter_fields(self.data[:-1]))
+
+    def test_append_repeated(self):
+        data = wire_edit.append_field(
+            self.data, debian_package_pb2.SourcePackage, 'changelog',
+            self.change)
+        self.assertTrue(data.startswith(self.data))
+        self.package.changelog.add().CopyFrom(self.change)
+        self.assertEqual(self.package, self.parse(data))
+
+    def test_append_scalar(self):
+        data = wire_edit.append_field(
+            self.data, debian_package_pb2.SourcePackage, 'section', 'libs')
+        self.assertEqual('libs', self.parse(data).section)
+
+    def test_append_singular_message(self):
+        with self.assertRaises(ValueError):
+            wire_edit.append_field(
+                self.data, debian_package_pb2.SourcePackage, 'maintainer',
+                self.package.maintainer)
+
+    def test_replace_field(self):
+        maintainer = self.package.maintainer.__class__()
+        maintainer.name = 'New Maintainer'
+        maintainer.email = 'new@example.org'
+        data = wire_edit.replace_field(
+            self.data, debian_package_pb2.SourcePackage, 'maintainer',
+            maintainer)
+        self.package.maintainer.CopyFrom(maintainer)
+        self.assertEqual(self.package, self.parse(data))
+
+    def test_replace_repeated(self):
+        data = wire_edit.replace_field(
+            self.data, debian_package_pb2.SourcePackage, 'changelog',
+            [self.change])
+        self.assertEqual([self.change], list(self.parse(data).changelog))
+        self.assertEqual(self.package.original_tarball,
+                         self.parse(data).original_tarball)
+
+    def test_clear_field(self):
+        data = wire_edit.clear_field(
+            self.data, debian_package_pb2.SourcePackage, 'original_tarball')
+        self.package.ClearField('original_tarball')
+        self.assertEqual(self.package, self.parse(data))
+
+    def test_get_field(self):
+        self.assertEqual('oldlibs', wire_edit.get_field(
+            self.data, debian_package_pb2.SourcePackage, 'section'))
+        self.assertIsNone(wire_edit.get_field(
+            self.data, debian_package_pb2.SourcePackage, 'homepage'))
+        self.assertEqual(list(self.package.changelog), list(
+            wire_edit.get_field(self.data, debian_package_pb2.SourcePackage,
+                                'changelog')))
+
+    def test_compact(self):
+        data = self.data
+        for section in ('a', 'b', 'c'):
+            data = wire_edit.append_field(
+                data, debian_package_pb2.SourcePackage, 'section', section)
+        compacted = wire_edit.compact(data, debian_package_pb2.SourcePackage)
+        self.assertEqual(self.parse(data), self.parse(compacted))
+        self.assertEqual(len(self.data) - len('oldlibs') + len('c'),
+                         len(compacted))
+
+    def test_append_field_to_file(self):
+        handle, path = tempfile.mkstemp(prefix='debalot_test_')
+        with os.fdopen(handle, 'wb') as output:
+            output.write(self.data)
+        try:
+            wire_edit.append_field_to_file(
+                path, debian_package_pb2.SourcePackage, 'changelog',
+                self.change)
+            with open(path, 'rb') as input_file:
+                package = self.parse(input_file.read())
+        finally:
+            os.remove(path)
+        self.assertEqual(self.change, package.changelog[-1])
+
+    def write_file(self, data):
+        handle, path = tempfile.mkstemp(prefix='debalot_test_')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'wb') as output:
+            output.write(data)
+        return path
+
+    def read_file(self, path, message_class=debian_package_pb2.SourcePackage):
+        message = message_class()
+        with open(path, 'rb') as input_file:
+            message.ParseFromString(input_file.read())
+        return message
+
+    def replace_in_file(self, path, field_name, value=None):
+        """Call replace_field_in_file, counting the bytes it reads."""
+        bytes_read = [0]
+
+        class CountingFile(object):
+            def __init__(self, data_file):
+                self._file = data_file
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                self._file.close()
+
+            def __getattr__(self, name):
+                return getattr(self._file, name)
+
+            def read(self, size=-1):
+                data = self._file.read(size)
+                bytes_read[0] += len(data)
+                return data
+
+        wire_edit.open = lambda *args: CountingFile(open(*args))
+        try:
+            wire_edit.replace_field_in_file(
+                path, debian_package_pb2.SourcePackage, field_name, value)
+        finally:
+            del wire_edit.open
+        return bytes_read[0]
+
+    def test_iter_file_fields(self):
+        path = self.write_file(self.data)
+        with open(path, 'rb') as input_file:
+            self.assertEqual(list(wire_edit.iter_fields(self.data)),
+                             list(wire_edit.iter_file_fields(input_file)))
+        path = self.write_file(self.data[:-1])
+        with open(path, 'rb') as input_file:
+            with self.assertRaises(ValueError):
+                list(wire_edit.iter_file_fields(input_file))
+
+    def test_replace_field_in_file_repeated(self):
+        path = self.write_file(self.data)
+        bytes_read = self.replace_in_file(path, 'changelog', [self.change])
+        self.assertLess(bytes_read, len(self.package.original_tarball))
+        del self.package.changelog[:]
+        self.package.changelog.add().CopyFrom(self.change)
+        self.assertEqual(self.package, self.read_file(path))
+        # The filler is dropped by compaction.
+        with open(path, 'rb') as input_file:
+            compacted = wire_edit.compact(input_file.read(),
+                                          debian_package_pb2.SourcePackage)
+        self.assertEqual(len(self.package.SerializeToString()),
+                         len(compacted))
+
+    def test_replace_field_in_file_scalar(self):
+        path = self.write_file(self.data)
+        bytes_read = self.replace_in_file(path, 'section', 'libs')
+        self.assertLess(bytes_read, len(self.package.original_tarball))
+        self.package.section = 'libs'
+        self.assertEqual(self.package, self.read_file(path))
+
+    def test_replace_field_in_file_message(self):
+        path = self.write_file(self.data)
+        maintainer = self.package.maintainer.__class__()
+        maintainer.name = 'New Maintainer'
+        self.replace_in_file(path, 'maintainer', maintainer)
+        self.package.maintainer.CopyFrom(maintainer)
+        self.assertEqual(self.package, self.read_file(path))
+
+    def test_clear_field_in_file(self):
+        path = self.write_file(self.data)
+        self.replace_in_file(path, 'section')
+        self.replace_in_file(path, 'misc_files')
+        self.package.ClearField('section')
+        self.package.ClearField('misc_files')
+        self.assertEqual(self.package, self.read_file(path))
+        # The misc files were at the end, so they were truncated.
+        with open(path, 'rb') as input_file:
+            self.assertNotIn(b'debian.patch', input_file.read())
+
+    def test_replace_field_in_file_without_filler(self):
+        # StandardsVersion has no string field, so fields are moved instead.
+        version = debian_package_pb2.SourcePackage.StandardsVersion(
+            major_version=4, minor_version=5, major_patch=1, minor_patch=2)
+        path = self.write_file(version.SerializeToString())
+        wire_edit.replace_field_in_file(
+            path, version.__class__, 'major_patch')
+        version.ClearField('major_patch')
+        self.assertEqual(version, self.read_file(path, version.__class__))
+        self.assertEqual(len(version.SerializeToString()),
+                         os.path.getsize(path))
+
+    def test_write_filler(self):
+        # Sizes around the varint length boundaries need two values.
+        for size in list(range(2, 300)) + [16384, 16385, 16386, 16387]:
+            output = io.BytesIO()
+            wire_edit._write_filler(output, b'\x0a', size)
+            self.assertEqual(size, len(output.getvalue()))
+            message = debian_package_pb2.SourcePackage()
+            message.MergeFromString(output.getvalue())
+            self.assertEqual('', message.name.strip())
+
+    def test_large_field_not_used_as_filler(self):
+        # The only string or bytes field is the tarball, before the
+        # changelog, so using it as filler would mean copying it.
+        message_class = debian_package_pb2.SourcePackage
+        tarball = message_class(original_tarball=b'\xff' * (
+            wire_edit._MAX_FILLER_COPY_SIZE + 1)).SerializePartialToString()
+        build_depends = wire_edit.encode_field(
+            message_class, 'build_depends',
+            debian_package_pb2.Relation(name='debhelper'))
+        changelog = b''.join(
+            wire_edit.encode_field(message_class, 'changelog', change)
+            for change in self.package.changelog)
+        path = self.write_file(tarball + changelog + build_depends)
+        bytes_read = self.replace_in_file(path, 'changelog', [self.change])
+        self.assertLess(bytes_read, len(tarball))
+        with open(path, 'rb') as input_file:
+            self.assertEqual(
+                tarball + build_depends + wire_edit.encode_field(
+                    message_class, 'changelog', self.change),
+                input_file.read())
+
+if __name__ == "__main__":
+    unittest.main()